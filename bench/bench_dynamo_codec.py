@@ -0,0 +1,116 @@
+"""
+Benchmark: body JSON di get_skills da pagine DynamoDB in formato wire.
+
+Confronta, sugli stessi item sintetici (10k per default, come un insieme di
+pagine Scan):
+  - TypeDeserializer + json.dumps(default=str): il percorso precedente (numeri
+    Decimal serializzati come stringhe);
+  - dynamo_codec.item_to_python + json.dumps: tipi nativi, ma con il grafo di
+    oggetti Python intermedio;
+  - dynamo_codec.dumps_items: JSON scritto direttamente dagli item wire.
+Il parsing HTTP di botocore (che produce comunque i dict wire) è uguale per
+tutti e non è misurato. Per ogni percorso riporta ms per pagina completa e il
+picco di memoria allocata (tracemalloc).
+
+Uso:
+    python bench/bench_dynamo_codec.py [--items 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "layers", "skills_common", "python"
+))
+
+from boto3.dynamodb.types import TypeDeserializer
+
+import dynamo_codec
+
+EXCLUDED = ("embedding",)
+_deserializer = TypeDeserializer()
+
+
+def make_items(count):
+    items = []
+    for i in range(count):
+        items.append({
+            "Skill_UID": {"S": str(uuid.UUID(int=i))},
+            "user": {"S": f"user-{i % 200}"},
+            "skill": {"S": f"Skill {i % 1500}"},
+            "level": {"N": str(i % 7 + 1)},
+            "mentions": {"N": str(i % 31 + 1)},
+            "acquired_on": {"S": "12/03/2025"},
+            "last_seen": {"S": "2025-06-01T10:00:00Z"},
+            "source": {"S": "chat"},
+            "status": {"S": "learning"},
+            "embedding_model": {"S": "text-embedding-004"},
+            "embedding": {"B": bytes(1024)},
+        })
+    return items
+
+
+def legacy(items):
+    converted = []
+    for item in items:
+        row = {key: _deserializer.deserialize(value) for key, value in item.items() if key not in EXCLUDED}
+        converted.append(row)
+    return json.dumps(converted, default=str)
+
+
+def native(items):
+    converted = [
+        {key: dynamo_codec.to_python(value) for key, value in item.items() if key not in EXCLUDED}
+        for item in items
+    ]
+    return json.dumps(converted)
+
+
+def direct(items):
+    return dynamo_codec.dumps_items(items, exclude=EXCLUDED)
+
+
+def measure(func, items, repeat):
+    func(items)
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(items)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    func(items)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serializzazione JSON di item DynamoDB")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    expected = json.loads(native(items))
+    assert json.loads(direct(items)) == expected
+    # il percorso precedente restituiva i numeri come stringhe
+    assert json.loads(legacy(items))[0]["level"] == str(expected[0]["level"])
+
+    print(f"{args.items} item, miglior tempo su {args.repeat}")
+    print(f"{'percorso':<34}{'ms':>10}{'picco MB':>10}")
+    for name, func in (
+        ("TypeDeserializer + default=str", legacy),
+        ("to_python + json.dumps", native),
+        ("dumps_items", direct),
+    ):
+        ms, peak = measure(func, items, args.repeat)
+        print(f"{name:<34}{ms:>10.1f}{peak / 1024 / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: generate_content vs generate_content_raw per chiamata.
+
+Usa il client google.genai del bundle di chat_skill con `request` sostituito da
+una funzione che ritorna subito una risposta JSON tipica di chat_skill, quindi
+misura solo il lavoro CPU lato client (costruzione richiesta + gestione
+risposta), senza rete. Per ogni percorso riporta µs per chiamata e, con
+tracemalloc, il picco di memoria allocata durante una chiamata.
+
+Uso:
+    python bench/bench_generate_content_response.py [--calls 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BUNDLE_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "skills", "chat_skill", "package"
+))
+sys.path.insert(0, BUNDLE_DIR)
+
+from google import genai
+
+RESPONSE_BODY = json.dumps({
+    "candidates": [{
+        "content": {
+            "parts": [{"text": '{"action": "learn_skill", "skills": ["Python", "SQL"]}'}],
+            "role": "model",
+        },
+        "finishReason": "STOP",
+        "index": 0,
+    }],
+    "usageMetadata": {"promptTokenCount": 180, "candidatesTokenCount": 17, "totalTokenCount": 197},
+    "modelVersion": "gemini-2.5-flash",
+    "responseId": "bench",
+})
+CONFIG = {"temperature": 0.3, "max_output_tokens": 200, "thinking_config": {"thinking_budget": 0}}
+
+
+class _Response:
+    body = RESPONSE_BODY
+
+
+def make_client():
+    client = genai.Client(api_key="bench")
+    client._api_client.request = lambda method, path, request, http_options=None: _Response()
+    return client
+
+
+def call_full(client):
+    response = client.models.generate_content(model="gemini-2.5-flash", contents="messaggio", config=CONFIG)
+    return response.text, response.usage_metadata.total_token_count
+
+
+def call_raw(client):
+    response = client.models.generate_content_raw(model="gemini-2.5-flash", contents="messaggio", config=CONFIG)
+    return response.text, response.usage_metadata["totalTokenCount"]
+
+
+def measure(func, client, calls):
+    for _ in range(50):
+        func(client)
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        func(client)
+    cpu_us = (time.perf_counter() - t0) / calls * 1e6
+
+    # picco di memoria allocata durante una chiamata (oggetti temporanei compresi)
+    peaks = []
+    tracemalloc.start()
+    for _ in range(max(1, calls // 10)):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(client)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return cpu_us, sum(peaks) / len(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generate_content vs generate_content_raw")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    client = make_client()
+    assert call_full(client)[0] == call_raw(client)[0]
+
+    print(f"{args.calls} chiamate, richiesta + risposta senza rete")
+    print(f"{'percorso':<22}{'µs/chiamata':>12}{'picco KB':>10}")
+    for name, func in (("generate_content", call_full), ("generate_content_raw", call_raw)):
+        cpu_us, peak = measure(func, client, args.calls)
+        print(f"{name:<22}{cpu_us:>12.1f}{peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
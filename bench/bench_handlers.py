@@ -0,0 +1,370 @@
+"""
+Benchmark locale di tutti i lambda_handler, senza AWS né chiave Google.
+
+Ogni handler viene eseguito con eventi API Gateway sintetici contro:
+  - fake_dynamodb.FakeDynamoDB, agganciato al client boto3 di skills_repository
+    (botocore serializza e parsa come in produzione, cambia solo l'HTTP);
+  - gemini_stand_in.GeminiStandIn (ReplayApiClient del client vendorizzato) con
+    latenza iniettata configurabile.
+Per ogni endpoint riporta il tempo di init a freddo (import + codice di modulo,
+misurato in un processo nuovo) e, per ogni dimensione di tabella, latenza
+p50/p95/p99, throughput sequenziale, picco di memoria allocata per invocazione
+(tracemalloc) ed errori (status >= 500).
+
+Uso:
+    python bench/bench_handlers.py [--sizes 100,1000,10000] [--invocations 200]
+        [--latency-ms 300] [--jitter-ms 50] [--endpoints get_skills,chat_skill]
+        [--via-router]
+
+Con --via-router skills_api parte come su Lambda, con il solo layer nel path
+(sorgenti e dipendenze di scripts/build_layer.py skills_common, che va eseguito
+prima): se l'init non carica tutte le route CRUD il bench si ferma.
+"""
+import argparse
+import base64
+import importlib.util
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+LAYER_DIR = os.path.join(ROOT_DIR, "lambdas", "layers", "skills_common", "python")
+HANDLERS_DIR = os.path.join(ROOT_DIR, "lambdas", "skills")
+CHAT_PACKAGE_DIR = os.path.join(HANDLERS_DIR, "chat_skill", "package")
+# Dipendenze del layer (cachetools), installate da scripts/build_layer.py skills_common
+COMMON_DEPS_DIR = os.path.join(ROOT_DIR, "build", "skills_common_layer", "python")
+sys.path.insert(0, LAYER_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+
+def genai_importable():
+    try:
+        return importlib.util.find_spec("google.genai") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def add_chat_package():
+    """google.genai, httpx e certifi dal bundle di chat_skill (se non ne è già stato messo uno nel path)."""
+    if not genai_importable() and CHAT_PACKAGE_DIR not in sys.path:
+        sys.path.append(CHAT_PACKAGE_DIR)
+
+
+if os.path.isdir(COMMON_DEPS_DIR):
+    sys.path.insert(1, COMMON_DEPS_DIR)
+else:
+    # layer non costruito: cachetools c'è anche nel bundle di chat_skill
+    add_chat_package()
+
+# Il client boto3 viene creato all'import di skills_repository: servono regione e credenziali finte
+for name, value in (("AWS_DEFAULT_REGION", "eu-west-1"), ("AWS_ACCESS_KEY_ID", "bench"),
+                    ("AWS_SECRET_ACCESS_KEY", "bench"), ("GOOGLE_API_KEY", "bench")):
+    os.environ.setdefault(name, value)
+
+# Handler che chiamano Gemini
+GEMINI_ENDPOINTS = {"chat_skill", "search_skills"}
+ENDPOINTS = ["get_skills", "get_skill_by_id", "get_skill_changes", "count_skills", "get_skill_summary",
+             "get_trending_skills", "add_skill", "update_skill", "delete_skill", "search_skills", "chat_skill"]
+
+MESSAGES = [
+    "Oggi ho finito il corso su {skill}",
+    "Sto migliorando con {skill} al lavoro",
+    "Ho imparato le basi di {skill} e {other}",
+]
+
+
+def skill_vocabulary():
+    with open(os.path.join(LAYER_DIR, "skill_synonyms.json")) as f:
+        return sorted(json.load(f))
+
+
+def install_fakes(latency_ms=0.0, jitter_ms=0.0, gemini=True):
+    """Aggancia DynamoDB finto e (se richiesto) lo stand-in Gemini; ritorna il FakeDynamoDB."""
+    import fake_dynamodb
+    import metrics
+    import skills_repository
+
+    # le righe EMF vengono comunque costruite e scritte, ma non a video
+    metrics.OUTPUT = open(os.devnull, "w")
+    fake = fake_dynamodb.FakeDynamoDB()
+    fake.create_table(skills_repository.TABLE_NAME, "Skill_UID",
+                      indexes={skills_repository.USER_INDEX: ("user", None),
+                               skills_repository.UPDATED_INDEX: ("user", "updated_at"),
+                               skills_repository.ACQUIRED_INDEX: ("user", "acquired_on"),
+                               skills_repository.CREATED_INDEX: ("user", "Skill_ULID")})
+    fake.create_table(skills_repository.META_TABLE_NAME, "pk")
+    fake.create_table(skills_repository.AI_RESPONSE_TABLE_NAME, "response_id")
+    fake.create_table(skills_repository.TOMBSTONE_TABLE_NAME, "Skill_UID",
+                      indexes={skills_repository.UPDATED_INDEX: ("user", "updated_at")})
+    fake.install(skills_repository.client)
+    if gemini:
+        install_gemini(latency_ms, jitter_ms)
+    return fake
+
+
+def install_gemini(latency_ms=0.0, jitter_ms=0.0):
+    add_chat_package()
+    import gemini_http
+    import gemini_stand_in
+    gemini_stand_in.install(gemini_http, latency_ms, jitter_ms)
+
+
+def seed(fake, size, rnd):
+    """Riempie la tabella con size skill (circa 50 per utente) con embedding già calcolati."""
+    import gemini_stand_in
+    import skill_cache
+    import skill_embeddings
+    import skills_repository
+
+    vocabulary = skill_vocabulary()
+    users = [f"user-{i}" for i in range(max(1, size // 50))]
+    items = []
+    while len(items) < size:
+        user = users[len(items) % len(users)]
+        name = vocabulary[rnd.randrange(len(vocabulary))] if rnd.random() < 0.5 else f"Skill {rnd.randrange(size * 2)}"
+        skill_id = skills_repository.skill_key(user, name)
+        acquired_on = f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00Z"
+        created = datetime.strptime(acquired_on, skills_repository.ISO_FORMAT).replace(tzinfo=timezone.utc)
+        items.append({
+            "Skill_UID": skill_id,
+            "user": user,
+            "skill": name,
+            "level": rnd.randint(1, 5),
+            "mentions": rnd.randint(1, 20),
+            "acquired_on": acquired_on,
+            "Skill_ULID": skills_repository.new_ulid(created.timestamp()),
+            "last_seen": "2025-06-01T10:00:00Z",
+            "source": "chat",
+            "status": "learning",
+            "embedding": skill_embeddings.to_binary(gemini_stand_in.text_vector(name, skill_embeddings.EMBEDDING_DIM)),
+            "embedding_model": skill_embeddings.EMBEDDING_MODEL,
+        })
+    skills_repository.batch_write_skills(puts=items)
+    # scrittura come le altre: le letture in cache diventano superate
+    skill_cache.invalidate(users)
+    return users, vocabulary
+
+
+def load_handler(name):
+    directory = os.path.join(HANDLERS_DIR, name)
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", os.path.join(directory, "lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+
+def load_router():
+    """skills_api con il solo layer nel path, come su Lambda; esce se l'init non ha caricato una route CRUD."""
+    if not os.path.isdir(COMMON_DEPS_DIR):
+        raise SystemExit("Dipendenze del layer mancanti: eseguire prima scripts/build_layer.py skills_common")
+    router = load_handler("skills_api")
+    expected = {name for _, _, name in router.__globals__["ROUTES"]} - router.__globals__["LAZY_HANDLERS"]
+    missing = sorted(expected - set(router.__globals__["_handlers"]))
+    if missing:
+        raise SystemExit(f"skills_api: handler non caricati nell'init: {', '.join(missing)}")
+    return router
+
+
+class Events:
+    """Eventi sintetici (payload REST API 1.0) per ogni endpoint."""
+
+    def __init__(self, fake, users, vocabulary, rnd):
+        import skills_repository
+        self.table = fake.tables[skills_repository.TABLE_NAME]
+        self.users = users
+        self.vocabulary = vocabulary
+        self.rnd = rnd
+
+    def _existing(self):
+        item = self.rnd.choice(list(self.table.items.values()))
+        return item["Skill_UID"]["S"], item
+
+    def _restore(self, item):
+        return lambda: self.table.put(item)
+
+    def get_skills(self):
+        return {"httpMethod": "GET", "resource": "/skills", "path": "/skills"}, None
+
+    def get_skill_by_id(self):
+        skill_id, _ = self._existing()
+        return {"httpMethod": "GET", "resource": "/skills/{id}", "path": f"/skills/{skill_id}",
+                "pathParameters": {"id": skill_id}}, None
+
+    def get_skill_changes(self):
+        # sync di un client che era allineato un minuto fa: tornano le skill scritte dopo
+        since = (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        params = {"user": self.rnd.choice(self.users),
+                  "since": base64.urlsafe_b64encode(f"{since}|".encode()).decode()}
+        return {"httpMethod": "GET", "resource": "/skills/changes", "path": "/skills/changes",
+                "queryStringParameters": params}, None
+
+    def count_skills(self):
+        params = {"user": self.rnd.choice(self.users)}
+        return {"httpMethod": "GET", "resource": "/skills/count", "path": "/skills/count",
+                "queryStringParameters": params}, None
+
+    def get_skill_summary(self):
+        params = {"user": self.rnd.choice(self.users)}
+        return {"httpMethod": "GET", "resource": "/skills/summary", "path": "/skills/summary",
+                "queryStringParameters": params}, None
+
+    def get_trending_skills(self):
+        params = {"k": str(self.rnd.choice([5, 10, 20])), "weeks": str(self.rnd.randint(1, 4))}
+        return {"httpMethod": "GET", "resource": "/skills/trending", "path": "/skills/trending",
+                "queryStringParameters": params}, None
+
+    def add_skill(self):
+        body = {"user": self.rnd.choice(self.users), "skill": self.rnd.choice(self.vocabulary)}
+        return {"httpMethod": "POST", "resource": "/skills", "path": "/skills", "body": json.dumps(body)}, None
+
+    def update_skill(self):
+        skill_id, item = self._existing()
+        return {"httpMethod": "PUT", "resource": "/skills/{id}", "path": f"/skills/{skill_id}",
+                "pathParameters": {"id": skill_id},
+                "body": json.dumps({"level": self.rnd.randint(1, 5)})}, self._restore(item)
+
+    def delete_skill(self):
+        skill_id, item = self._existing()
+        # l'item cancellato viene rimesso dopo l'invocazione: la tabella resta della stessa dimensione
+        return {"httpMethod": "DELETE", "resource": "/skills/{id}", "path": f"/skills/{skill_id}",
+                "pathParameters": {"id": skill_id}}, self._restore(item)
+
+    def search_skills(self):
+        params = {"q": self.rnd.choice(self.vocabulary), "user": self.rnd.choice(self.users), "k": "5"}
+        return {"httpMethod": "GET", "resource": "/skills/search", "path": "/skills/search",
+                "queryStringParameters": params}, None
+
+    def chat_skill(self):
+        message = self.rnd.choice(MESSAGES).format(skill=self.rnd.choice(self.vocabulary),
+                                                   other=self.rnd.choice(self.vocabulary))
+        body = {"user": self.rnd.choice(self.users), "message": message}
+        return {"httpMethod": "POST", "resource": "/skills/chat", "path": "/skills/chat",
+                "body": json.dumps(body)}, None
+
+
+def cold_init(endpoint, via_router):
+    """Eseguito nel processo figlio: ms da import del layer a handler pronto."""
+    t0 = time.perf_counter()
+    # skills_api carica gli handler Gemini solo alla prima richiesta: nell'init google.genai non serve
+    install_fakes(gemini=not via_router and endpoint in GEMINI_ENDPOINTS)
+    if via_router:
+        load_router()
+    else:
+        load_handler(endpoint)
+    return (time.perf_counter() - t0) * 1000
+
+
+def measure_cold(endpoint, via_router, repeat):
+    command = [sys.executable, os.path.abspath(__file__), "--cold-init", endpoint]
+    if via_router:
+        command.append("--via-router")
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode:
+            raise SystemExit(f"Init di {endpoint}: {proc.stderr.strip().splitlines()[-1]}")
+        samples.append(float(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def invoke(handler, events, endpoint):
+    event, cleanup = getattr(events, endpoint)()
+    t0 = time.perf_counter()
+    response = handler(event, None)
+    elapsed = time.perf_counter() - t0
+    if cleanup:
+        cleanup()
+    return elapsed, response["statusCode"]
+
+
+def measure_warm(handler, events, endpoint, invocations):
+    for _ in range(5):
+        invoke(handler, events, endpoint)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(invocations):
+        elapsed, status = invoke(handler, events, endpoint)
+        latencies.append(elapsed * 1000)
+        errors += status >= 500
+    total = time.perf_counter() - started
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(max(1, min(invocations, 50))):
+        event, cleanup = getattr(events, endpoint)()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        handler(event, None)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        if cleanup:
+            cleanup()
+    tracemalloc.stop()
+
+    q = statistics.quantiles(latencies, n=100)
+    return {"p50": q[49], "p95": q[94], "p99": q[98], "rps": invocations / total,
+            "peak_kb": statistics.mean(peaks) / 1024, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark locale dei lambda_handler")
+    parser.add_argument("--sizes", default="100,1000,10000", help="dimensioni della tabella")
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="latenza iniettata di Gemini")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--via-router", action="store_true", help="passa dalla Lambda skills_api")
+    parser.add_argument("--cold-repeat", type=int, default=3, help="processi per la misura di init")
+    parser.add_argument("--cold-init", metavar="ENDPOINT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # i log degli handler non servono a video
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    if args.cold_init:
+        print(f"{cold_init(args.cold_init, args.via_router):.2f}")
+        return
+
+    endpoints = [name for name in args.endpoints.split(",") if name]
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    cold = {name: measure_cold(name, args.via_router, args.cold_repeat) for name in endpoints}
+
+    # via router lo stand-in Gemini (e il bundle di chat_skill) arriva dopo l'init di skills_api
+    fake = install_fakes(args.latency_ms, args.jitter_ms, gemini=not args.via_router)
+    import skills_repository
+    handlers = {}
+    if args.via_router:
+        router = load_router()
+        install_gemini(args.latency_ms, args.jitter_ms)
+        handlers = {name: router for name in endpoints}
+    else:
+        handlers = {name: load_handler(name) for name in endpoints}
+
+    print(f"Gemini: latenza {args.latency_ms:.0f} ± {args.jitter_ms:.0f} ms, "
+          f"{args.invocations} invocazioni per misura{', via skills_api' if args.via_router else ''}")
+    print(f"{'endpoint':<17}{'item':>7}{'init ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'req/s':>9}{'picco KB':>10}{'errori':>8}")
+    for size in sizes:
+        rnd = random.Random(size)
+        # la tabella meta resta: le generazioni devono solo crescere
+        table = fake.tables[skills_repository.TABLE_NAME]
+        table.items.clear()
+        table.partitions = {name: {} for name in table.indexes}
+        users, vocabulary = seed(fake, size, rnd)
+        events = Events(fake, users, vocabulary, rnd)
+        for name in endpoints:
+            result = measure_warm(handlers[name], events, name, args.invocations)
+            print(f"{name:<17}{size:>7}{cold[name]:>9.1f}{result['p50']:>9.2f}{result['p95']:>9.2f}"
+                  f"{result['p99']:>9.2f}{result['rps']:>9.1f}{result['peak_kb']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark del tempo di import di google.genai nel bundle di chat_skill.
+
+Lancia `python -X importtime -c "from google import genai"` in processi nuovi
+con il bundle nel PYTHONPATH, e riporta la mediana del tempo cumulativo di
+google.genai e i moduli più costosi. Fa da guardia sul cold start:
+  - esce con codice 1 se un modulo che deve restare lazy (live, websockets,
+    batches, ...) viene importato da `from google import genai`;
+  - esce con codice 1 se la mediana supera --budget-ms.
+
+Uso:
+    python bench/bench_import_time.py [--runs 7] [--top 15] [--budget-ms 2500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BUNDLE_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "skills", "chat_skill", "package"
+))
+
+# Moduli che client.py carica solo al primo accesso
+DEFERRED_MODULES = [
+    "google.genai.live",
+    "google.genai.batches",
+    "google.genai.caches",
+    "google.genai.files",
+    "google.genai.tunings",
+    "google.genai.operations",
+    "google.genai.tokens",
+    "google.genai.chats",
+    "google.genai._replay_api_client",
+    "websockets",
+]
+
+
+def import_times(statement):
+    """Una misura: {modulo: (self_us, cumulative_us)} da -X importtime."""
+    env = dict(os.environ, PYTHONPATH=BUNDLE_DIR)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo di import di google.genai")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="fallisce se la mediana supera questo valore")
+    parser.add_argument("--statement", default="from google import genai")
+    args = parser.parse_args()
+
+    runs = [import_times(args.statement) for _ in range(args.runs)]
+    totals = [run["google.genai"][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals)
+
+    self_times = defaultdict(list)
+    for run in runs:
+        for name, (self_us, _) in run.items():
+            self_times[name].append(self_us)
+
+    print(f"{args.statement!r}: mediana {median_ms:.1f} ms su {args.runs} processi "
+          f"(min {min(totals):.1f}, max {max(totals):.1f})")
+    print(f"\nTop {args.top} moduli per tempo proprio (mediana, ms):")
+    ranked = sorted(self_times.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)
+    for name, values in ranked[:args.top]:
+        print(f"  {statistics.median(values) / 1000:8.1f}  {name}")
+
+    failures = []
+    eager = sorted({name for run in runs for name in run if name in DEFERRED_MODULES})
+    if eager:
+        failures.append("moduli che dovrebbero essere lazy importati subito: " + ", ".join(eager))
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        failures.append(f"mediana {median_ms:.1f} ms oltre il budget di {args.budget_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"\nERRORE: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
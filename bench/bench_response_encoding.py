@@ -0,0 +1,94 @@
+"""
+Benchmark: formato e compressione del body di get_skills (trasferimento vs CPU).
+
+Sugli item sintetici di bench_dynamo_codec, per ogni combinazione di formato
+(JSON da dumps_items, MessagePack) e codifica (nessuna, gzip livelli 1/6/9,
+brotli qualità 1/5/11 se il pacchetto c'è) riporta:
+  - byte del body e del payload base64 (è quello che conta per il limite di
+    6 MB delle risposte Lambda) e quanti item ci stanno in 6 MB;
+  - ms lato Lambda: serializzazione + compressione;
+  - ms lato client: decompressione + parsing.
+
+Uso:
+    python bench/bench_response_encoding.py [--items 1000,10000] [--repeat 5]
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "layers", "skills_common", "python"
+))
+
+import dynamo_codec
+import response_encoding
+from bench_dynamo_codec import EXCLUDED, make_items
+
+LAMBDA_RESPONSE_LIMIT = 6 * 1024 * 1024
+
+
+def serializers():
+    result = [("json", lambda items: dynamo_codec.dumps_items(items, exclude=EXCLUDED).encode("utf-8"), json.loads)]
+    if response_encoding.msgpack is not None:
+        msgpack = response_encoding.msgpack
+        result.append((
+            "msgpack",
+            lambda items: response_encoding.pack([dynamo_codec.item_to_python(i, exclude=EXCLUDED) for i in items]),
+            lambda data: msgpack.unpackb(data, raw=False),
+        ))
+    return result
+
+
+def codecs():
+    result = [("-", lambda data: data, lambda data: data)]
+    for level in (1, 6, 9):
+        result.append((f"gzip {level}", lambda data, level=level: gzip.compress(data, level, mtime=0), gzip.decompress))
+    if response_encoding.brotli is not None:
+        brotli = response_encoding.brotli
+        for quality in (1, 5, 11):
+            result.append((f"br {quality}", lambda data, quality=quality: brotli.compress(data, quality=quality),
+                           brotli.decompress))
+    return result
+
+
+def best_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Formato e compressione delle risposte di get_skills")
+    parser.add_argument("--items", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if response_encoding.brotli is None or response_encoding.msgpack is None:
+        print("brotli o msgpack non installati: le relative righe sono saltate")
+    for count in (int(n) for n in args.items.split(",")):
+        items = make_items(count)
+        print(f"\n{count} item, miglior tempo su {args.repeat}")
+        print(f"{'formato':<9}{'codifica':<10}{'KB':>9}{'KB base64':>11}{'item/6MB':>10}"
+              f"{'Lambda ms':>11}{'client ms':>11}")
+        for format_name, serialize, parse in serializers():
+            serialize_ms, raw = best_ms(lambda: serialize(items), args.repeat)
+            for codec_name, compress, decompress in codecs():
+                compress_ms, body = best_ms(lambda: compress(raw), args.repeat)
+                client_ms, parsed = best_ms(lambda: parse(decompress(body)), args.repeat)
+                assert len(parsed) == count
+                # senza compressione il JSON viaggia come testo, il resto in base64
+                wire = len(body) if (format_name, codec_name) == ("json", "-") else len(base64.b64encode(body))
+                fit = int(LAMBDA_RESPONSE_LIMIT / wire * count)
+                print(f"{format_name:<9}{codec_name:<10}{len(body) / 1024:>9.0f}{wire / 1024:>11.0f}{fit:>10}"
+                      f"{serialize_ms + compress_ms:>11.1f}{client_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
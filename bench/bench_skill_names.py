@@ -0,0 +1,110 @@
+"""
+Verifica e tempi della canonicalizzazione dei nomi (skill_names).
+
+  1. falsi positivi: parole corte vicine a un alias ("Bass" e "bash", "Lava" e
+     "java") restano invariate, e nessuna variante a una lettera di distanza
+     delle voci di 4-5 caratteri del dizionario passa dal match fuzzy (il nome
+     canonico entra nello Skill_UID: un match sbagliato fonde due skill);
+  2. errori di battitura: refusi e lettere scambiate sui nomi lunghi trovano
+     ancora la voce giusta;
+  3. tempi: µs per canonicalize() su lookup esatti, prefissi, fuzzy e miss.
+Esce con codice 1 se una verifica fallisce.
+
+Uso:
+    python bench/bench_skill_names.py [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import string
+import sys
+import time
+
+LAYER_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "layers", "skills_common", "python"
+))
+sys.path.insert(0, LAYER_DIR)
+
+import skill_names
+
+FALSE_POSITIVES = ["Bass", "Dash", "Lava", "Rusk", "Linus", "Gava", "Rubi", "Scale", "Cash"]
+TYPOS = {
+    "Pyhton": "Python",
+    "Javscript": "JavaScript",
+    "Typescirpt": "TypeScript",
+    "Kuberntes": "Kubernetes",
+    "Dockre": "Docker",
+    "kubern": "Kubernetes",
+    "python3": "Python",
+}
+
+
+def check(label, ok, detail=""):
+    print(f"{label:<44} {'ok' if ok else 'FALLITO'}  {detail}")
+    return ok
+
+
+def dictionary_keys():
+    with open(skill_names.DICTIONARY_PATH, encoding="utf-8") as f:
+        synonyms = json.load(f)
+    return {skill_names.normalize(name) for canonical, aliases in synonyms.items() for name in [canonical, *aliases]}
+
+
+def one_edit_variants(key):
+    for i in range(len(key)):
+        for ch in string.ascii_lowercase:
+            if ch != key[i]:
+                yield key[:i] + ch + key[i + 1:]
+
+
+def run_false_positives(keys):
+    changed = {name: skill_names.canonicalize(name) for name in FALSE_POSITIVES}
+    wrong = {name: result for name, result in changed.items() if result != name}
+    ok = check("falsi positivi noti", not wrong, ", ".join(f"{n} -> {r}" for n, r in wrong.items()))
+
+    merged, tried = [], 0
+    for key in sorted(k for k in keys if 4 <= len(k) <= 5):
+        for variant in one_edit_variants(key):
+            if variant in keys:
+                continue
+            tried += 1
+            before = skill_names.STATS["fuzzy"]
+            result = skill_names.canonicalize(variant)
+            if skill_names.STATS["fuzzy"] != before:
+                merged.append(f"{variant} -> {result}")
+    ok &= check("varianti delle voci di 4-5 caratteri", not merged,
+                f"{len(merged)} fuse su {tried}: {', '.join(merged[:5])}")
+    return ok
+
+
+def run_typos():
+    wrong = {name: skill_names.canonicalize(name) for name in TYPOS}
+    wrong = {name: result for name, result in wrong.items() if result != TYPOS[name]}
+    return check("errori di battitura", not wrong, ", ".join(f"{n} -> {r}" for n, r in wrong.items()))
+
+
+def run_timing(repeat):
+    for label, names in (("esatto", ["Python", "python3"]), ("prefisso", ["kubern"]),
+                         ("fuzzy", ["Javscript", "Pyhton"]), ("miss", ["Bass", "Underwater basket weaving"])):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for name in names:
+                skill_names.canonicalize(name)
+        elapsed = (time.perf_counter() - started) / (repeat * len(names))
+        print(f"tempo {label:<10} {elapsed * 1e6:>8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    keys = dictionary_keys()
+    ok = run_false_positives(keys)
+    ok &= run_typos()
+    run_timing(args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
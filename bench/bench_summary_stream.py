@@ -0,0 +1,159 @@
+"""
+Benchmark e verifica del consumer dello stream (skills_summary_stream).
+
+Tre passaggi sul DynamoDB finto, tutti con lo stesso handler della Lambda:
+  1. fixture: applica bench/fixtures/skills_stream_batch.json (INSERT, level-up,
+     MODIFY del solo embedding, cambio di utente, REMOVE) e confronta i
+     riepiloghi con quelli attesi; lo stesso batch rimandato va tutto in
+     duplicati e non cambia nulla;
+  2. retry: fa fallire un record a metà batch, controlla che batchItemFailures
+     riporti proprio quello e che rimandare il batch da lì dia lo stesso
+     risultato;
+  3. carico: con lo stream abilitato semina --items skill e fa --writes
+     scritture casuali con gli handler (add/update/delete), poi applica i record
+     a blocchi di --batch-size (misurando record/s) e confronta ogni riepilogo
+     con quello ricalcolato da zero dalla tabella.
+Esce con codice 1 se un confronto fallisce.
+
+Uso:
+    python bench/bench_summary_stream.py [--items 2000] [--writes 2000] [--batch-size 100]
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import bench_handlers
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "skills_stream_batch.json")
+# istante dell'ultimo record della fixture: la finestra dell'attività parte da lì
+FIXTURE_NOW = datetime(2025, 6, 1, 10, 5, tzinfo=timezone.utc)
+
+EXPECTED = {
+    # Python (livello 2) resta; SQL cancellata; Go passata a user-b
+    "user-a": {"total": 1, "average_level": 2.0, "levels": {"2": 1}, "last_learned": None,
+               "activity": {"2025-06-01": 5}},
+    "user-b": {"total": 1, "average_level": 1.0, "levels": {"1": 1},
+               "last_learned": {"Skill_UID": "9e8d7c6b-5a4f-5e3d-2c1b-0a9f8e7d6c5b", "skill": "Go",
+                                "acquired_on": "2025-06-01T10:00:00Z"},
+               "activity": {"2025-06-01": 1}},
+}
+
+
+def summaries(users, now=None):
+    import skill_summary
+    import skills_repository
+    result = {}
+    for user in users:
+        response = skill_summary.to_response(user, skills_repository.get_summary(user) or {}, now)
+        result[user] = {key: response[key] for key in ("total", "average_level", "levels", "last_learned", "activity")}
+    return result
+
+
+def check(label, actual, expected):
+    ok = actual == expected
+    print(f"{label:<40} {'ok' if ok else 'DIVERSO'}")
+    if not ok:
+        print("  atteso:  ", json.dumps(expected, sort_keys=True))
+        print("  ottenuto:", json.dumps(actual, sort_keys=True))
+    return ok
+
+
+def run_fixture(handler):
+    with open(FIXTURE) as f:
+        event = json.load(f)
+    ok = check("fixture: batch completo", handler(event, None), {"batchItemFailures": []})
+    ok &= check("fixture: riepiloghi", summaries(EXPECTED, FIXTURE_NOW), EXPECTED)
+    handler(copy.deepcopy(event), None)
+    ok &= check("fixture: batch rimandato (duplicati)", summaries(EXPECTED, FIXTURE_NOW), EXPECTED)
+    return ok
+
+
+def run_retry(handler):
+    import skills_repository
+    with open(FIXTURE) as f:
+        records = json.load(f)["Records"]
+    # la quarta transazione è il quinto record: il MODIFY del solo embedding non ne fa
+    failing = records[4]["dynamodb"]["SequenceNumber"]
+    original = skills_repository.apply_summary_changes
+    calls = []
+
+    def flaky(marker, changes):
+        calls.append(marker)
+        if len(calls) == 4:
+            raise RuntimeError("errore simulato")
+        return original(marker, changes)
+
+    skills_repository.apply_summary_changes = flaky
+    try:
+        response = handler({"Records": records}, None)
+    finally:
+        skills_repository.apply_summary_changes = original
+    ok = check("retry: batchItemFailures", response, {"batchItemFailures": [{"itemIdentifier": failing}]})
+    # Lambda rimanda il batch dal record fallito in poi
+    start = next(i for i, record in enumerate(records) if record["dynamodb"]["SequenceNumber"] == failing)
+    handler({"Records": records[start:]}, None)
+    ok &= check("retry: riepiloghi dopo il retry", summaries(EXPECTED, FIXTURE_NOW), EXPECTED)
+    return ok
+
+
+def run_load(fake, handler, items, writes, batch_size):
+    import skill_summary
+    import skills_repository
+    rnd = random.Random(7)
+    fake.enable_stream(skills_repository.TABLE_NAME)
+    users, vocabulary = bench_handlers.seed(fake, items, rnd)
+    events = bench_handlers.Events(fake, users, vocabulary, rnd)
+    endpoints = ["add_skill", "update_skill", "delete_skill"]
+    handlers = {name: bench_handlers.load_handler(name) for name in endpoints}
+    for _ in range(writes):
+        name = rnd.choice(endpoints)
+        event, _ = getattr(events, name)()  # niente cleanup: le scritture restano
+        handlers[name](event, None)
+
+    table = fake.tables[skills_repository.TABLE_NAME]
+    records = table.stream
+    started = time.perf_counter()
+    for start in range(0, len(records), batch_size):
+        handler({"Records": records[start:start + batch_size]}, None)
+    elapsed = time.perf_counter() - started
+    print(f"carico: {len(records)} record in {elapsed * 1000:.0f} ms ({len(records) / elapsed:.0f} record/s, "
+          f"{fake.calls.get('TransactWriteItems', 0)} transazioni)")
+
+    by_user = {}
+    for item in table.items.values():
+        by_user.setdefault(item["user"]["S"], []).append(skills_repository.deserialize(item))
+    expected = {}
+    for user in set(by_user) | set(users):
+        response = skill_summary.to_response(user, skill_summary.from_items(by_user.get(user, [])))
+        expected[user] = {key: response[key] for key in ("total", "average_level", "levels")}
+    actual = {user: {key: value[key] for key in ("total", "average_level", "levels")}
+              for user, value in summaries(expected).items()}
+    return check("carico: totali e livelli esatti", actual, expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    import skills_repository
+    fake = bench_handlers.install_fakes(gemini=False)
+    handler = bench_handlers.load_handler("skills_summary_stream")
+    ok = run_fixture(handler)
+    # ogni passaggio riparte da riepiloghi e marcatori vuoti
+    fake.create_table(skills_repository.META_TABLE_NAME, "pk")
+    ok &= run_retry(handler)
+    fake.create_table(skills_repository.META_TABLE_NAME, "pk")
+    ok &= run_load(fake, handler, args.items, args.writes, args.batch_size)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: caricamento della tassonomia da JSON vs file binario con mmap.
+
+Genera una tassonomia sintetica (o usa i file passati), poi misura ogni
+caricamento in un processo Python nuovo, come un cold start: tempo di load,
+RSS aggiunto dal load, tempo della prima query nearest (con mmap include page
+fault e conversione a float32) e di una query warm, RSS dopo la query.
+
+Uso:
+    python bench/bench_taxonomy_load.py [--n 5000] [--dim 256] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+LAYER_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "lambdas", "layers", "skills_common", "python"
+))
+sys.path.insert(0, LAYER_DIR)
+
+import skill_taxonomy
+
+# Eseguito in un processo separato: tempi di load e query, RSS aggiunto prima e dopo la prima query
+_CHILD = r"""
+import json, sys, time
+sys.path.insert(0, sys.argv[3])
+import numpy as np
+import skill_taxonomy
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4
+
+kind, path = sys.argv[1], sys.argv[2]
+before = rss_kb()
+t0 = time.perf_counter()
+if kind == "json":
+    with open(path) as f:
+        data = json.load(f)
+    names = [e["name"] for e in data]
+    matrix = np.array([e["embedding"] for e in data], dtype=np.float32)
+else:
+    taxonomy = skill_taxonomy.Taxonomy(path)
+    matrix = taxonomy.matrix
+load_ms = (time.perf_counter() - t0) * 1000
+rss = rss_kb() - before
+
+query = np.full(matrix.shape[1], 1 / np.sqrt(matrix.shape[1]), dtype=np.float32)
+timings = []
+for _ in range(2):
+    t0 = time.perf_counter()
+    if kind == "json":
+        int((matrix @ query).argmax())
+    else:
+        taxonomy.nearest(query[None, :])
+    timings.append((time.perf_counter() - t0) * 1000)
+print(json.dumps({"load_ms": load_ms, "rss_kb": rss, "first_query_ms": timings[0],
+                  "warm_query_ms": timings[1], "rss_after_query_kb": rss_kb() - before}))
+"""
+
+
+def run(kind, path, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _CHILD, kind, path, LAYER_DIR],
+                             check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out))
+    return {key: statistics.median(r[key] for r in results) for key in results[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load tassonomia JSON vs mmap")
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((args.n, args.dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    names = [f"skill-{i}" for i in range(args.n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "taxonomy.json")
+        bin_path = os.path.join(tmp, "taxonomy.bin")
+        with open(json_path, "w") as f:
+            json.dump([{"name": n, "embedding": v.tolist()} for n, v in zip(names, matrix)], f)
+        skill_taxonomy.write_taxonomy(bin_path, names, matrix, "synthetic")
+
+        print(f"{args.n} voci x {args.dim} dim, mediana di {args.runs} processi")
+        print(f"{'formato':<8}{'file KB':>10}{'load ms':>10}{'RSS KB':>10}"
+              f"{'1a query':>10}{'warm':>8}{'RSS dopo':>10}")
+        for kind, path in (("json", json_path), ("mmap", bin_path)):
+            r = run(kind, path, args.runs)
+            print(f"{kind:<8}{os.path.getsize(path) / 1024:>10.0f}{r['load_ms']:>10.2f}{r['rss_kb']:>10.0f}"
+                  f"{r['first_query_ms']:>10.2f}{r['warm_query_ms']:>8.2f}{r['rss_after_query_kb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
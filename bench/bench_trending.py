@@ -0,0 +1,221 @@
+"""
+Verifica degli sketch della classifica (skill_trending) contro i conteggi esatti.
+
+Quattro passaggi, con le dimensioni di default del layer:
+  1. CMS: --mentions menzioni con distribuzione Zipf su --skills skill; nessuna
+     stima sotto il valore vero e, per almeno una frazione 1 - e^-depth delle
+     skill, sovrastima entro e/width * N (il limite riportato da error_bounds);
+  2. HLL: cardinalità da 10 a 100000 utenti, 20 prove indipendenti per
+     ciascuna; l'errore quadratico medio resta vicino all'errore standard
+     1.04/sqrt(2^p) (entro 1.3 volte); più HLL uniti equivalgono all'unione;
+  3. top-k: richiamo delle prime --k skill esatte tra le prime --k stimate;
+     l'HLL di ogni skill in classifica è identico a quello costruito dai suoi
+     utenti esatti (la selezione delle candidate non perde utenti); andata e
+     ritorno della serializzazione in item principale e parti, con le loro
+     dimensioni;
+  4. stream: salva il bucket del passaggio 3 come settimana corrente, dopo il
+     seed abilita lo stream e fa --writes scritture con gli handler, le applica
+     con skills_trending_stream (misurando record/s e WCU per transazione),
+     rimanda il batch (tutti duplicati) e confronta la classifica di
+     GET /skills/trending con i conteggi esatti delle menzioni.
+Esce con codice 1 se una verifica fallisce.
+
+Uso:
+    python bench/bench_trending.py [--skills 5000] [--mentions 200000] [--k 10] [--writes 3000]
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import bench_handlers
+
+
+def check(label, ok, detail=""):
+    print(f"{label:<44} {'ok' if ok else 'FALLITO'}  {detail}")
+    return ok
+
+
+def zipf_stream(rnd, skills, mentions, users):
+    """(skill, user) con skill Zipf (s=1.1) e utenti uniformi."""
+    names = [f"skill-{i}" for i in range(skills)]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(skills)]
+    for skill in rnd.choices(names, weights, k=mentions):
+        yield skill, f"user-{rnd.randrange(users)}"
+
+
+def run_cms(rnd, skills, mentions):
+    import skill_trending
+    cms = skill_trending.CountMinSketch()
+    exact = Counter()
+    for skill, _ in zipf_stream(rnd, skills, mentions, 1):
+        cms.add(skill)
+        exact[skill] += 1
+    bound = math.e / cms.width * mentions
+    errors = [cms.estimate(skill) - count for skill, count in exact.items()]
+    within = sum(error <= bound for error in errors) / len(errors)
+    confidence = 1 - math.exp(-cms.depth)
+    ok = check("cms: nessuna sottostima", min(errors) >= 0, f"errore minimo {min(errors)}")
+    ok &= check("cms: sovrastima entro e/w*N", within >= confidence,
+                f"{within:.2%} delle skill entro {bound:.0f} (richiesto {confidence:.2%}), "
+                f"errore medio {sum(errors) / len(errors):.1f}")
+    return ok
+
+
+def run_hll(rnd, trials=20):
+    import skill_trending
+    standard = 1.04 / math.sqrt(1 << skill_trending.HLL_PRECISION)
+    ok = True
+    for cardinality in (10, 100, 1000, 10000, 100000):
+        errors = []
+        for trial in range(trials):
+            hll = skill_trending.HyperLogLog()
+            prefix = f"user-{rnd.random()}"
+            for i in range(cardinality):
+                hll.add(f"{prefix}-{i}")
+            errors.append((hll.estimate() - cardinality) / cardinality)
+        rms = math.sqrt(sum(error * error for error in errors) / trials)
+        # su trials prove indipendenti l'errore quadratico medio stima l'errore standard
+        ok &= check(f"hll: {cardinality} utenti", rms <= 1.3 * standard,
+                    f"errore quadratico medio {rms:.2%} (standard {standard:.2%}), "
+                    f"massimo {max(map(abs, errors)):.2%}")
+
+    parts = [skill_trending.HyperLogLog() for _ in range(4)]
+    union = skill_trending.HyperLogLog()
+    for i in range(20000):
+        value = f"user-{i % 12000}"
+        parts[i % 4].add(value)
+        union.add(value)
+    joined = parts[0]
+    for part in parts[1:]:
+        joined.merge(part)
+    ok &= check("hll: merge uguale all'unione", joined.registers == union.registers, f"stima {joined.estimate()}")
+    return ok
+
+
+def run_top(rnd, skills, mentions, k):
+    import skill_trending
+    bucket = skill_trending.Bucket()
+    exact = Counter()
+    users = {}
+    for skill, user in zipf_stream(rnd, skills, mentions, 20000):
+        bucket.add(skill, user)
+        exact[skill] += 1
+        users.setdefault(skill, set()).add(user)
+    expected = [skill for skill, _ in exact.most_common(k)]
+    top = bucket.top(k)
+    recall = len(set(expected) & {row["skill"] for row in top}) / k
+    ok = check(f"top-{k}: richiamo", recall >= 0.9, f"{recall:.0%}")
+
+    # le candidate in cima dall'inizio hanno lo stesso HLL che si avrebbe dagli utenti esatti
+    lost = 0
+    for row in top:
+        hll = skill_trending.HyperLogLog()
+        for user in users[row["skill"]]:
+            hll.add(user)
+        lost += hll.registers != bucket.users[row["skill"]].registers
+    worst = max(abs(row["users"] - len(users[row["skill"]])) / len(users[row["skill"]]) for row in top)
+    ok &= check(f"top-{k}: utenti distinti", not lost, f"errore massimo dell'HLL {worst:.2%}")
+
+    head, parts = bucket.to_items()
+    restored = skill_trending.Bucket.from_items(head, parts)
+    head_size = sum(len(skill) for skill in head["candidates"])
+    largest = max(len(name) + len(data) for name, data in parts.items())
+    ok &= check("serializzazione: andata e ritorno", restored.top(k) == top and restored.total == bucket.total,
+                f"item principale ~{head_size / 1024:.1f} KB, {len(parts)} parti, "
+                f"la più grande {largest / 1024:.1f} KB")
+    ok &= check("serializzazione: parti sotto i 2 KB", largest < 2048)
+    return ok, bucket, exact
+
+
+def save_bucket(week, bucket):
+    """Scrive un bucket costruito in memoria in più transazioni (non entra in una da 100 item)."""
+    import skills_repository
+    head, parts = bucket.to_items()
+    names = list(parts)
+    for version, start in enumerate(range(0, len(names), 98)):
+        chunk = {name: parts[name] for name in names[start:start + 98]}
+        assert skills_repository.put_trending_bucket(week, head, chunk, version, []) is None
+
+
+def run_stream(fake, writes, batch_size, k, base, base_exact):
+    import skill_trending
+    import skills_repository
+    save_bucket(skill_trending.week(datetime.now(timezone.utc)), base)
+    rnd = random.Random(11)
+    users, vocabulary = bench_handlers.seed(fake, 500, rnd)
+    table = fake.tables[skills_repository.TABLE_NAME]
+    seeded = {key: int(item["mentions"]["N"]) for key, item in table.items.items()}
+    fake.enable_stream(skills_repository.TABLE_NAME)
+    events = bench_handlers.Events(fake, users, vocabulary, rnd)
+    handlers = {name: bench_handlers.load_handler(name) for name in ("add_skill", "update_skill")}
+    for _ in range(writes):
+        name = rnd.choice(list(handlers))
+        event, _ = getattr(events, name)()  # niente cleanup: le scritture restano
+        handlers[name](event, None)
+
+    # senza cancellazioni né cambi di utente le menzioni della settimana sono quelle aggiunte dopo il seed
+    exact = Counter(base_exact)
+    for key, item in table.items.items():
+        exact[item["skill"]["S"]] += int(item.get("mentions", {}).get("N", "1")) - seeded.get(key, 0)
+
+    # WCU di ogni transazione del consumer (ReturnConsumedCapacity lo chiede metrics)
+    units = []
+    skills_repository.client.meta.events.register(
+        "after-call.dynamodb.TransactWriteItems",
+        lambda parsed, **kwargs: units.append(sum(c["CapacityUnits"] for c in parsed.get("ConsumedCapacity", []))),
+    )
+    consumer = bench_handlers.load_handler("skills_trending_stream")
+    records = table.stream
+    started = time.perf_counter()
+    failures = []
+    for start in range(0, len(records), batch_size):
+        failures += consumer({"Records": records[start:start + batch_size]}, None)["batchItemFailures"]
+    elapsed = time.perf_counter() - started
+    print(f"stream: {len(records)} record in {elapsed * 1000:.0f} ms ({len(records) / elapsed:.0f} record/s, "
+          f"{len(units)} transazioni)")
+    print(f"stream: WCU per transazione media {sum(units) / len(units):.0f}, massimo {max(units):.0f}, "
+          f"per record {sum(units) / len(records):.1f}")
+    ok = check("stream: nessun record fallito", not failures)
+
+    reader = bench_handlers.load_handler("get_trending_skills")
+    first = json.loads(reader({"queryStringParameters": {"k": str(k)}}, None)["body"])
+    consumer({"Records": records[:batch_size]}, None)
+    again = json.loads(reader({"queryStringParameters": {"k": str(k)}}, None)["body"])
+    ok &= check("stream: batch rimandato (duplicati)", again == first)
+
+    bound = first["error"]["mentions"]
+    ok &= check("stream: menzioni totali", first["total_mentions"] == sum(exact.values()),
+                f"{first['total_mentions']} / {sum(exact.values())}")
+    worst = max(row["mentions"] - exact[row["skill"]] for row in first["skills"])
+    least = min(row["mentions"] - exact[row["skill"]] for row in first["skills"])
+    ok &= check("stream: menzioni della classifica", 0 <= least and worst <= bound,
+                f"sovrastima massima {worst} (limite {bound})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--skills", type=int, default=5000)
+    parser.add_argument("--mentions", type=int, default=200000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--writes", type=int, default=3000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    fake = bench_handlers.install_fakes(gemini=False)
+    rnd = random.Random(3)
+    ok = run_cms(rnd, args.skills, args.mentions)
+    ok &= run_hll(rnd)
+    top_ok, bucket, exact = run_top(rnd, args.skills, args.mentions, args.k)
+    ok &= top_ok
+    ok &= run_stream(fake, args.writes, args.batch_size, args.k, bucket, exact)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Gemini finto per i benchmark locali, basato sul ReplayApiClient del client
+google.genai vendorizzato in chat_skill.
+
+Le risposte di generate_content vengono dalla sessione registrata in
+bench/replays/chat_skill/generate_content/mldev.json, riusata a rotazione (i
+messaggi del benchmark cambiano a ogni richiesta, quindi il confronto esatto
+della richiesta registrata è disattivato). Le risposte di embed_content sono
+generate dalla richiesta: un vettore deterministico per testo, così lo stesso
+nome ha sempre lo stesso embedding. Prima di ogni risposta si attende la
+latenza iniettata (latency_ms ± jitter_ms). Il setup della connessione HTTP
+non è simulato: il warm-up dell'init diventa un no-op.
+"""
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "lambdas", "skills", "chat_skill", "package"))
+try:
+    _bundled = importlib.util.find_spec("google.genai") is None
+except ModuleNotFoundError:
+    _bundled = True
+# se nel path non c'è già un client google.genai si usa quello del bundle di chat_skill
+if _bundled and BUNDLE_DIR not in sys.path:
+    sys.path.append(BUNDLE_DIR)
+
+from google import genai
+from google.genai import errors
+from google.genai._api_client import HttpResponse
+from google.genai._replay_api_client import ReplayApiClient, ReplayFile
+from google.genai.models import Models
+
+REPLAYS_DIR = os.path.join(BENCH_DIR, "replays")
+REPLAY_ID = "chat_skill/generate_content/mldev"
+# limite di batchEmbedContents
+MAX_EMBED_BATCH = 100
+
+
+def text_vector(text, dim):
+    """Vettore unitario float32 deterministico per un testo (stesso testo, stesso vettore)."""
+    rng = np.random.default_rng(zlib.crc32(text.strip().lower().encode("utf-8")))
+    vector = rng.standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _embed_text(content):
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content.get("parts", []))
+
+
+class GeminiStandIn(ReplayApiClient):
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, seed=0):
+        super().__init__(mode="replay", replay_id=REPLAY_ID, replays_directory=REPLAYS_DIR, api_key="bench")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self.calls = {"generate_content": 0, "embed_content": 0}
+        # sessione caricata subito: niente I/O né log di debug alla prima richiesta
+        with open(self._get_replay_file_path()) as f:
+            self.replay_session = ReplayFile.model_validate(json.load(f))
+        self._replay_index = 0
+
+    def _wait(self):
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _build_response_from_replay(self, http_request):
+        self._wait()
+        if http_request.url.endswith(":batchEmbedContents"):
+            self.calls["embed_content"] += 1
+            requests = http_request.data["requests"]
+            if len(requests) > MAX_EMBED_BATCH:
+                # come l'API reale: batchEmbedContents accetta al massimo 100 richieste
+                raise errors.ClientError(400, {"error": {
+                    "code": 400, "status": "INVALID_ARGUMENT",
+                    "message": f"at most {MAX_EMBED_BATCH} requests can be in one batch",
+                }})
+            embeddings = [
+                {"values": text_vector(_embed_text(request["content"]),
+                                       request.get("outputDimensionality", 768)).tolist()}
+                for request in requests
+            ]
+            return HttpResponse(headers={}, response_stream=[json.dumps({"embeddings": embeddings})])
+
+        self.calls["generate_content"] += 1
+        interactions = self.replay_session.interactions
+        interaction = interactions[self._replay_index % len(interactions)]
+        self._replay_index += 1
+        errors.APIError.raise_for_response(interaction.response)
+        return HttpResponse(
+            headers=interaction.response.headers,
+            response_stream=[json.dumps(segment) for segment in interaction.response.body_segments],
+        )
+
+    def _verify_response(self, response_model):
+        # le risposte non vengono confrontate con la registrazione
+        return None
+
+
+class _Transport:
+    """Al posto di gemini_http.TimedTransport: nessuna connessione da misurare."""
+    last = {}
+
+
+def build_client(latency_ms=0.0, jitter_ms=0.0):
+    client = genai.Client(api_key="bench")
+    stand_in = GeminiStandIn(latency_ms, jitter_ms)
+    client._api_client = stand_in
+    client._models = Models(stand_in)
+    return client
+
+
+def install(gemini_http, latency_ms=0.0, jitter_ms=0.0):
+    """Sostituisce build_client/warm_up di gemini_http: gli handler importati dopo usano lo stand-in."""
+    gemini_http.build_client = lambda api_key: (build_client(latency_ms, jitter_ms), _Transport())
+    gemini_http.warm_up = lambda client: None
@@ -0,0 +1,112 @@
+"""
+Conversione veloce degli item DynamoDB in formato wire ({"S": ...}, {"N": ...}).
+
+TypeDeserializer di boto3 restituisce Decimal per ogni numero: serializzarli con
+json.dumps(default=str) li trasforma in stringhe ("level": "1") e costa una
+chiamata Python per attributo. Qui:
+  - to_python converte un attributo wire in tipi nativi (int/float, str, bool,
+    list, dict, bytes) senza passare da Decimal;
+  - dumps_items/dumps_item scrivono direttamente il testo JSON della risposta
+    dagli item wire: i numeri DynamoDB sono già letterali JSON validi e vengono
+    copiati così come sono, le stringhe passano dall'encoder C di json.
+Gli attributi binari (B/BS) in JSON diventano stringhe base64.
+"""
+import base64
+import json
+
+_encode_string = json.encoder.encode_basestring_ascii
+
+
+def _number(text):
+    if "." in text or "e" in text or "E" in text:
+        return float(text)
+    return int(text)
+
+
+def to_python(value):
+    """Attributo in formato wire -> valore Python nativo (numeri come int/float)."""
+    (kind, data), = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return _number(data)
+    if kind == "BOOL":
+        return data
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return {k: to_python(v) for k, v in data.items()}
+    if kind == "L":
+        return [to_python(v) for v in data]
+    if kind == "B":
+        return data
+    if kind == "SS":
+        return list(data)
+    if kind == "NS":
+        return [_number(n) for n in data]
+    if kind == "BS":
+        return list(data)
+    raise ValueError(f"Tipo DynamoDB non supportato: {kind}")
+
+
+def item_to_python(item, exclude=()):
+    return {key: to_python(value) for key, value in item.items() if key not in exclude}
+
+
+def _write(value, out):
+    (kind, data), = value.items()
+    if kind == "S":
+        out.append(_encode_string(data))
+    elif kind == "N":
+        out.append(data)
+    elif kind == "BOOL":
+        out.append("true" if data else "false")
+    elif kind == "NULL":
+        out.append("null")
+    elif kind == "M":
+        _write_map(data, out, ())
+    elif kind == "L":
+        out.append("[")
+        for i, element in enumerate(data):
+            if i:
+                out.append(",")
+            _write(element, out)
+        out.append("]")
+    elif kind == "B":
+        out.append('"' + base64.b64encode(data).decode("ascii") + '"')
+    elif kind == "SS":
+        out.append("[" + ",".join(_encode_string(s) for s in data) + "]")
+    elif kind == "NS":
+        out.append("[" + ",".join(data) + "]")
+    elif kind == "BS":
+        out.append("[" + ",".join('"' + base64.b64encode(b).decode("ascii") + '"' for b in data) + "]")
+    else:
+        raise ValueError(f"Tipo DynamoDB non supportato: {kind}")
+
+
+def _write_map(item, out, exclude):
+    out.append("{")
+    first = True
+    for key, value in item.items():
+        if key in exclude:
+            continue
+        if not first:
+            out.append(",")
+        first = False
+        out.append(_encode_string(key))
+        out.append(":")
+        _write(value, out)
+    out.append("}")
+
+
+def dumps_item(item, exclude=()):
+    """Item wire -> testo JSON dell'oggetto, escludendo gli attributi in exclude."""
+    out = []
+    _write_map(item, out, exclude)
+    return "".join(out)
+
+
+def dumps_items(items, exclude=()):
+    """Lista di item wire -> testo JSON della lista."""
+    # un join per item: la lista dei frammenti resta piccola anche su pagine grandi
+    return "[" + ",".join(dumps_item(item, exclude) for item in items) + "]"
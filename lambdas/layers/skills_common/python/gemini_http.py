@@ -0,0 +1,99 @@
+"""
+Client Gemini con pool di connessioni httpx configurato e riscaldato nell'init.
+
+build_client crea il genai.Client passando, tramite HttpOptions.client_args, un
+transport httpx con limiti di keep-alive espliciti (e HTTP/2 opzionale): lo
+stesso pool viene riusato da tutte le invocazioni warm del container.
+warm_up apre la connessione (DNS + TCP + TLS) durante la fase di init, così la
+prima richiesta nel handler trova già una connessione pronta.
+
+Il transport registra per ogni richiesta quanto tempo è andato in connessione
+(connect_ms, che comprende il DNS, e tls_ms) tramite l'estensione "trace" di
+httpcore: il resto del tempo della chiamata è tempo del modello.
+"""
+import importlib.util
+import logging
+import os
+import ssl
+import time
+
+import certifi
+import httpx
+from google import genai
+
+logger = logging.getLogger()
+
+HTTP2 = os.getenv("GEMINI_HTTP2", "0") == "1"
+MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "10"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "4"))
+# i frontend Google chiudono prima le connessioni inattive; oltre questo httpx ne apre una nuova
+KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "240"))
+
+
+class TimedTransport(httpx.HTTPTransport):
+    """HTTPTransport che misura setup della connessione e durata di ogni richiesta."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.last = {}
+
+    def handle_request(self, request):
+        timings = {"connect_ms": 0.0, "tls_ms": 0.0, "reused": True}
+        started = {}
+
+        def trace(event_name, info):
+            step, _, phase = event_name.rpartition(".")
+            if phase == "started":
+                started[step] = time.perf_counter()
+            elif phase == "complete" and step in started:
+                elapsed = (time.perf_counter() - started.pop(step)) * 1000
+                if step.endswith("connect_tcp"):
+                    timings["connect_ms"] += elapsed
+                    timings["reused"] = False
+                elif step.endswith("start_tls"):
+                    timings["tls_ms"] += elapsed
+
+        request.extensions = dict(request.extensions, trace=trace)
+        t0 = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        finally:
+            timings["request_ms"] = (time.perf_counter() - t0) * 1000
+            self.last = timings
+
+
+def _http2_enabled():
+    if HTTP2 and importlib.util.find_spec("h2") is None:
+        logger.warning("GEMINI_HTTP2=1 ma il pacchetto h2 non è nel bundle: uso HTTP/1.1")
+        return False
+    return HTTP2
+
+
+def build_client(api_key):
+    """Ritorna (genai.Client, TimedTransport) con il pool di connessioni configurato."""
+    transport = TimedTransport(
+        verify=ssl.create_default_context(cafile=os.environ.get("SSL_CERT_FILE", certifi.where())),
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
+    client = genai.Client(api_key=api_key, http_options={"client_args": {"transport": transport}})
+    return client, transport
+
+
+def warm_up(client):
+    """
+    Apre e lascia nel pool una connessione verso l'endpoint Gemini (una HEAD senza
+    autenticazione, nessun costo di quota). Ritorna i tempi o None se fallisce:
+    il warm-up non deve mai impedire l'init.
+    """
+    api_client = client._api_client
+    try:
+        api_client._httpx_client.head(api_client._http_options.base_url)
+    except httpx.HTTPError as e:
+        logger.warning("Warm-up connessione Gemini non riuscito: %s", str(e))
+        return None
+    return client._api_client._httpx_client._transport.last
@@ -0,0 +1,15 @@
+"""
+Header delle richieste API Gateway.
+
+HTTP API passa i nomi degli header in minuscolo, REST API così come arrivano
+dal client: header(event, name) li confronta senza distinzione di maiuscole.
+"""
+from typing import Optional
+
+
+def header(event: dict, name: str) -> Optional[str]:
+    """Valore dell'header name (in minuscolo) della richiesta, o None se manca."""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
@@ -0,0 +1,188 @@
+"""
+Tempi per fase e metriche per invocazione in Embedded Metric Format (EMF).
+
+Ogni handler decorato con @metrics.instrumented("nome") apre un'Invocation:
+  - span("fase") misura una fase con perf_counter_ns (più span con lo stesso
+    nome si sommano);
+  - le chiamate del client DynamoDB passato a instrument_dynamodb vengono
+    cronometrate da sole (hook botocore) e chiedono ReturnConsumedCapacity=TOTAL,
+    così le unità consumate entrano nelle metriche;
+  - record_gemini_usage somma i token di usage_metadata.
+A fine invocazione viene scritta UNA riga JSON EMF: CloudWatch ne ricava le
+metriche (namespace METRICS_NAMESPACE, dimensione Function) senza chiamate
+PutMetricData. La prima invocazione del container riporta anche ColdStart e
+InitMs (dall'import di questo modulo alla fine dell'init dell'handler).
+
+verbose() dice se l'invocazione corrente è campionata per i log dettagliati
+(evento completo, risposta grezza dell'AI): VERBOSE_LOG_SAMPLE_RATE, default 1%.
+Fuori da un'invocazione (script, migrazioni) tutte le funzioni non fanno nulla.
+"""
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+NAMESPACE = os.getenv("METRICS_NAMESPACE", "SkillBuilder")
+VERBOSE_LOG_SAMPLE_RATE = float(os.getenv("VERBOSE_LOG_SAMPLE_RATE", "0.01"))
+# Destinazione delle righe EMF (su Lambda stdout finisce in CloudWatch Logs)
+OUTPUT = sys.stdout
+
+# Importato per primo dagli handler: approssima l'inizio dell'init del container
+INIT_STARTED_NS = time.perf_counter_ns()
+
+# Token di usage_metadata (nomi JSON dell'API) -> metrica
+GEMINI_TOKENS = {
+    "promptTokenCount": "GeminiPromptTokens",
+    "candidatesTokenCount": "GeminiOutputTokens",
+    "thoughtsTokenCount": "GeminiThoughtsTokens",
+    "totalTokenCount": "GeminiTotalTokens",
+}
+DYNAMODB_READS = {"GetItem", "BatchGetItem", "Query", "Scan"}
+
+logger = logging.getLogger()
+
+_init_ns = None
+_cold = True
+_current = None
+
+
+class Invocation:
+    def __init__(self, function):
+        self.function = function
+        self.spans = {}
+        self.counts = {}
+        self.verbose = random.random() < VERBOSE_LOG_SAMPLE_RATE or logger.isEnabledFor(logging.DEBUG)
+
+    def add_span(self, name, elapsed_ns):
+        self.spans[name] = self.spans.get(name, 0) + elapsed_ns
+
+    def add(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def emf(self, total_ns, properties):
+        values = {f"{name}Ms": round(ns / 1e6, 3) for name, ns in self.spans.items()}
+        values["DurationMs"] = round(total_ns / 1e6, 3)
+        units = {name: "Milliseconds" for name in values}
+        values.update(self.counts)
+        units.update({name: "Count" for name in self.counts})
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [["Function"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in units.items()],
+                }],
+            },
+            "Function": self.function,
+            **values,
+            **properties,
+        }
+
+
+def init_done():
+    """Da chiamare a fine init dell'handler: la prima invocazione riporterà InitMs."""
+    global _init_ns
+    if _cold:
+        _init_ns = time.perf_counter_ns() - INIT_STARTED_NS
+
+
+def instrumented(function):
+    """Decoratore per lambda_handler: apre l'invocazione e scrive la riga EMF alla fine."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            global _current, _cold
+            if _current is not None:
+                return handler(event, context)  # handler chiamato da un altro handler instrumentato
+            invocation = _current = Invocation(function)
+            invocation.add("ColdStart", int(_cold))
+            if _cold and _init_ns is not None:
+                invocation.add_span("Init", _init_ns)
+            _cold = False
+            status = 500
+            started = time.perf_counter_ns()
+            try:
+                response = handler(event, context)
+                status = response.get("statusCode", 200)
+                return response
+            finally:
+                _current = None
+                properties = {"StatusCode": status}
+                if context is not None:
+                    properties["RequestId"] = getattr(context, "aws_request_id", None)
+                line = invocation.emf(time.perf_counter_ns() - started, properties)
+                OUTPUT.write(json.dumps(line, separators=(",", ":")) + "\n")
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(name):
+    invocation = _current
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        if invocation is not None:
+            invocation.add_span(name, time.perf_counter_ns() - started)
+
+
+def add_span(name, elapsed_ns):
+    """Tempo misurato altrove (es. setup della connessione Gemini dal transport)."""
+    if _current is not None:
+        _current.add_span(name, elapsed_ns)
+
+
+def add(name, value):
+    if _current is not None:
+        _current.add(name, value)
+
+
+def verbose():
+    """True se l'invocazione corrente è campionata per i log dettagliati."""
+    return _current is not None and _current.verbose
+
+
+def record_gemini_usage(usage):
+    """Somma i token di usage_metadata (dict della risposta raw o oggetto del client)."""
+    if _current is None or not usage:
+        return
+    for field, metric in GEMINI_TOKENS.items():
+        if isinstance(usage, dict):
+            value = usage.get(field)
+        else:
+            value = getattr(usage, "".join("_" + c.lower() if c.isupper() else c for c in field), None)
+        if value:
+            _current.add(metric, value)
+
+
+def _provide_params(params, model, context, **kwargs):
+    if _current is None:
+        return
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+    context["metrics_started_ns"] = time.perf_counter_ns()
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    started = context.get("metrics_started_ns")
+    invocation = _current
+    if invocation is None or started is None:
+        return
+    invocation.add_span(f"DynamoDB{model.name}", time.perf_counter_ns() - started)
+    invocation.add("DynamoDBCalls", 1)
+    consumed = parsed.get("ConsumedCapacity")
+    if consumed:
+        units = sum(c.get("CapacityUnits", 0) for c in (consumed if isinstance(consumed, list) else [consumed]))
+        invocation.add("DynamoDBReadUnits" if model.name in DYNAMODB_READS else "DynamoDBWriteUnits", units)
+
+
+def instrument_dynamodb(client):
+    """Aggancia tempi e capacità consumata alle chiamate del client DynamoDB."""
+    client.meta.events.register("provide-client-params.dynamodb", _provide_params)
+    client.meta.events.register("after-call.dynamodb", _after_call)
@@ -0,0 +1,133 @@
+"""
+Profilo cProfile + tracemalloc di singole invocazioni, su richiesta.
+
+@profiling.profiled("nome") va messo sotto @metrics.instrumented. Un'invocazione
+viene profilata se:
+  - è estratta con probabilità PROFILE_SAMPLE_RATE, oppure
+  - PROFILE_ON_HEADER=1 e la richiesta ha l'header PROFILE_HEADER (default
+    "x-profile") con valore "1".
+Per quell'invocazione si scrivono, compressi con gzip:
+  - <nome>-<request id>.pstats.gz: i dati di cProfile nel formato di dump_stats
+    (gunzip e poi pstats.Stats / snakeviz);
+  - <nome>-<request id>.alloc.json.gz: i PROFILE_TOP_ALLOCATIONS siti di
+    allocazione più grandi secondo tracemalloc.
+I file vanno in PROFILE_DIR (default /tmp/profiles) o, con PROFILE_S3_BUCKET,
+su S3 sotto PROFILE_S3_PREFIX; nel log resta una riga con il percorso.
+
+Se né il campionamento né l'header sono attivi il decoratore ritorna l'handler
+così com'è: nessun costo per le invocazioni.
+"""
+import cProfile
+import functools
+import gzip
+import json
+import logging
+import marshal
+import os
+import random
+import time
+import tracemalloc
+
+import http_headers
+import metrics
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ON_HEADER = os.getenv("PROFILE_ON_HEADER", "0") == "1"
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "x-profile").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+PROFILE_S3_BUCKET = os.getenv("PROFILE_S3_BUCKET")
+PROFILE_S3_PREFIX = os.getenv("PROFILE_S3_PREFIX", "profiles/")
+PROFILE_TOP_ALLOCATIONS = int(os.getenv("PROFILE_TOP_ALLOCATIONS", "30"))
+# Frame salvati per ogni allocazione: di più costa molto di più
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "10"))
+
+ENABLED = PROFILE_SAMPLE_RATE > 0 or PROFILE_ON_HEADER
+
+logger = logging.getLogger()
+
+_s3 = None
+
+
+def _requested(event):
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return True
+    if PROFILE_ON_HEADER and isinstance(event, dict):
+        return http_headers.header(event, PROFILE_HEADER) == "1"
+    return False
+
+
+def _store(name, payload):
+    """Scrive un file compresso in /tmp o su S3 e ritorna dove è finito."""
+    data = gzip.compress(payload, compresslevel=6)
+    if PROFILE_S3_BUCKET:
+        global _s3
+        if _s3 is None:
+            import boto3
+            _s3 = boto3.client("s3")
+        key = PROFILE_S3_PREFIX + name
+        _s3.put_object(Bucket=PROFILE_S3_BUCKET, Key=key, Body=data)
+        return f"s3://{PROFILE_S3_BUCKET}/{key}"
+    path = os.path.join(PROFILE_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _top_allocations(snapshot):
+    stats = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]).statistics("lineno")
+    return [
+        {
+            "file": stat.traceback[0].filename,
+            "line": stat.traceback[0].lineno,
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in stats[:PROFILE_TOP_ALLOCATIONS]
+    ]
+
+
+def _run_profiled(function, handler, event, context):
+    profile = cProfile.Profile()
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    profile.enable()
+    try:
+        return handler(event, context)
+    finally:
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started_tracemalloc:
+            tracemalloc.stop()
+        metrics.add("Profiled", 1)
+        request_id = getattr(context, "aws_request_id", None) or str(time.time_ns())
+        base = f"{function}/{time.strftime('%Y-%m-%d')}/{function}-{request_id}"
+        try:
+            profile.create_stats()
+            stats_path = _store(base + ".pstats.gz", marshal.dumps(profile.stats))
+            allocations = {"peak_kb": round(peak / 1024, 1), "top": _top_allocations(snapshot)}
+            alloc_path = _store(base + ".alloc.json.gz", json.dumps(allocations).encode("utf-8"))
+            logger.info("Profilo invocazione %s: pstats=%s allocazioni=%s", request_id, stats_path, alloc_path)
+        except Exception as e:
+            # il profilo non deve mai far fallire la richiesta
+            logger.warning("Salvataggio profilo non riuscito: %s", str(e))
+
+
+def profiled(function):
+    """Decoratore per lambda_handler; con il profiling disattivato ritorna l'handler invariato."""
+    def decorator(handler):
+        if not ENABLED:
+            return handler
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if not _requested(event):
+                return handler(event, context)
+            return _run_profiled(function, handler, event, context)
+        return wrapper
+    return decorator
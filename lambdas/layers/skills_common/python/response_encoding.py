@@ -0,0 +1,117 @@
+"""
+Formato e compressione delle risposte grandi (get_skills), negoziati con il client.
+
+negotiate(event) sceglie:
+  - il formato da Accept: JSON (default) o MessagePack (application/msgpack o
+    application/x-msgpack, se il pacchetto msgpack è nel bundle);
+  - la codifica da Accept-Encoding, rispettando i q: br (se brotli è nel
+    bundle) o gzip.
+encode comprime solo sopra COMPRESSION_MIN_BYTES: sotto la soglia header e
+base64 costano più di quanto si risparmia. response costruisce la risposta API
+Gateway: i body binari (compressi o MessagePack) vanno in base64 con
+isBase64Encoded. HTTP API li decodifica da sé; REST API vuole "*/*" tra i
+binaryMediaTypes.
+
+Il limite di 6 MB delle risposte Lambda vale sul payload base64 (+33%), ma le
+liste di skill sono molto ripetitive e compresse entrano comunque molte più
+skill. Rapporti e tempi per livello: bench/bench_response_encoding.py (gzip 6 e
+brotli 5 costano pochi ms in più della sola serializzazione, brotli 11 secondi).
+"""
+import base64
+import gzip
+import os
+from typing import Optional, Union
+
+import http_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _qualities(value: Optional[str]) -> dict[str, float]:
+    """'gzip;q=0.8, br' -> {"gzip": 0.8, "br": 1.0}"""
+    result = {}
+    for part in (value or "").split(","):
+        token, *params = (p.strip() for p in part.split(";"))
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        result[token.lower()] = q
+    return result
+
+
+def negotiate(event: dict) -> tuple[str, Optional[str]]:
+    """(Content-Type, Content-Encoding o None) preferiti dal client tra quelli disponibili."""
+    content_type = JSON
+    accept = _qualities(http_headers.header(event, "accept"))
+    if msgpack is not None and accept:
+        json_q = max(accept.get(JSON, 0.0), accept.get("application/*", 0.0), accept.get("*/*", 0.0))
+        msgpack_q = max(accept.get(name, 0.0) for name in _MSGPACK_TYPES)
+        # a parità di q vince MessagePack: chi lo elenca lo sa leggere
+        if msgpack_q > 0 and msgpack_q >= json_q:
+            content_type = MSGPACK
+
+    encodings = _qualities(http_headers.header(event, "accept-encoding"))
+    default = encodings.get("*", 0.0)
+    encoding, best = None, 0.0
+    for candidate in (("br",) if brotli is not None else ()) + ("gzip",):
+        q = encodings.get(candidate, default)
+        if q > best:
+            encoding, best = candidate, q
+    return content_type, encoding
+
+
+def pack(value) -> bytes:
+    """Valori Python nativi -> MessagePack (bytes come bin, stringhe come str)."""
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime fisso: stesso contenuto, stessi byte (l'ETag è forte)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode(payload: Union[str, bytes], encoding: Optional[str]) -> tuple[Union[str, bytes], Optional[str]]:
+    """Body (testo JSON o bytes) -> (body, codifica applicata); sotto la soglia resta com'è."""
+    if encoding is None or len(payload) < COMPRESSION_MIN_BYTES:
+        return payload, None
+    data = payload.encode("utf-8") if isinstance(payload, str) else payload
+    return compress(data, encoding), encoding
+
+
+def response(status: int, body: Union[str, bytes], content_type: str = JSON,
+             encoding: Optional[str] = None, headers: Optional[dict] = None) -> dict:
+    headers = {"Content-Type": content_type, "Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if isinstance(body, bytes):
+        return {
+            "statusCode": status,
+            "headers": headers,
+            "body": base64.b64encode(body).decode("ascii"),
+            "isBase64Encoded": True,
+        }
+    return {"statusCode": status, "headers": headers, "body": body}
@@ -0,0 +1,160 @@
+"""
+Cache per container delle risposte di get_skills e get_skill_by_id, invalidata
+dalle scritture tramite contatori di generazione su DynamoDB.
+
+Le voci (TTLCache di cachetools: LRU con scadenza SKILL_CACHE_TTL secondi, al
+massimo SKILL_CACHE_MAX_ITEMS) sono etichettate con la generazione del loro
+ambito letta PRIMA dei dati: l'utente proprietario della skill, o ALL_USERS per
+la scansione completa. Una voce vale finché quella generazione non cambia.
+
+Le scritture (add_skill, update_skill, delete_skill, chat_skill) chiamano
+invalidate(users), che incrementa le generazioni degli utenti toccati e di
+ALL_USERS nella tabella meta. Le generazioni lette vengono riusate per
+SKILL_CACHE_GENERATION_TTL secondi (default 1): è il ritardo massimo con cui
+un container vede le scritture di un altro; quelle dello stesso container si
+vedono subito.
+
+L'ambito lo passa il chiamante: lo user della richiesta (ALL_USERS senza
+user) per get_skills, il proprietario della skill per get_skill_by_id
+(owner_scope(key): ALL_USERS finché la skill non è mai stata letta).
+
+La stessa generazione dà l'ETag delle risposte: etag(key) per la voce appena
+servita, not_modified(event, key, scope) per rispondere 304 a un If-None-Match
+ancora valido leggendo solo la generazione dell'ambito (nessuna scansione,
+nessuna serializzazione).
+
+Ogni lettura conta CacheHits, CacheMisses o CacheStale nella riga EMF. Se la
+tabella meta non risponde la lettura va direttamente su DynamoDB.
+SKILL_CACHE_TTL=0 disattiva la cache e con lei gli ETag: niente header ETag,
+nessuna risposta 304 (le scritture incrementano comunque le generazioni, per
+gli altri container).
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+from cachetools import LRUCache, TTLCache
+
+import http_headers
+import metrics
+import skills_repository
+
+CACHE_TTL = float(os.getenv("SKILL_CACHE_TTL", "300"))
+CACHE_MAX_ITEMS = int(os.getenv("SKILL_CACHE_MAX_ITEMS", "1024"))
+GENERATION_TTL = float(os.getenv("SKILL_CACHE_GENERATION_TTL", "1"))
+
+ENABLED = CACHE_TTL > 0
+
+logger = logging.getLogger()
+
+
+class _Entry(NamedTuple):
+    scope: str
+    generation: int
+    value: Any
+
+
+_entries = TTLCache(maxsize=CACHE_MAX_ITEMS, ttl=CACHE_TTL) if ENABLED else None
+_generations = TTLCache(maxsize=CACHE_MAX_ITEMS, ttl=GENERATION_TTL) if ENABLED else None
+# Utente proprietario di ogni chiave già letta: non cambia, sopravvive alla voce
+_owners = LRUCache(maxsize=CACHE_MAX_ITEMS * 4) if ENABLED else None
+
+
+def generation(scope: str) -> int:
+    value = _generations.get(scope)
+    if value is None:
+        value = _generations[scope] = skills_repository.get_generation(scope)
+    return value
+
+
+def owner_scope(key: str) -> str:
+    """Proprietario già visto per key (non cambia: lo Skill_UID dipende dall'utente), o ALL_USERS."""
+    return _owners.get(key, skills_repository.ALL_USERS) if ENABLED else skills_repository.ALL_USERS
+
+
+def read_through(key: str, load: Callable[[], tuple[Any, Optional[str]]], scope: str) -> Any:
+    """
+    Valore in cache per key, o quello di load() se manca o è superato.
+
+    scope è l'ambito della generazione (utente o ALL_USERS); load ritorna
+    (valore, utente proprietario o None). Un valore None (es. skill inesistente)
+    non viene messo in cache.
+    """
+    if not ENABLED:
+        return load()[0]
+
+    entry = _entries.get(key)
+    try:
+        if entry is not None and entry.scope == scope and generation(scope) == entry.generation:
+            metrics.add("CacheHits", 1)
+            return entry.value
+        metrics.add("CacheStale" if entry is not None else "CacheMisses", 1)
+        # generazione letta prima dei dati: una scrittura nel mezzo rende la voce superata, mai valida
+        current = generation(scope)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Generazioni non disponibili, lettura senza cache: %s", str(e))
+        return load()[0]
+
+    value, owner = load()
+    if value is None:
+        _entries.pop(key, None)
+        return value
+    if owner is not None:
+        _owners[key] = owner
+    # ALL_USERS cambia a ogni scrittura; se il proprietario è cambiato la voce si salva alla prossima lettura
+    if scope in (skills_repository.ALL_USERS, owner):
+        _entries[key] = _Entry(scope, current, value)
+    else:
+        _entries.pop(key, None)
+    return value
+
+
+def _etag(key: str, scope: str, generation: int) -> str:
+    # chiave e ambito nell'ETag: rappresentazioni diverse (formato, compressione) e
+    # la stessa generazione di due utenti diversi non devono coincidere
+    digest = hashlib.blake2b(f"{key}\n{scope}".encode("utf-8"), digest_size=6).hexdigest()
+    return f'"{digest}-{generation}"'
+
+
+def etag(key: str) -> Optional[str]:
+    """ETag forte della voce in cache per key (dopo read_through); None se non è in cache."""
+    entry = _entries.get(key) if ENABLED else None
+    return _etag(key, entry.scope, entry.generation) if entry is not None else None
+
+
+def not_modified(event: dict, key: str, scope: str) -> Optional[str]:
+    """
+    ETag corrente se l'If-None-Match della richiesta lo contiene (risposta 304),
+    altrimenti None. Legge solo la generazione di scope, lo stesso passato a
+    read_through.
+    """
+    if not ENABLED:
+        return None
+    if_none_match = http_headers.header(event, "if-none-match")
+    if not if_none_match:
+        return None
+    try:
+        current = _etag(key, scope, generation(scope))
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Generazioni non disponibili, If-None-Match ignorato: %s", str(e))
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return current if current in tags or "*" in tags else None
+
+
+def invalidate(users: Iterable[Optional[str]]) -> None:
+    """Da chiamare dopo ogni scrittura sulle skill degli utenti indicati."""
+    scopes = [user for user in users if user] + [skills_repository.ALL_USERS]
+    try:
+        generations = skills_repository.bump_generations(scopes)
+    except (BotoCoreError, ClientError) as e:
+        # la scrittura è già avvenuta: gli altri container vedranno il dato alla scadenza delle voci
+        logger.warning("Incremento generazioni non riuscito: %s", str(e))
+        if ENABLED:
+            _entries.clear()
+            _generations.clear()
+        return
+    if ENABLED:
+        _generations.update(generations)
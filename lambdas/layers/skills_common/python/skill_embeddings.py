@@ -0,0 +1,96 @@
+"""
+Embedding dei nomi delle skill per il dedupe semantico.
+
+I vettori vengono calcolati con models.embed_content (una chiamata ogni
+EMBED_BATCH_SIZE testi, il massimo di batchEmbedContents), normalizzati a norma
+1 e salvati sull'item DynamoDB come attributo binario float32: ogni skill viene
+embeddata una volta sola. Le skill salvate prima degli embedding ricevono il
+vettore un po' alla volta (backfill: al massimo BACKFILL_LIMIT per richiesta);
+il resto lo completa scripts/migrations/backfill_skill_embeddings.py. Con vettori normalizzati la similarità coseno è un prodotto scalare, quindi
+il confronto con tutte le skill dell'utente è una sola moltiplicazione di matrici.
+"""
+import os
+
+import numpy as np
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+# output_dimensionality ridotta: 256 float32 = 1 KB per item
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "256"))
+# sopra questa similarità la skill nuova viene unita a quella esistente
+SIMILARITY_THRESHOLD = float(os.getenv("SKILL_SIMILARITY_THRESHOLD", "0.88"))
+# massimo di testi per chiamata di batchEmbedContents
+EMBED_BATCH_SIZE = 100
+# skill esistenti senza vettore embeddate nel percorso di una richiesta
+BACKFILL_LIMIT = int(os.getenv("EMBEDDING_BACKFILL_LIMIT", "50"))
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_texts(client, texts, task_type="SEMANTIC_SIMILARITY"):
+    """Embedding di una lista di testi, EMBED_BATCH_SIZE per chiamata: matrice (n, dim) float32 normalizzata."""
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    rows = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        response = client.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=texts[start:start + EMBED_BATCH_SIZE],
+            config={"output_dimensionality": EMBEDDING_DIM, "task_type": task_type},
+        )
+        rows.extend(e.values for e in response.embeddings)
+    return normalize_rows(np.array(rows, dtype=np.float32))
+
+
+def to_binary(vector):
+    """Vettore -> bytes float32 da salvare come attributo Binary."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_binary(value):
+    """Attributo Binary (bytes o boto3 Binary) -> vettore float32, senza copia."""
+    raw = getattr(value, "value", value)
+    return np.frombuffer(raw, dtype=np.float32)
+
+
+def item_vector(item):
+    """Vettore salvato sull'item, o None se manca o è di un altro modello/dimensione."""
+    if item.get("embedding_model") != EMBEDDING_MODEL or "embedding" not in item:
+        return None
+    vector = from_binary(item["embedding"])
+    return vector if vector.shape == (EMBEDDING_DIM,) else None
+
+
+def missing_vectors(items, limit=BACKFILL_LIMIT):
+    """
+    Separa le skill con vettore valido (dict Skill_UID -> vettore) da quelle da
+    embeddare in questa richiesta (al massimo limit); ritorna anche quante ne
+    restano senza vettore oltre il limite.
+    """
+    vectors, missing = {}, []
+    for item in items:
+        vector = item_vector(item)
+        if vector is None:
+            missing.append(item)
+        else:
+            vectors[item["Skill_UID"]] = vector
+    return vectors, missing[:limit], max(0, len(missing) - limit)
+
+
+def vector_attributes(vector):
+    """Attributi da salvare sull'item per un vettore."""
+    return {"embedding": to_binary(vector), "embedding_model": EMBEDDING_MODEL}
+
+
+def best_matches(queries, matrix):
+    """
+    Per ogni riga di queries l'indice della riga più simile in matrix e la sua
+    similarità coseno (entrambe le matrici normalizzate).
+    """
+    similarities = queries @ matrix.T
+    best = similarities.argmax(axis=1)
+    return best, similarities[np.arange(len(queries)), best]
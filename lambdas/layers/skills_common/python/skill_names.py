@@ -0,0 +1,189 @@
+"""
+Canonicalizzazione dei nomi delle skill.
+
+Il dizionario skill_synonyms.json (nome canonico -> lista di alias) viene compilato
+una sola volta per container, all'import del modulo, in un trie. Il trie serve per
+tre lookup, in quest'ordine:
+  1. esatto sul nome normalizzato (canonico o alias): "python3" -> "Python"
+  2. prefisso univoco: "kubern" -> "Kubernetes"
+  3. edit distance limitata (uno scambio di lettere adiacenti conta 1):
+     "Pyhton" -> "Python", al massimo una modifica ogni FUZZY_CHARS_PER_EDIT
+     caratteri sia del nome sia della voce trovata
+Se nessun lookup trova nulla il nome viene restituito ripulito ma invariato.
+Il nome canonico entra nello Skill_UID: un match fuzzy sbagliato fonde per
+sempre due skill diverse, per questo le parole corte non vengono corrette.
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+
+logger = logging.getLogger()
+
+DICTIONARY_PATH = os.getenv(
+    "SKILL_DICTIONARY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_synonyms.json"),
+)
+# distanza massima ammessa per il match fuzzy (viene comunque ridotta sui nomi corti)
+MAX_EDIT_DISTANCE = int(os.getenv("SKILL_MAX_EDIT_DISTANCE", "2"))
+# sotto questa lunghezza niente prefisso/fuzzy: "Go" e "C" sono troppo vicini a tutto
+MIN_APPROX_LENGTH = 4
+# una modifica ogni 6 caratteri, contati sul nome e sulla voce del dizionario: con una
+# ogni 3 "Bass" diventava "bash" (alias di Linux), "Lava" Java e "Rusk" Rust
+FUZZY_CHARS_PER_EDIT = 6
+
+_SPACES = re.compile(r"\s+")
+
+
+def clean(name):
+    """Toglie spazi iniziali/finali e compatta quelli interni, mantenendo le maiuscole."""
+    return _SPACES.sub(" ", name.strip())
+
+
+def normalize(name):
+    """Chiave di lookup: Unicode NFKC, minuscolo, spazi compattati."""
+    return clean(unicodedata.normalize("NFKC", name)).casefold()
+
+
+class _Node:
+    __slots__ = ("children", "canonical")
+
+    def __init__(self):
+        self.children = {}
+        self.canonical = None
+
+
+class SkillTrie:
+    """Trie chiave normalizzata -> nome canonico."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def insert(self, key, canonical):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+        if node.canonical is None:
+            self.size += 1
+        node.canonical = canonical
+
+    def get(self, key):
+        node = self._walk(key)
+        return node.canonical if node else None
+
+    def with_prefix(self, prefix, limit=10):
+        """Nomi canonici (distinti) delle chiavi che iniziano con prefix."""
+        node = self._walk(prefix)
+        found = []
+        if node is None:
+            return found
+        stack = [node]
+        while stack and len(found) < limit:
+            current = stack.pop()
+            if current.canonical is not None and current.canonical not in found:
+                found.append(current.canonical)
+            stack.extend(current.children.values())
+        return found
+
+    def search_fuzzy(self, key, max_distance, chars_per_edit=None):
+        """
+        Cerca la chiave più vicina a key con distanza <= max_distance (Levenshtein
+        più lo scambio di due lettere adiacenti a costo 1); con chars_per_edit una
+        chiave di n caratteri vale solo entro n // chars_per_edit modifiche.
+        Calcola una riga della matrice per ogni nodo visitato e pota i rami in cui
+        le ultime due righe superano già il limite. Ritorna (canonico, distanza) o None.
+        """
+        first_row = list(range(len(key) + 1))
+        best = [max_distance + 1, None]
+        for ch, child in self.root.children.items():
+            self._fuzzy_step(child, ch, key, first_row, None, None, 1, chars_per_edit, best)
+        if best[1] is None:
+            return None
+        return best[1], best[0]
+
+    def _fuzzy_step(self, node, ch, key, previous_row, before_row, previous_ch, depth, chars_per_edit, best):
+        row = [previous_row[0] + 1]
+        for i in range(1, len(key) + 1):
+            cost = 0 if key[i - 1] == ch else 1
+            value = min(row[i - 1] + 1, previous_row[i] + 1, previous_row[i - 1] + cost)
+            if before_row is not None and i > 1 and key[i - 1] == previous_ch and key[i - 2] == ch:
+                value = min(value, before_row[i - 2] + 1)
+            row.append(value)
+
+        if (node.canonical is not None and row[-1] < best[0]
+                and (chars_per_edit is None or row[-1] <= depth // chars_per_edit)):
+            best[0] = row[-1]
+            best[1] = node.canonical
+
+        # uno scambio nel figlio riparte dalla riga precedente
+        if min(min(row), min(previous_row) + 1) < best[0]:
+            for next_ch, child in node.children.items():
+                self._fuzzy_step(child, next_ch, key, row, previous_row, ch, depth + 1, chars_per_edit, best)
+
+    def _walk(self, key):
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+
+def load_dictionary(path):
+    """Compila il file JSON {canonico: [alias, ...]} in un SkillTrie."""
+    trie = SkillTrie()
+    try:
+        with open(path, encoding="utf-8") as f:
+            synonyms = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Dizionario skill non caricato (%s): %s", path, e)
+        return trie
+
+    for canonical, aliases in synonyms.items():
+        trie.insert(normalize(canonical), canonical)
+        for alias in aliases:
+            trie.insert(normalize(alias), canonical)
+    return trie
+
+
+# Caricato una volta per container: le invocazioni warm riusano lo stesso trie
+_trie = load_dictionary(DICTIONARY_PATH)
+
+STATS = {"exact": 0, "prefix": 0, "fuzzy": 0, "miss": 0}
+
+
+def canonicalize(name):
+    """Ritorna il nome canonico della skill, o il nome ripulito se non è nel dizionario."""
+    cleaned = clean(name)
+    key = normalize(cleaned)
+    if not key:
+        return cleaned
+
+    canonical = _trie.get(key)
+    if canonical is not None:
+        STATS["exact"] += 1
+        return canonical
+
+    if len(key) >= MIN_APPROX_LENGTH:
+        candidates = _trie.with_prefix(key, limit=2)
+        if len(candidates) == 1:
+            STATS["prefix"] += 1
+            return candidates[0]
+
+        max_distance = min(MAX_EDIT_DISTANCE, len(key) // FUZZY_CHARS_PER_EDIT)
+        match = _trie.search_fuzzy(key, max_distance, FUZZY_CHARS_PER_EDIT) if max_distance > 0 else None
+        if match is not None:
+            STATS["fuzzy"] += 1
+            return match[0]
+
+    STATS["miss"] += 1
+    return cleaned
+
+
+def stats():
+    """Contatori hit/miss del container, con hit rate (da loggare nei handler)."""
+    total = sum(STATS.values())
+    hits = total - STATS["miss"]
+    return dict(STATS, total=total, hit_rate=round(hits / total, 3) if total else None)
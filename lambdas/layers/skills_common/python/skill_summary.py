@@ -0,0 +1,158 @@
+"""
+Riepiloghi per utente mantenuti dallo stream della tabella skill.
+
+Il riepilogo "summary#<user>" sta nella tabella meta con attributi piatti, così
+ogni record dello stream diventa un UpdateItem con soli ADD/SET/REMOVE su
+attributi di primo livello (un percorso annidato non si può incrementare se la
+mappa non esiste ancora):
+  - total, level_sum e "level#<n>" (istogramma dei livelli);
+  - "day#<YYYY-MM-DD>": scritture visibili dell'utente per giorno, per
+    l'attività recente degli ultimi ACTIVITY_DAYS giorni;
+  - last_skill_uid, last_skill, last_skill_at: l'ultima skill arrivata
+    all'utente (creata o riassegnata), tolta se viene cancellata o riassegnata;
+  - updated_at.
+
+changes(record) traduce un record INSERT/MODIFY/REMOVE (vista
+NEW_AND_OLD_IMAGES) nelle variazioni per utente: un MODIFY che cambia livello
+sposta un'unità da un livello all'altro, uno che cambia utente toglie la skill
+al vecchio e la aggiunge al nuovo. from_items calcola lo stesso riepilogo da
+zero (utenti senza riepilogo, ricostruzione) e to_response lo trasforma nella
+risposta di GET /skills/summary.
+"""
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, NamedTuple, Optional
+
+import dynamo_codec
+
+ACTIVITY_DAYS = int(os.getenv("SUMMARY_ACTIVITY_DAYS", "30"))
+
+# L'embedding è l'attributo più grande delle immagini e qui non serve
+_IGNORED = ("embedding",)
+
+
+class Change(NamedTuple):
+    """Variazioni di un riepilogo: ADD, SET e REMOVE su attributi di primo livello."""
+    add: dict[str, int]
+    set: dict[str, Any]
+    remove: tuple[str, ...]
+
+
+def _day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def _contribution(item: dict[str, Any], sign: int) -> Counter:
+    delta = Counter(total=sign)
+    level = item.get("level")
+    if isinstance(level, int):
+        delta["level_sum"] += sign * level
+        delta[f"level#{level}"] += sign
+    return delta
+
+
+def _last_skill(item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "last_skill_uid": item["Skill_UID"],
+        "last_skill": item.get("skill"),
+        "last_skill_at": item.get("acquired_on"),
+    }
+
+
+def changes(record: dict[str, Any]) -> dict[str, Change]:
+    """Variazioni per utente di un record dello stream; vuoto se il record non cambia nessun riepilogo."""
+    data = record["dynamodb"]
+    old = dynamo_codec.item_to_python(data["OldImage"], exclude=_IGNORED) if "OldImage" in data else None
+    new = dynamo_codec.item_to_python(data["NewImage"], exclude=_IGNORED) if "NewImage" in data else None
+
+    deltas: dict[str, Counter] = {}
+    if old and old.get("user"):
+        deltas.setdefault(old["user"], Counter()).update(_contribution(old, -1))
+    if new and new.get("user"):
+        deltas.setdefault(new["user"], Counter()).update(_contribution(new, 1))
+
+    # gli attributi interni (touch=False, es. l'embedding) non cambiano updated_at: non sono attività
+    moment = datetime.fromtimestamp(data["ApproximateCreationDateTime"], timezone.utc)
+    owner = (new or old or {}).get("user")
+    visible = old is None or new is None or old.get("updated_at") != new.get("updated_at")
+    expired = ()
+    if owner and visible:
+        deltas[owner][f"day#{_day(moment)}"] += 1
+        # il giorno appena uscito dalla finestra; quelli saltati li toglie la ricostruzione
+        expired = (f"day#{_day(moment - timedelta(days=ACTIVITY_DAYS))}",)
+
+    result = {}
+    for user, delta in deltas.items():
+        add = {name: value for name, value in delta.items() if value}
+        if not add:
+            continue
+        values = {"updated_at": moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")}
+        if new is not None and user == new.get("user") and (old is None or old.get("user") != user):
+            # skill nuova per l'utente (creata o riassegnata)
+            values.update(_last_skill(new))
+        result[user] = Change(add, values, expired if user == owner else ())
+    return result
+
+
+def departed(record: dict[str, Any]) -> Optional[tuple[str, str]]:
+    """(vecchio utente, Skill_UID) se con questo record la skill non è più sua: REMOVE o cambio di utente."""
+    data = record["dynamodb"]
+    old_user = data.get("OldImage", {}).get("user", {}).get("S")
+    new_user = data.get("NewImage", {}).get("user", {}).get("S")
+    if old_user and old_user != new_user:
+        return old_user, data["Keys"]["Skill_UID"]["S"]
+    return None
+
+
+def from_items(items: Iterable[dict[str, Any]], now: Optional[datetime] = None) -> dict[str, Any]:
+    """
+    Riepilogo calcolato da zero dalle skill di un utente (servono Skill_UID, skill,
+    level, acquired_on, updated_at, Skill_ULID). L'attività conta una scrittura
+    per skill, l'ultima: è un'approssimazione di quella tenuta dallo stream.
+    """
+    now = now or datetime.now(timezone.utc)
+    start = _day(now - timedelta(days=ACTIVITY_DAYS - 1))
+    summary = Counter(total=0)
+    latest = None
+    for item in items:
+        summary.update(_contribution(item, 1))
+        day = (item.get("updated_at") or "")[:10]
+        if day >= start:
+            summary[f"day#{day}"] += 1
+        if latest is None or (item.get("Skill_ULID", ""), item.get("acquired_on", "")) > (
+                latest.get("Skill_ULID", ""), latest.get("acquired_on", "")):
+            latest = item
+    result: dict[str, Any] = dict(summary)
+    if latest is not None:
+        result.update(_last_skill(latest))
+    result["updated_at"] = now.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return result
+
+
+def to_response(user: str, summary: dict[str, Any], now: Optional[datetime] = None) -> dict[str, Any]:
+    """{ user, total, average_level, levels, last_learned, activity, updated_at } dal riepilogo salvato."""
+    now = now or datetime.now(timezone.utc)
+    start = _day(now - timedelta(days=ACTIVITY_DAYS - 1))
+    levels = sorted(
+        (int(name.split("#", 1)[1]), count)
+        for name, count in summary.items() if name.startswith("level#") and count
+    )
+    activity = {
+        name.split("#", 1)[1]: count
+        for name, count in sorted(summary.items()) if name.startswith("day#") and count and name[4:] >= start
+    }
+    total = summary.get("total", 0)
+    last = None
+    if summary.get("last_skill_uid"):
+        last = {"Skill_UID": summary["last_skill_uid"], "skill": summary.get("last_skill"),
+                "acquired_on": summary.get("last_skill_at")}
+    return {
+        "user": user,
+        "total": total,
+        "average_level": round(summary.get("level_sum", 0) / total, 2) if total else None,
+        "levels": {str(level): count for level, count in levels},
+        "last_learned": last,
+        "activity": activity,
+        "updated_at": summary.get("updated_at"),
+    }
@@ -0,0 +1,107 @@
+"""
+Tassonomia di riferimento delle skill in formato binario, letta con mmap.
+
+Il file viene scritto da scripts/build_skill_taxonomy.py ed è composto da:
+
+    header    96 byte: magic b"SKTX", versione, n, dim, byte della string table,
+              nome del modello di embedding (64 byte, utf-8, padding con \\0)
+    matrix    float16[n, dim], vettori normalizzati
+    offsets   uint32[n + 1], inizio di ogni nome nella string table
+    strings   nomi utf-8 concatenati
+
+All'apertura il file viene mappato in memoria e matrix/offsets sono viste
+np.frombuffer sul mmap: nessuna copia e nessun parsing, le pagine vengono
+caricate dal sistema operativo solo quando servono.
+
+Il prodotto in float16 non usa BLAS, quindi nearest() converte la matrice in
+float32 a blocchi di NEAREST_BLOCK_ROWS righe (1 MB per blocco con dim 256)
+invece di tenerne una copia float32 intera (il doppio del file, residente per
+tutta la vita del container): ogni query riconverte i blocchi, un costo
+lineare in n*dim piccolo rispetto alla chiamata a Gemini che la precede.
+"""
+import mmap
+import struct
+
+import numpy as np
+
+MAGIC = b"SKTX"
+VERSION = 1
+_HEADER = struct.Struct("<4sHxxIII64s")
+HEADER_SIZE = 96
+NEAREST_BLOCK_ROWS = 1024
+
+
+def _align(size, to=8):
+    return (size + to - 1) // to * to
+
+
+def write_taxonomy(path, names, matrix, model):
+    """Scrive names (lista di str) e matrix (n, dim) nel formato binario."""
+    matrix = np.asarray(matrix, dtype=np.float16)
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    strings = b"".join(encoded)
+
+    header = _HEADER.pack(MAGIC, VERSION, len(names), matrix.shape[1], len(strings), model.encode("utf-8"))
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(matrix.tobytes())
+        f.write(b"\0" * (_align(matrix.nbytes) - matrix.nbytes))
+        f.write(offsets.tobytes())
+        f.write(strings)
+
+
+class Taxonomy:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, dim, strings_size, model = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: formato tassonomia non riconosciuto")
+        self.model = model.rstrip(b"\0").decode("utf-8")
+
+        matrix_offset = HEADER_SIZE
+        offsets_offset = matrix_offset + _align(n * dim * 2)
+        strings_offset = offsets_offset + (n + 1) * 4
+        self.matrix = np.frombuffer(self._mmap, dtype=np.float16, count=n * dim,
+                                    offset=matrix_offset).reshape(n, dim)
+        self._offsets = np.frombuffer(self._mmap, dtype=np.uint32, count=n + 1, offset=offsets_offset)
+        self._strings_offset = strings_offset
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def name(self, index):
+        start = self._strings_offset + int(self._offsets[index])
+        end = self._strings_offset + int(self._offsets[index + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def nearest(self, queries):
+        """Per ogni query (n, dim) float32 normalizzata: indice della voce più vicina e similarità."""
+        # una query float64 farebbe il prodotto (e la conversione dei blocchi) in float64
+        queries = np.asarray(queries, dtype=np.float32)
+        rows = np.arange(len(queries))
+        best = np.zeros(len(queries), dtype=np.intp)
+        best_similarity = np.full(len(queries), -np.inf, dtype=np.float32)
+        for start in range(0, len(self), NEAREST_BLOCK_ROWS):
+            # solo il blocco corrente in float32 (vedi docstring del modulo)
+            block = self.matrix[start:start + NEAREST_BLOCK_ROWS].astype(np.float32)
+            similarities = queries @ block.T
+            index = similarities.argmax(axis=1)
+            similarity = similarities[rows, index]
+            better = similarity > best_similarity
+            best[better] = start + index[better]
+            best_similarity[better] = similarity[better]
+        return best, best_similarity
+
+    def vector(self, index):
+        return self.matrix[index].astype(np.float32)
+
+
+def open_taxonomy(path):
+    """Apre la tassonomia, o ritorna None se il file non c'è (funzione disattivata)."""
+    try:
+        return Taxonomy(path)
+    except FileNotFoundError:
+        return None
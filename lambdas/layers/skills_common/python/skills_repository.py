@@ -0,0 +1,861 @@
+"""
+Accesso alla tabella skill condiviso da tutte le Lambda.
+
+Il client DynamoDB low-level viene creato una sola volta per container con una
+configurazione botocore esplicita (pool di connessioni, TCP keepalive, retry
+adaptive, timeout di connect/read) ed è l'unico punto in cui compare il nome
+della tabella. Le funzioni espongono get/put/update/delete/query/scan/batch
+e convertono gli item da e verso il formato DynamoDB ai bordi: in lettura con
+dynamo_codec (numeri come int/float, niente Decimal), in scrittura con
+TypeSerializer. Le varianti *_raw ritornano gli item nel formato wire, da
+passare a dynamo_codec.dumps_items per scrivere il JSON della risposta senza
+costruire oggetti Python intermedi.
+
+Ogni scrittura visibile ai client imposta updated_at (ISO con microsecondi,
+ordinabile come stringa); delete_skill lascia un tombstone con TTL nella
+tabella DYNAMODB_TOMBSTONE_TABLE. Entrambe le tabelle hanno il GSI
+UPDATED_INDEX (user + updated_at) usato da query_changes_raw per la sync
+incrementale (GET /skills/changes).
+
+La tabella meta (DYNAMODB_META_TABLE, partition key "pk") tiene i contatori di
+generazione per utente e per la tabella intera (ALL_USERS): ogni scrittura li
+incrementa e skill_cache li usa per invalidare le letture in cache. Tiene anche
+i riepiloghi per utente ("summary#<user>") e gli sketch settimanali della
+classifica ("trending#<settimana>" e le sue parti "trending#<settimana>#<parte>"),
+aggiornati dai consumer dello stream della
+tabella skill, e i marcatori "applied#..." (TTL su expires_at) dei record già
+applicati.
+
+Una skill è identificata dalla coppia (user, nome canonico normalizzato): lo
+Skill_UID è un uuid5 deterministico di quella coppia, così ogni nuova menzione
+della stessa skill aggiorna la riga esistente invece di crearne una nuova.
+Alla creazione la riga riceve anche Skill_ULID, un ULID ordinabile nel tempo:
+è la sort key di CREATED_INDEX per elencare le skill dalla più recente.
+"""
+import os
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, TypedDict
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+import dynamo_codec
+import metrics
+import skill_names
+
+TABLE_NAME = os.getenv("DYNAMODB_TABLE", "skillbuilder-skills")
+# GSI con partition key "user" (proiezione ALL: serve anche l'attributo embedding)
+USER_INDEX = os.getenv("USER_INDEX", "user-index")
+META_TABLE_NAME = os.getenv("DYNAMODB_META_TABLE", "skillbuilder-skills-meta")
+# Skill cancellate (Skill_UID, user, updated_at, expires_at con TTL DynamoDB)
+TOMBSTONE_TABLE_NAME = os.getenv("DYNAMODB_TOMBSTONE_TABLE", "skillbuilder-skills-tombstones")
+TOMBSTONE_TTL_DAYS = int(os.getenv("TOMBSTONE_TTL_DAYS", "30"))
+# GSI con partition key "user" e sort key "updated_at", su tabella skill e tombstone
+UPDATED_INDEX = os.getenv("UPDATED_INDEX", "user-updated-index")
+# GSI con partition key "user" e sort key "acquired_on" (ISO): range di date con KeyConditionExpression
+ACQUIRED_INDEX = os.getenv("ACQUIRED_INDEX", "user-acquired-index")
+# GSI con partition key "user" e sort key "Skill_ULID": le ultime N skill create con una Query
+CREATED_INDEX = os.getenv("CREATED_INDEX", "user-created-index")
+
+# Risposte grezze dell'AI, una per richiesta (zlib, TTL su expires_at); le skill ne tengono solo l'id
+AI_RESPONSE_TABLE_NAME = os.getenv("DYNAMODB_AI_RESPONSE_TABLE", "skillbuilder-ai-responses")
+AI_RESPONSE_TTL_DAYS = int(os.getenv("AI_RESPONSE_TTL_DAYS", "30"))
+# Marcatori dei record dello stream già applicati: devono sopravvivere ai retry (stream: 24 ore)
+SUMMARY_MARKER_TTL_SECONDS = int(os.getenv("SUMMARY_MARKER_TTL_SECONDS", str(2 * 86400)))
+# Sketch settimanali della classifica (skill_trending), tenuti TRENDING_TTL_DAYS dopo l'ultima scrittura
+TRENDING_TTL_DAYS = int(os.getenv("TRENDING_TTL_DAYS", "90"))
+
+# acquired_on si salva sempre come ISO_FORMAT; in lettura si accettano anche i formati legacy
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+DATE_FORMATS = (ISO_FORMAT, "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%d", "%d/%m/%Y")
+# Ambito della generazione che cambia a ogni scrittura (get_skills legge tutta la tabella)
+ALL_USERS = "*"
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "20")),
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": int(os.getenv("DYNAMODB_MAX_ATTEMPTS", "5"))},
+    connect_timeout=float(os.getenv("DYNAMODB_CONNECT_TIMEOUT", "1")),
+    read_timeout=float(os.getenv("DYNAMODB_READ_TIMEOUT", "3")),
+)
+# Creato all'import: le invocazioni warm riusano client e connessioni
+client = boto3.client("dynamodb", config=CLIENT_CONFIG)
+# tempi e ConsumedCapacity di ogni chiamata nella riga EMF dell'invocazione
+metrics.instrument_dynamodb(client)
+
+# Namespace fisso per gli uuid5 delle skill: NON cambiarlo, altrimenti le chiavi
+# calcolate non corrispondono più a quelle già salvate
+SKILL_NAMESPACE = uuid.UUID("6f1c2a4e-8d3b-5e7f-9a10-2b3c4d5e6f70")
+
+# Alfabeto base32 di Crockford dei ULID: crescente in ASCII, le stringhe si ordinano come i numeri
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# Attributi del vettore della skill (skill_embeddings): valgono solo per il nome con cui sono stati calcolati
+EMBEDDING_ATTRIBUTES = ("embedding", "embedding_model")
+# Attributi interni non restituiti dall'API (dynamo_codec exclude=, public())
+EXCLUDED_ATTRIBUTES = ("embedding",)
+
+# Limiti delle API batch di DynamoDB
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+
+_serializer = TypeSerializer()
+
+
+class SkillItem(TypedDict, total=False):
+    Skill_UID: str
+    user: str
+    skill: str
+    level: int
+    mentions: int
+    acquired_on: str
+    last_seen: str
+    source: str
+    status: str
+    embedding: bytes
+    embedding_model: str
+    updated_at: str
+    aiResponseId: str
+    Skill_ULID: str
+    moved_at: str
+
+
+def serialize(item: dict[str, Any]) -> dict[str, Any]:
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+def deserialize(item: dict[str, Any]) -> SkillItem:
+    return dynamo_codec.item_to_python(item)  # type: ignore[return-value]
+
+
+def public(skill: SkillItem) -> dict[str, Any]:
+    """La skill senza EXCLUDED_ATTRIBUTES (l'embedding binario finirebbe nel JSON come stringa)."""
+    return {key: value for key, value in skill.items() if key not in EXCLUDED_ATTRIBUTES}
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime(ISO_FORMAT)
+
+
+def normalize_date(value: Any) -> Optional[str]:
+    """Data in uno dei DATE_FORMATS -> ISO_FORMAT (ordinabile come stringa); None se non valida."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime(ISO_FORMAT)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def date_bound(value: str, end: bool) -> Optional[str]:
+    """Estremo di un intervallo su acquired_on in ISO; una data senza ora come estremo finale vale fino a fine giornata."""
+    bound = normalize_date(value)
+    if bound and end and "T" not in value:
+        bound = bound.replace("T00:00:00Z", "T23:59:59Z")
+    return bound
+
+
+def utc_now_precise() -> str:
+    """Timestamp di updated_at: larghezza fissa, l'ordine delle stringhe è quello temporale."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def skill_key(user: str, skill: str) -> str:
+    """Skill_UID deterministico per (user, skill normalizzata)."""
+    return str(uuid.uuid5(SKILL_NAMESPACE, f"{user}\n{skill_names.normalize(skill)}"))
+
+
+def new_ulid(timestamp: Optional[float] = None) -> str:
+    """ULID di 26 caratteri: 48 bit di millisecondi + 80 casuali, in ordine di tempo come stringa."""
+    millis = int((time.time() if timestamp is None else timestamp) * 1000)
+    value = millis << 80 | int.from_bytes(os.urandom(10), "big")
+    return "".join(_ULID_ALPHABET[value >> shift & 31] for shift in range(125, -1, -5))
+
+
+def _key(skill_id: str) -> dict[str, Any]:
+    return {"Skill_UID": {"S": skill_id}}
+
+
+def _projection(attributes: Optional[Iterable[str]]) -> dict[str, Any]:
+    if not attributes:
+        return {}
+    names = {f"#p{i}": name for i, name in enumerate(attributes)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+
+def _paginate(operation, raw: bool = False, **kwargs) -> list[Any]:
+    items = []
+    while True:
+        response = operation(**kwargs)
+        page = response.get("Items", [])
+        items.extend(page if raw else map(deserialize, page))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def get_skill(skill_id: str, attributes: Optional[Iterable[str]] = None) -> Optional[SkillItem]:
+    response = client.get_item(TableName=TABLE_NAME, Key=_key(skill_id), **_projection(attributes))
+    item = response.get("Item")
+    return deserialize(item) if item else None
+
+
+def get_skill_raw(skill_id: str, attributes: Optional[Iterable[str]] = None) -> Optional[dict[str, Any]]:
+    """Come get_skill, ma ritorna l'item nel formato wire DynamoDB."""
+    response = client.get_item(TableName=TABLE_NAME, Key=_key(skill_id), **_projection(attributes))
+    return response.get("Item")
+
+
+def _stamped(item: SkillItem) -> SkillItem:
+    if item.get("updated_at") and item.get("Skill_ULID"):
+        return item
+    return {"updated_at": utc_now_precise(), "Skill_ULID": new_ulid(), **item}
+
+
+def put_skill(item: SkillItem) -> None:
+    client.put_item(TableName=TABLE_NAME, Item=serialize(_stamped(item)))
+
+
+def delete_skill(skill_id: str) -> Optional[SkillItem]:
+    """
+    Cancella la skill e scrive il suo tombstone nella stessa transazione; ritorna
+    l'item cancellato, o None se non esisteva.
+    """
+    response = client.get_item(TableName=TABLE_NAME, Key=_key(skill_id), ConsistentRead=True)
+    if "Item" not in response:
+        return None
+    item = deserialize(response["Item"])
+    now = utc_now_precise()
+    tombstone = {
+        "Skill_UID": skill_id,
+        "user": item["user"],
+        "updated_at": now,
+        "expires_at": int(time.time()) + TOMBSTONE_TTL_DAYS * 86400,
+    }
+    try:
+        client.transact_write_items(TransactItems=[
+            {"Delete": {
+                "TableName": TABLE_NAME,
+                "Key": _key(skill_id),
+                # il tombstone deve finire sotto l'utente che possedeva la riga
+                "ConditionExpression": "#user = :user",
+                "ExpressionAttributeNames": {"#user": "user"},
+                "ExpressionAttributeValues": {":user": {"S": item["user"]}},
+            }},
+            {"Put": {"TableName": TOMBSTONE_TABLE_NAME, "Item": serialize(tombstone)}},
+        ])
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "TransactionCanceledException":
+            return None  # cancellata o riassegnata nel frattempo
+        raise
+    return item
+
+
+def update_skill(skill_id: str, attributes: dict[str, Any], touch: bool = True) -> Optional[SkillItem]:
+    """
+    SET degli attributi su una skill esistente; ritorna l'item aggiornato o None
+    se non esiste. touch=False non aggiorna updated_at (attributi che i client
+    non vedono, es. l'embedding). Se cambia skill l'embedding del vecchio nome
+    viene tolto: lo ricalcola il backfill di chat_skill/search_skills.
+    """
+    if touch:
+        attributes = {**attributes, "updated_at": utc_now_precise()}
+    names = {f"#a{i}": name for i, name in enumerate(attributes)}
+    values = {f":a{i}": value for i, value in enumerate(attributes.values())}
+    expression = "SET " + ", ".join(f"#a{i} = :a{i}" for i in range(len(attributes)))
+    if "skill" in attributes and "embedding" not in attributes:
+        expression += " REMOVE " + ", ".join(EMBEDDING_ATTRIBUTES)
+    try:
+        response = client.update_item(
+            TableName=TABLE_NAME,
+            Key=_key(skill_id),
+            UpdateExpression=expression,
+            ConditionExpression="attribute_exists(Skill_UID)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=serialize(values),
+            ReturnValues="ALL_NEW",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return None
+        raise
+    return deserialize(response["Attributes"])
+
+
+def upsert_skill(
+    user: str,
+    skill: str,
+    acquired_on: str,
+    level: Optional[int] = None,
+    attributes: Optional[dict[str, Any]] = None,
+) -> SkillItem:
+    """
+    Crea la skill o, se esiste già, incrementa mentions e aggiorna last_seen con
+    un solo UpdateItem condizionale.
+
+    level=None incrementa il livello di 1 a ogni menzione (1 alla creazione),
+    altrimenti il livello viene impostato al valore passato. acquired_on
+    (normalizzato in ISO_FORMAT) e Skill_ULID vengono scritti solo alla
+    creazione. attributes sono attributi extra da impostare (es. source,
+    status). Ritorna l'item aggiornato (ReturnValues=ALL_NEW).
+    """
+    names = {"#user": "user", "#skill": "skill", "#level": "level"}
+    values: dict[str, Any] = {
+        ":user": user,
+        ":skill": skill,
+        ":now": utc_now(),
+        ":updated_at": utc_now_precise(),
+        ":acquired_on": normalize_date(acquired_on) or acquired_on,
+        ":ulid": new_ulid(),
+        ":one": 1,
+    }
+    set_parts = [
+        "#user = :user",
+        "#skill = :skill",
+        "last_seen = :now",
+        "updated_at = :updated_at",
+        "acquired_on = if_not_exists(acquired_on, :acquired_on)",
+        "Skill_ULID = if_not_exists(Skill_ULID, :ulid)",
+    ]
+    add_parts = ["mentions :one"]
+
+    if level is None:
+        add_parts.append("#level :one")
+    else:
+        set_parts.append("#level = :level")
+        values[":level"] = level
+
+    for i, (name, value) in enumerate((attributes or {}).items()):
+        names[f"#a{i}"] = name
+        values[f":a{i}"] = value
+        set_parts.append(f"#a{i} = :a{i}")
+
+    response = client.update_item(
+        TableName=TABLE_NAME,
+        Key=_key(skill_key(user, skill)),
+        UpdateExpression="SET " + ", ".join(set_parts) + " ADD " + ", ".join(add_parts),
+        # se la riga esiste deve appartenere allo stesso utente
+        ConditionExpression="attribute_not_exists(Skill_UID) OR #user = :user",
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=serialize(values),
+        ReturnValues="ALL_NEW",
+    )
+    return deserialize(response["Attributes"])
+
+
+MOVE_ATTEMPTS = 3
+
+
+def _unchanged(item: SkillItem) -> dict[str, Any]:
+    """Condizione su una riga letta: esiste ancora e nessuno l'ha scritta nel frattempo."""
+    if not item.get("updated_at"):
+        # righe precedenti a updated_at: qualunque scrittura successiva lo imposta
+        return {"ConditionExpression": "attribute_exists(Skill_UID) AND attribute_not_exists(updated_at)"}
+    return {
+        "ConditionExpression": "updated_at = :read",
+        "ExpressionAttributeValues": {":read": {"S": item["updated_at"]}},
+    }
+
+
+def _merged(source: SkillItem, target: SkillItem) -> SkillItem:
+    """La riga di destinazione con le menzioni e la storia della riga spostata."""
+    merged = dict(target)
+    merged["mentions"] = int(target.get("mentions", 1)) + int(source.get("mentions", 1))
+    merged["level"] = max(int(target.get("level", 1)), int(source.get("level", 1)))
+    for name, pick in (("acquired_on", min), ("Skill_ULID", min), ("last_seen", max)):
+        present = [item[name] for item in (source, target) if item.get(name)]
+        if present:
+            merged[name] = pick(present)
+    return merged  # type: ignore[return-value]
+
+
+def move_skill(skill_id: str, attributes: dict[str, Any]) -> Optional[SkillItem]:
+    """
+    Update che cambia user o skill: lo Skill_UID è uuid5 di (user, skill
+    normalizzata), quindi la riga va spostata sulla nuova chiave invece di
+    aggiornarla sul posto (una menzione successiva della skill tornerebbe sulla
+    vecchia riga). In una transazione cancella la vecchia riga con il suo
+    tombstone e scrive quella nuova; se l'utente ha già la skill di
+    destinazione le due righe si uniscono (menzioni sommate, livello massimo,
+    acquired_on e Skill_ULID più vecchi). Le altre chiavi di attributes si
+    applicano alla riga risultante. La scrittura porta moved_at = updated_at:
+    i consumer dello stream la riconoscono come spostamento, non come nuove
+    menzioni. Ritorna la riga con il nuovo Skill_UID, o None se la skill non
+    esiste; se le righe cambiano in mezzo si rilegge, dopo MOVE_ATTEMPTS
+    tentativi la TransactionCanceledException arriva al chiamante.
+    """
+    for attempt in range(MOVE_ATTEMPTS):
+        response = client.get_item(TableName=TABLE_NAME, Key=_key(skill_id), ConsistentRead=True)
+        if "Item" not in response:
+            return None
+        source = deserialize(response["Item"])
+        user = attributes.get("user", source["user"])
+        target_id = skill_key(user, attributes.get("skill", source["skill"]))
+        if target_id == skill_id:
+            return update_skill(skill_id, attributes)  # stessa chiave: es. solo maiuscole diverse
+
+        response = client.get_item(TableName=TABLE_NAME, Key=_key(target_id), ConsistentRead=True)
+        target = deserialize(response["Item"]) if "Item" in response else None
+        now = utc_now_precise()
+        if target:
+            item = _merged(source, target)  # l'embedding è quello della destinazione
+        else:
+            item = dict(source)
+            if "skill" in attributes:
+                for name in EMBEDDING_ATTRIBUTES:
+                    item.pop(name, None)  # vettore del vecchio nome, come in update_skill
+        item.update(attributes, Skill_UID=target_id, updated_at=now, moved_at=now)
+        item.setdefault("Skill_ULID", new_ulid())
+        tombstone = {
+            "Skill_UID": skill_id,
+            "user": source["user"],
+            "updated_at": now,
+            "expires_at": int(time.time()) + TOMBSTONE_TTL_DAYS * 86400,
+        }
+        put = {"TableName": TABLE_NAME, "Item": serialize(item)}
+        if target:
+            put.update(_unchanged(target))
+        else:
+            put["ConditionExpression"] = "attribute_not_exists(Skill_UID)"
+        try:
+            client.transact_write_items(TransactItems=[
+                {"Delete": {"TableName": TABLE_NAME, "Key": _key(skill_id), **_unchanged(source)}},
+                {"Put": put},
+                {"Put": {"TableName": TOMBSTONE_TABLE_NAME, "Item": serialize(tombstone)}},
+            ])
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException" or attempt == MOVE_ATTEMPTS - 1:
+                raise
+            continue
+        return item  # type: ignore[return-value]
+    return None
+
+
+def set_attributes(skill_id: str, attributes: dict[str, Any]) -> None:
+    """SET di attributi interni su una skill esistente (es. l'embedding calcolato in ritardo)."""
+    update_skill(skill_id, attributes, touch=False)
+
+
+def set_attributes_many(updates: dict[str, dict[str, Any]], workers: int = 8) -> None:
+    """set_attributes su più skill (Skill_UID -> attributi) con UpdateItem in parallelo sul pool del client."""
+    if len(updates) <= 1:
+        for skill_id, attributes in updates.items():
+            set_attributes(skill_id, attributes)
+        return
+    with ThreadPoolExecutor(max_workers=min(workers, len(updates))) as pool:
+        # list(): le eccezioni dei worker arrivano al chiamante
+        list(pool.map(lambda entry: set_attributes(*entry), updates.items()))
+
+
+def query_user_skills(user: str, projection: Optional[Iterable[str]] = None) -> list[SkillItem]:
+    """Tutte le skill di un utente tramite il GSI su user (con paginazione)."""
+    kwargs = _projection(projection)
+    kwargs.setdefault("ExpressionAttributeNames", {})["#user"] = "user"
+    return _paginate(
+        client.query,
+        TableName=TABLE_NAME,
+        IndexName=USER_INDEX,
+        KeyConditionExpression="#user = :user",
+        ExpressionAttributeValues={":user": {"S": user}},
+        **kwargs,
+    )
+
+
+def _user_query(
+    user: str,
+    acquired_from: Optional[str] = None,
+    acquired_to: Optional[str] = None,
+) -> dict[str, Any]:
+    """Parametri della Query sulle skill di un utente, con l'eventuale intervallo su acquired_on."""
+    names = {"#user": "user"}
+    values = {":user": {"S": user}}
+    condition = "#user = :user"
+    if acquired_from or acquired_to:
+        names["#acquired_on"] = "acquired_on"
+        if acquired_from and acquired_to:
+            condition += " AND #acquired_on BETWEEN :from AND :to"
+        else:
+            condition += " AND #acquired_on >= :from" if acquired_from else " AND #acquired_on <= :to"
+        values.update({f":{name}": {"S": value}
+                       for name, value in (("from", acquired_from), ("to", acquired_to)) if value})
+    return {
+        "TableName": TABLE_NAME,
+        "IndexName": ACQUIRED_INDEX if acquired_from or acquired_to else USER_INDEX,
+        "KeyConditionExpression": condition,
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+def query_user_skills_raw(
+    user: str,
+    acquired_from: Optional[str] = None,
+    acquired_to: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Skill di un utente nel formato wire; con acquired_from/acquired_to (ISO,
+    estremi inclusi) solo quelle acquisite nell'intervallo, dal GSI su acquired_on.
+    """
+    return _paginate(client.query, raw=True, **_user_query(user, acquired_from, acquired_to))
+
+
+def _count(operation, **kwargs) -> int:
+    # Select=COUNT: DynamoDB legge gli item (stesse RCU) ma ne ritorna solo il numero
+    total = 0
+    while True:
+        response = operation(Select="COUNT", **kwargs)
+        total += response["Count"]
+        if "LastEvaluatedKey" not in response:
+            return total
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def count_user_skills(
+    user: str,
+    acquired_from: Optional[str] = None,
+    acquired_to: Optional[str] = None,
+) -> int:
+    """Numero esatto di skill dell'utente (eventualmente nell'intervallo su acquired_on), senza trasferire item."""
+    return _count(client.query, **_user_query(user, acquired_from, acquired_to))
+
+
+def count_skills() -> int:
+    """Numero esatto di skill della tabella (scan COUNT)."""
+    return _count(client.scan, TableName=TABLE_NAME)
+
+
+def query_latest_skills_raw(user: str, limit: int) -> list[dict[str, Any]]:
+    """Le ultime limit skill create dall'utente (dalla più recente) nel formato wire, dal GSI su Skill_ULID."""
+    kwargs = {}
+    items: list[dict[str, Any]] = []
+    while len(items) < limit:
+        # una pagina si ferma anche a 1 MB: si continua solo in quel caso
+        response = client.query(
+            TableName=TABLE_NAME,
+            IndexName=CREATED_INDEX,
+            KeyConditionExpression="#user = :user",
+            ExpressionAttributeNames={"#user": "user"},
+            ExpressionAttributeValues={":user": {"S": user}},
+            ScanIndexForward=False,
+            Limit=limit - len(items),
+            **kwargs,
+        )
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return items
+
+
+def scan_skills(projection: Optional[Iterable[str]] = None) -> list[SkillItem]:
+    """Tutte le skill della tabella (scan completo con paginazione)."""
+    return _paginate(client.scan, TableName=TABLE_NAME, **_projection(projection))
+
+
+def scan_skills_raw(projection: Optional[Iterable[str]] = None) -> list[dict[str, Any]]:
+    """Come scan_skills, ma ritorna gli item nel formato wire DynamoDB."""
+    return _paginate(client.scan, raw=True, TableName=TABLE_NAME, **_projection(projection))
+
+
+def query_changes_raw(
+    user: str,
+    since: Optional[tuple[str, str]] = None,
+    limit: int = 500,
+    tombstones: bool = False,
+) -> tuple[list[dict[str, Any]], bool]:
+    """
+    Skill (o tombstone) dell'utente scritte dopo il cursore since = (updated_at,
+    Skill_UID), in ordine di updated_at, nel formato wire. Ritorna (item, altri
+    rimasti): al massimo limit item.
+    """
+    names = {"#user": "user", "#updated_at": "updated_at"}
+    values = {":user": {"S": user}}
+    condition = "#user = :user"
+    if since is not None:
+        # >= e poi filtro su (updated_at, Skill_UID): nessun item perso tra due pagine con lo stesso timestamp
+        condition += " AND #updated_at >= :since"
+        values[":since"] = {"S": since[0]}
+    kwargs = dict(
+        TableName=TOMBSTONE_TABLE_NAME if tombstones else TABLE_NAME,
+        IndexName=UPDATED_INDEX,
+        KeyConditionExpression=condition,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        Limit=limit + 1,
+    )
+    items = []
+    while True:
+        response = client.query(**kwargs)
+        for item in response.get("Items", []):
+            if since is None or (item["updated_at"]["S"], item["Skill_UID"]["S"]) > since:
+                items.append(item)
+        if len(items) > limit:
+            return items[:limit], True
+        if "LastEvaluatedKey" not in response:
+            return items, False
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def put_ai_response(user: str, text: str, response_id: Optional[str] = None) -> str:
+    """Salva la risposta grezza dell'AI compressa e con TTL; ritorna l'id da scrivere sulle skill."""
+    response_id = response_id or str(uuid.uuid4())
+    client.put_item(TableName=AI_RESPONSE_TABLE_NAME, Item=serialize({
+        "response_id": response_id,
+        "user": user,
+        "created_at": utc_now(),
+        "body": zlib.compress(text.encode("utf-8"), 6),
+        "expires_at": int(time.time()) + AI_RESPONSE_TTL_DAYS * 86400,
+    }))
+    return response_id
+
+
+def get_ai_response(response_id: str) -> Optional[str]:
+    """Testo della risposta grezza, o None se non esiste o è scaduta."""
+    response = client.get_item(TableName=AI_RESPONSE_TABLE_NAME, Key={"response_id": {"S": response_id}})
+    item = response.get("Item")
+    return zlib.decompress(item["body"]["B"]).decode("utf-8") if item else None
+
+
+def _backoff(attempt: int) -> int:
+    # gli item non processati non passano dai retry di botocore: attesa esponenziale
+    time.sleep(min(0.05 * 2 ** attempt, 2.0))
+    return attempt + 1
+
+
+def batch_get_skills(skill_ids: Iterable[str]) -> list[SkillItem]:
+    """BatchGetItem a blocchi di 100, ritentando le chiavi non processate."""
+    ids = list(dict.fromkeys(skill_ids))
+    items = []
+    for start in range(0, len(ids), BATCH_GET_LIMIT):
+        request = {TABLE_NAME: {"Keys": [_key(skill_id) for skill_id in ids[start:start + BATCH_GET_LIMIT]]}}
+        attempt = 0
+        while request:
+            response = client.batch_get_item(RequestItems=request)
+            items.extend(deserialize(item) for item in response["Responses"].get(TABLE_NAME, []))
+            request = response.get("UnprocessedKeys")
+            attempt = _backoff(attempt) if request else 0
+    return items
+
+
+def batch_write_skills(puts: Iterable[SkillItem] = (), deletes: Iterable[str] = ()) -> None:
+    """BatchWriteItem a blocchi di 25 (put e delete), ritentando gli item non processati."""
+    requests = [{"PutRequest": {"Item": serialize(_stamped(item))}} for item in puts]
+    requests += [{"DeleteRequest": {"Key": _key(skill_id)}} for skill_id in deletes]
+    for start in range(0, len(requests), BATCH_WRITE_LIMIT):
+        request = {TABLE_NAME: requests[start:start + BATCH_WRITE_LIMIT]}
+        attempt = 0
+        while request:
+            response = client.batch_write_item(RequestItems=request)
+            request = response.get("UnprocessedItems")
+            attempt = _backoff(attempt) if request else 0
+
+
+def _generation_key(scope: str) -> dict[str, Any]:
+    return {"pk": {"S": f"generation#{scope}"}}
+
+
+def _summary_key(user: str) -> dict[str, Any]:
+    return {"pk": {"S": f"summary#{user}"}}
+
+
+def get_summary(user: str) -> Optional[dict[str, Any]]:
+    """Riepilogo dell'utente mantenuto dallo stream (attributi piatti, vedi skill_summary), o None."""
+    response = client.get_item(TableName=META_TABLE_NAME, Key=_summary_key(user))
+    item = response.get("Item")
+    return dynamo_codec.item_to_python(item, exclude=("pk",)) if item else None
+
+
+def put_summary(user: str, summary: dict[str, Any]) -> None:
+    """Sostituisce il riepilogo dell'utente (ricostruzione da zero)."""
+    client.put_item(TableName=META_TABLE_NAME, Item={**_summary_key(user), **serialize(summary)})
+
+
+def apply_summary_changes(marker: str, changes: dict[str, Any]) -> bool:
+    """
+    Applica le variazioni (user -> skill_summary.Change) ai riepiloghi in una
+    transazione che scrive anche il marcatore "applied#<marker>" (con TTL): se il
+    marcatore c'è già il record è stato applicato e la funzione ritorna False.
+    """
+    items = [{"Put": {
+        "TableName": META_TABLE_NAME,
+        "Item": {"pk": {"S": f"applied#{marker}"},
+                 "expires_at": {"N": str(int(time.time()) + SUMMARY_MARKER_TTL_SECONDS)}},
+        "ConditionExpression": "attribute_not_exists(pk)",
+    }}]
+    for user, (add, values, remove) in changes.items():
+        names, expression_values, clauses = {}, {}, []
+        for clause, template, entries in (
+            ("ADD", "{name} {value}", add.items()),
+            ("SET", "{name} = {value}", values.items()),
+            ("REMOVE", "{name}", ((name, None) for name in remove)),
+        ):
+            parts = []
+            for name, value in entries:
+                i = len(names)
+                names[f"#n{i}"] = name
+                if value is not None or clause == "SET":
+                    expression_values[f":v{i}"] = value
+                parts.append(template.format(name=f"#n{i}", value=f":v{i}"))
+            if parts:
+                clauses.append(f"{clause} " + ", ".join(parts))
+        update = {
+            "TableName": META_TABLE_NAME,
+            "Key": _summary_key(user),
+            "UpdateExpression": " ".join(clauses),
+            "ExpressionAttributeNames": names,
+        }
+        if expression_values:
+            update["ExpressionAttributeValues"] = serialize(expression_values)
+        items.append({"Update": update})
+    try:
+        client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+        if e.response["Error"]["Code"] == "TransactionCanceledException" and reasons[:1] == ["ConditionalCheckFailed"]:
+            return False
+        raise
+    return True
+
+
+def clear_summary_last_skill(user: str, skill_id: str) -> None:
+    """Toglie l'ultima skill creata dal riepilogo dell'utente, se è ancora skill_id."""
+    try:
+        client.update_item(
+            TableName=META_TABLE_NAME,
+            Key=_summary_key(user),
+            UpdateExpression="REMOVE last_skill_uid, last_skill, last_skill_at",
+            ConditionExpression="last_skill_uid = :id",
+            ExpressionAttributeValues={":id": {"S": skill_id}},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _trending_key(week: str, part: Optional[str] = None) -> dict[str, Any]:
+    return {"pk": {"S": f"trending#{week}#{part}" if part else f"trending#{week}"}}
+
+
+def get_trending_bucket(week: str) -> tuple[Optional[dict[str, Any]], int]:
+    """Item principale degli sketch della settimana (None se non esiste) e versione, con lettura consistente."""
+    response = client.get_item(TableName=META_TABLE_NAME, Key=_trending_key(week), ConsistentRead=True)
+    item = response.get("Item")
+    if not item:
+        return None, 0
+    return dynamo_codec.item_to_python(item, exclude=("pk",)), int(item["version"]["N"])
+
+
+def get_trending_buckets(weeks: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Item principali di più settimane con un BatchGetItem; le settimane senza scritture mancano."""
+    request = {META_TABLE_NAME: {"Keys": [_trending_key(week) for week in dict.fromkeys(weeks)]}}
+    found = {}
+    attempt = 0
+    while request:
+        response = client.batch_get_item(RequestItems=request)
+        for item in response["Responses"].get(META_TABLE_NAME, []):
+            found[item["pk"]["S"].split("#", 1)[1]] = dynamo_codec.item_to_python(item, exclude=("pk",))
+        request = response.get("UnprocessedKeys")
+        attempt = _backoff(attempt) if request else 0
+    return found
+
+
+def get_trending_parts(parts: dict[str, Iterable[str]], consistent: bool = False) -> dict[str, dict[str, bytes]]:
+    """Parti degli sketch (settimana -> nomi) con BatchGetItem da BATCH_GET_LIMIT chiavi; quelle scadute mancano."""
+    prefixes = {week: f"trending#{week}#" for week in parts}
+    keys = [_trending_key(week, part) for week, names in parts.items() for part in dict.fromkeys(names)]
+    found = {week: {} for week in parts}
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {META_TABLE_NAME: {"Keys": keys[start:start + BATCH_GET_LIMIT], "ConsistentRead": consistent}}
+        attempt = 0
+        while request:
+            response = client.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(META_TABLE_NAME, []):
+                pk = item["pk"]["S"]
+                # la settimana ha formato fisso ("2026-W42"): il nome della parte è tutto il resto
+                week = pk[len("trending#"):pk.index("#", len("trending#"))]
+                found[week][pk[len(prefixes[week]):]] = item["data"]["B"]
+            request = response.get("UnprocessedKeys")
+            attempt = _backoff(attempt) if request else 0
+    return found
+
+
+def put_trending_bucket(week: str, head: dict[str, Any], parts: dict[str, bytes], version: int,
+                        markers: list[str]) -> Optional[list[str]]:
+    """
+    Scrive l'item principale degli sketch della settimana, se la versione è
+    ancora quella letta, e le sole parti cambiate (parte -> dati, un item
+    ciascuna), in una transazione con i marcatori "applied-trending#<marker>"
+    dei record applicati: 1 + len(parts) + len(markers) al massimo 100. Ritorna
+    None se è andata; altrimenti i marcatori che esistevano già (record
+    applicati da un'invocazione precedente), o una lista vuota se il bucket è
+    stato scritto nel frattempo: si rilegge e si riprova.
+    """
+    expires_at = int(time.time()) + TRENDING_TTL_DAYS * 86400
+    bucket = {
+        **_trending_key(week),
+        **serialize(dict(head, version=version + 1, updated_at=utc_now_precise(), expires_at=expires_at)),
+    }
+    condition = {"ConditionExpression": "attribute_not_exists(pk)"}
+    if version:
+        condition = {
+            "ConditionExpression": "#v = :v",
+            "ExpressionAttributeNames": {"#v": "version"},
+            "ExpressionAttributeValues": {":v": {"N": str(version)}},
+        }
+    # le parti non hanno condizioni: le protegge quella sulla versione dell'item principale
+    items = [{"Put": {"TableName": META_TABLE_NAME, "Item": bucket, **condition}}]
+    items += [{"Put": {
+        "TableName": META_TABLE_NAME,
+        "Item": {**_trending_key(week, part), "data": {"B": data}, "expires_at": {"N": str(expires_at)}},
+    }} for part, data in parts.items()]
+    marker_expires_at = {"N": str(int(time.time()) + SUMMARY_MARKER_TTL_SECONDS)}
+    items += [{"Put": {
+        "TableName": META_TABLE_NAME,
+        "Item": {"pk": {"S": f"applied-trending#{marker}"}, "expires_at": marker_expires_at},
+        "ConditionExpression": "attribute_not_exists(pk)",
+    }} for marker in markers]
+    try:
+        client.transact_write_items(TransactItems=items)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+        reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+        # TransactionConflict: un'altra scrittura sullo stesso bucket, come una versione cambiata
+        if not reasons or any(code not in ("None", "ConditionalCheckFailed", "TransactionConflict") for code in reasons):
+            raise
+        return [marker for marker, code in zip(markers, reasons[1 + len(parts):]) if code == "ConditionalCheckFailed"]
+    return None
+
+
+def get_generation(scope: str) -> int:
+    """Contatore di generazione di un utente (o di ALL_USERS); 0 se non ci sono mai state scritture."""
+    response = client.get_item(
+        TableName=META_TABLE_NAME,
+        Key=_generation_key(scope),
+        ProjectionExpression="#g",
+        ExpressionAttributeNames={"#g": "generation"},
+    )
+    item = response.get("Item")
+    return int(item["generation"]["N"]) if item else 0
+
+
+def bump_generations(scopes: Iterable[str]) -> dict[str, int]:
+    """Incrementa i contatori di generazione (ADD atomico) e ritorna i nuovi valori."""
+    generations = {}
+    for scope in dict.fromkeys(scopes):
+        response = client.update_item(
+            TableName=META_TABLE_NAME,
+            Key=_generation_key(scope),
+            UpdateExpression="ADD #g :one",
+            ExpressionAttributeNames={"#g": "generation"},
+            ExpressionAttributeValues={":one": {"N": "1"}},
+            ReturnValues="UPDATED_NEW",
+        )
+        generations[scope] = int(response["Attributes"]["generation"]["N"])
+    return generations
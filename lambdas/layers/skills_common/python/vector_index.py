@@ -0,0 +1,57 @@
+"""
+Ricerca top-k per similarità coseno sui vettori delle skill (normalizzati).
+
+- top_k: forza bruta, un prodotto matrice-vettore; va benissimo per le poche
+  centinaia di skill di un utente.
+- IvfIndex: indice partizionato stile IVF per account grandi o ricerca su tutta
+  la tabella. I vettori vengono divisi in n_lists cluster con k-means sferico; a
+  query time si confronta la query con i centroidi e si cerca solo nelle n_probe
+  liste più vicine. È approssimato: aumentare n_probe aumenta il recall.
+"""
+import numpy as np
+
+
+def top_k(query, matrix, k):
+    """Indici e similarità delle k righe più simili a query, in ordine decrescente."""
+    if len(matrix) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    scores = matrix @ query
+    k = min(k, len(scores))
+    # argpartition è O(n): ordino solo i k candidati
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates])]
+    return order, scores[order]
+
+
+class IvfIndex:
+    def __init__(self, matrix, n_lists=None, n_iter=10, seed=0):
+        self.matrix = matrix
+        if n_lists is None:
+            # regola classica: ~sqrt(n) liste
+            n_lists = max(1, int(np.sqrt(len(matrix))))
+        self.n_lists = min(n_lists, len(matrix))
+        self.centroids = self._kmeans(n_iter, np.random.default_rng(seed))
+        assignment = (self.matrix @ self.centroids.T).argmax(axis=1)
+        self.lists = [np.flatnonzero(assignment == i) for i in range(self.n_lists)]
+
+    def _kmeans(self, n_iter, rng):
+        centroids = self.matrix[rng.choice(len(self.matrix), self.n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = (self.matrix @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.matrix)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # i cluster rimasti vuoti tengono il centroide precedente
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+        return centroids
+
+    def search(self, query, k, n_probe=4):
+        """Come top_k, ma solo sulle n_probe liste con il centroide più vicino."""
+        n_probe = min(n_probe, self.n_lists)
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        candidates = np.concatenate([self.lists[i] for i in probes])
+        order, scores = top_k(query, self.matrix[candidates], k)
+        return candidates[order], scores
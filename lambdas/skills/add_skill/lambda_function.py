@@ -1,37 +1,61 @@
 import json
-from datetime import date
-import uuid
-import boto3
 import logging
 
+from botocore.exceptions import ClientError
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_cache
+import skill_names
+import skills_repository
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-TABLE_NAME = "skillbuilder-skills" #definisce il nome della tabella DynamoDB
-dynamodb = boto3.resource("dynamodb") #inizializza l oggetto che comunica con DynamoDB.
-table = dynamodb.Table(TABLE_NAME) #serve per ottenere un riferimento alla tabella DynamoDB
 
+@metrics.instrumented("add_skill")
+@profiling.profiled("add_skill")
 def lambda_handler(event, context):
-    logger.info("Lambda invoked with event: %s", event)
+    # evento completo solo per le invocazioni campionate (VERBOSE_LOG_SAMPLE_RATE)
+    if metrics.verbose():
+        logger.info("Lambda invoked with event: %s", event)
     
     #event è un dizionario chiave: valore
     body_json=event.get("body", "{}") #prende il valore della chiave body dal dizionario, se non trova la chiave restituisce {} 
-    body = json.loads(body_json) #carica il valore dal json alla variabile, da json string => dizionario python
-
-    skill = {
-        "Skill_UID": str(uuid.uuid4()), 
-        "user": body["user"],
-        "skill": body['skill'],
-        "level": body.get("level", 1),
-        "acquired_on": date.today().strftime("%d/%m/%Y")
-    }
-
-    table.put_item(Item=skill)
-
+    with metrics.span("Parse"):
+        body = json.loads(body_json) #carica il valore dal json alla variabile, da json string => dizionario python
+
+    # Upsert su (user, skill canonica): una riga per skill, non una per ogni menzione
+    try:
+        skill = skills_repository.upsert_skill(
+            user=body["user"],
+            skill=skill_names.canonicalize(body['skill']), # "python3", "Py" => "Python"
+            acquired_on=skills_repository.utc_now(), # ISO: ordinabile e interrogabile per intervallo
+            level=body.get("level"), # se manca il livello sale di 1 a ogni menzione
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        # la chiave calcolata appartiene a un altro utente (riga legacy o spostata nel frattempo)
+        logger.warning("Skill %s di %s: chiave occupata da un altro utente", body["skill"], body["user"])
+        return {
+            "statusCode": 409,
+            "body": json.dumps({"message": "Skill key belongs to another user"})
+        }
+    # le letture in cache delle skill dell'utente non sono più valide
+    skill_cache.invalidate([skill["user"]])
+    if metrics.verbose():
+        logger.info("Canonicalizzazione skill: %s", skill_names.stats())
+
+    with metrics.span("Serialize"):
+        body = json.dumps({"message": "Skill added", "skill": skills_repository.public(skill)}, default=str) # fa il contrario della loads dizionario python => json string
     return {
         "statusCode": 200,
-        "body": json.dumps({"message": "Skill added", "skill": skill}) # fa il contrario della loads dizionario python => json string
+        "body": body
     }
 
 
+metrics.init_done()
+
+
     
\ No newline at end of file
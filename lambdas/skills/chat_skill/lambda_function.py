@@ -1,21 +1,24 @@
 import json
 import os
-import uuid
+import time
 from datetime import datetime
 import logging
 
-import boto3
+import metrics  # dal layer skills_common (prima delle librerie pesanti: misura l'init)
+import profiling
+import numpy as np
 from botocore.exceptions import ClientError
-from google import genai  # assicurati di avere google-genai in requirements
+
+import gemini_http
+import skill_cache
+import skill_embeddings
+import skill_names
+import skill_taxonomy
+import skills_repository
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Configurazione DynamoDB
-TABLE_NAME = os.getenv("DYNAMODB_TABLE", "skillbuilder-skills")
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-
 # Configurazione Gemini
 API_KEY = os.getenv("GOOGLE_API_KEY")
 if not API_KEY:
@@ -23,7 +26,11 @@ if not API_KEY:
     # Falla subito se vuoi, oppure continua ma senza AI
     # raise RuntimeError("GOOGLE_API_KEY mancante")
 try:
-    gemini_client = genai.Client(api_key=API_KEY)
+    # Pool httpx con keep-alive, condiviso dalle invocazioni warm del container
+    gemini_client, gemini_transport = gemini_http.build_client(API_KEY)
+    # DNS + TCP + TLS durante l'init, non nel tempo del primo handler
+    warm_up = gemini_http.warm_up(gemini_client)
+    logger.info("Warm-up connessione Gemini: %s", warm_up)
 except Exception as e:
     logger.error("Errore inizializzazione Gemini client: %s", str(e))
     gemini_client = None
@@ -31,6 +38,92 @@ except Exception as e:
 # Modello gemini
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+# Tassonomia di riferimento (scripts/build_skill_taxonomy.py), mappata in memoria una volta per container
+TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.bin")
+)
+TAXONOMY_THRESHOLD = float(os.getenv("TAXONOMY_SIMILARITY_THRESHOLD", "0.9"))
+taxonomy = skill_taxonomy.open_taxonomy(TAXONOMY_PATH)
+if taxonomy is not None and (
+    taxonomy.model != skill_embeddings.EMBEDDING_MODEL
+    or taxonomy.matrix.shape[1] != skill_embeddings.EMBEDDING_DIM
+):
+    logger.warning("Tassonomia %s generata con un altro modello/dimensione: disattivata", TAXONOMY_PATH)
+    taxonomy = None
+
+
+def dedupe_semantico(user, skill_list):
+    """
+    Confronta le skill estratte con quelle che l'utente ha già, per significato:
+    "apprendimento automatico" viene unita a "Machine Learning" se la similarità
+    coseno supera SIMILARITY_THRESHOLD.
+    Ritorna una lista di (nome da salvare, attributi extra) con l'embedding per le
+    skill davvero nuove, così ogni skill viene embeddata una volta sola.
+    """
+    existing = skills_repository.query_user_skills(
+        user, projection=["Skill_UID", "skill", "embedding", "embedding_model"]
+    )
+    existing_keys = {skill_names.normalize(item["skill"]) for item in existing}
+    existing_by_id = {item["Skill_UID"]: item["skill"] for item in existing}
+    # le skill già presenti per nome non servono embedding: l'upsert le aggiorna
+    new_names = [name for name in skill_list if skill_names.normalize(name) not in existing_keys]
+    if not new_names:
+        return [(name, {}) for name in skill_list]
+
+    # Skill esistenti senza vettore: al massimo BACKFILL_LIMIT per richiesta, le altre
+    # non partecipano al confronto finché non hanno il loro (richieste successive o migrazione)
+    vectors, to_cache, pending = skill_embeddings.missing_vectors(existing)
+    if pending:
+        logger.info("Skill di %s ancora senza embedding: %d", user, pending)
+        metrics.add("EmbeddingBackfillPending", pending)
+
+    # Skill nuove + skill da mettere in cache insieme (embed_texts divide in blocchi da 100)
+    matrix = skill_embeddings.embed_texts(gemini_client, new_names + [item["skill"] for item in to_cache])
+    new_vectors = matrix[:len(new_names)]
+    backfilled = dict(zip((item["Skill_UID"] for item in to_cache), matrix[len(new_names):]))
+    vectors.update(backfilled)
+    skills_repository.set_attributes_many({
+        skill_id: skill_embeddings.vector_attributes(vector) for skill_id, vector in backfilled.items()
+    })
+
+    merged = {}
+    if vectors:
+        existing_ids = list(vectors)
+        existing_matrix = np.vstack([vectors[skill_id] for skill_id in existing_ids])
+        best, similarity = skill_embeddings.best_matches(new_vectors, existing_matrix)
+        for name, index, score in zip(new_names, best, similarity):
+            if score >= skill_embeddings.SIMILARITY_THRESHOLD:
+                target = existing_by_id[existing_ids[index]]
+                logger.info("Skill '%s' unita a '%s' (similarità %.3f)", name, target, score)
+                merged[name] = target
+
+    new_by_name = dict(zip(new_names, new_vectors))
+
+    # Le skill davvero nuove prendono il nome della voce di tassonomia più vicina
+    remaining = [name for name in new_names if name not in merged]
+    if taxonomy is not None and remaining:
+        best, similarity = taxonomy.nearest(np.vstack([new_by_name[name] for name in remaining]))
+        for name, index, score in zip(remaining, best, similarity):
+            if score >= TAXONOMY_THRESHOLD:
+                canonical = taxonomy.name(index)
+                logger.info("Skill '%s' ricondotta a '%s' della tassonomia (%.3f)", name, canonical, score)
+                merged[name] = canonical
+                if skill_names.normalize(canonical) not in existing_keys:
+                    new_by_name[canonical] = taxonomy.vector(index)
+
+    result = []
+    for name in skill_list:
+        target = merged.get(name, name)
+        if target in new_by_name:
+            result.append((target, skill_embeddings.vector_attributes(new_by_name[target])))
+        else:
+            result.append((target, {}))
+    return result
+
+
+@metrics.instrumented("chat_skill")
+@profiling.profiled("chat_skill")
 def lambda_handler(event, context):
     """
     Handler per 'chat skill': riceve { "user": "...", "message": "..." }
@@ -38,12 +131,16 @@ def lambda_handler(event, context):
       - statusCode 200 con JSON { added: [...], message: "...", aiRaw: {...} }
       - statusCode 400/500 in caso di errori.
     """
-    logger.info("chat_skill invoked, event: %s", event)
+    # L'evento completo (e la risposta grezza dell'AI) solo per le invocazioni campionate:
+    # serializzarli a ogni richiesta costa tempo e byte di CloudWatch
+    if metrics.verbose():
+        logger.info("chat_skill invoked, event: %s", event)
 
     # Estraggo body JSON
     body_str = event.get("body", "{}")
     try:
-        body = json.loads(body_str)
+        with metrics.span("Parse"):
+            body = json.loads(body_str)
     except json.JSONDecodeError:
         return {
             "statusCode": 400,
@@ -80,16 +177,33 @@ def lambda_handler(event, context):
         logger.warning("gemini_client non inizializzato, salto analisi AI.")
     else:
         try:
-            response = gemini_client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt,
-                # eventualmente config: temperature, max_tokens, ecc.
-                temperature=0.3,
-                max_tokens=200
+            # generate_content_raw: stessa richiesta di generate_content ma la risposta resta
+            # il dict JSON (niente modelli pydantic), a noi servono solo text e usage_metadata
+            ai_start = time.perf_counter()
+            with metrics.span("Gemini"):
+                response = gemini_client.models.generate_content_raw(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config={
+                        "temperature": 0.3,
+                        "max_output_tokens": 200,
+                        # senza thinking: i token di ragionamento consumerebbero max_output_tokens
+                        "thinking_config": {"thinking_budget": 0}
+                    }
+                )
+            ai_ms = (time.perf_counter() - ai_start) * 1000
+            connection = gemini_transport.last
+            setup_ms = connection.get("connect_ms", 0.0) + connection.get("tls_ms", 0.0)
+            metrics.add_span("GeminiConnect", int(setup_ms * 1e6))
+            metrics.record_gemini_usage(response.usage_metadata)
+            logger.info(
+                "Gemini: totale %.1f ms, setup connessione %.1f ms (riusata=%s), modello %.1f ms",
+                ai_ms, setup_ms, connection.get("reused"), ai_ms - setup_ms
             )
-            ai_text = response.text.strip()
+            ai_text = (response.text or "").strip()
             ai_raw = ai_text
-            logger.info("Risposta AI raw: %s", ai_text)
+            if metrics.verbose():
+                logger.info("Risposta AI raw: %s", ai_text)
             # Provo a fare il parse JSON
             try:
                 # Se l'AI aggiunge backticks o testo, potresti dover isolare il JSON: 
@@ -124,35 +238,74 @@ def lambda_handler(event, context):
     if action == "learn_skill":
         skills = extracted.get("skills")
         if isinstance(skills, list):
+            skill_list = []
+            seen = set()
             for skill_name in skills:
                 # Filtro skill_name: deve essere stringa non vuota
                 if isinstance(skill_name, str) and skill_name.strip():
-                    skill_clean = skill_name.strip()
-                    # Costruisco item DynamoDB
-                    skill_id = str(uuid.uuid4())
-                    # Salvo data ISO o dd/mm/yyyy, come preferisci. Qui uso ISO
-                    acquired_on = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-                    item = {
-                        "Skill_UID": skill_id,
-                        "user": user,
+                    # Nome canonico: "Python", "python3" e "Py" diventano la stessa skill
+                    skill_clean = skill_names.canonicalize(skill_name)
+                    # stessa chiave dell'upsert: "Foo" e "foo" fuori dizionario sono una skill sola
+                    key = skill_names.normalize(skill_clean)
+                    if key not in seen:
+                        seen.add(key)
+                        skill_list.append(skill_clean)
+
+            to_save = [(name, {}) for name in skill_list]
+            if skill_list and gemini_client is not None:
+                try:
+                    with metrics.span("Dedupe"):
+                        to_save = dedupe_semantico(user, skill_list)
+                except Exception as e:
+                    # Il dedupe è un'ottimizzazione: se fallisce salvo comunque le skill
+                    logger.warning("Dedupe semantico non riuscito: %s", str(e))
+                    metrics.add("DedupeFailures", 1)
+
+            # La risposta grezza si salva una volta per richiesta (compressa, con TTL):
+            # sulle skill resta solo il suo id
+            ai_response_id = None
+            if to_save and ai_raw:
+                try:
+                    ai_response_id = skills_repository.put_ai_response(
+                        user, ai_raw, getattr(context, "aws_request_id", None)
+                    )
+                except ClientError as e:
+                    logger.warning("Salvataggio risposta AI non riuscito: %s", e.response["Error"]["Message"])
+
+            saved = set()
+            for skill_clean, extra in to_save:
+                if skill_names.normalize(skill_clean) in saved:
+                    continue  # due skill estratte unite alla stessa skill esistente
+                saved.add(skill_names.normalize(skill_clean))
+                # Salvo data ISO o dd/mm/yyyy, come preferisci. Qui uso ISO
+                acquired_on = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+                try:
+                    # Upsert: se l'utente aveva già la skill sale di livello e di menzioni
+                    attributes = dict(extra, source="chat", status="done")
+                    if ai_response_id:
+                        # riferimento alla raw response (per debug)
+                        attributes["aiResponseId"] = ai_response_id
+                    item = skills_repository.upsert_skill(
+                        user=user,
+                        skill=skill_clean,
+                        acquired_on=acquired_on,
+                        attributes=attributes
+                    )
+                    added.append({
+                        "Skill_UID": item["Skill_UID"],
                         "skill": skill_clean,
-                        "level": 1,  # default, o potresti chiedere all'AI di stimare un livello?
-                        "acquired_on": acquired_on,
-                        "source": "chat",
-                        "status": "done",
-                        # salvo raw response per debug
-                        "aiResponseRaw": ai_raw
-                    }
-                    try:
-                        table.put_item(Item=item)
-                        added.append({
-                            "Skill_UID": skill_id,
-                            "skill": skill_clean,
-                            "acquired_on": acquired_on
-                        })
-                    except ClientError as e:
-                        logger.error("Errore put_item chat_skill su skill %s: %s", skill_clean, e.response["Error"]["Message"])
-                        # Non interrompo il loop: continuo con le altre skill
+                        "acquired_on": item["acquired_on"],
+                        "level": int(item["level"]),
+                        "mentions": int(item["mentions"])
+                    })
+                except ClientError as e:
+                    logger.error("Errore upsert chat_skill su skill %s: %s", skill_clean, e.response["Error"]["Message"])
+                    # Non interrompo il loop: continuo con le altre skill
+            if added:
+                # le letture in cache delle skill dell'utente non sono più valide
+                skill_cache.invalidate([user])
+            if metrics.verbose():
+                logger.info("Canonicalizzazione skill: %s", skill_names.stats())
         else:
             logger.warning("Campo 'skills' non lista: %s", skills)
     else:
@@ -169,8 +322,14 @@ def lambda_handler(event, context):
         resp_body["message"] = f"Aggiunte {len(added)} skill al diario."
     else:
         resp_body["message"] = "Non ho individuato nuove skill da salvare."
+    metrics.add("SkillsAdded", len(added))
     # Rimuovi aiRaw dalla response se non vuoi esporlo al client
+    with metrics.span("Serialize"):
+        resp_body = json.dumps(resp_body)
     return {
         "statusCode": 200,
-        "body": json.dumps(resp_body)
+        "body": resp_body
     }
+
+
+metrics.init_done()
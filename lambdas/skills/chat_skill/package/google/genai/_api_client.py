@@ -44,7 +44,6 @@ import certifi
 import google.auth
 import google.auth.credentials
 from google.auth.credentials import Credentials
-from google.auth.transport.requests import Request
 import httpx
 from pydantic import BaseModel
 from pydantic import Field
@@ -194,6 +193,12 @@ def _load_auth(*, project: Union[str, None]) -> Tuple[Credentials, str]:
 
 
 def _refresh_auth(credentials: Credentials) -> Credentials:
+  # Local patch: `google.auth.transport.requests` (and with it requests,
+  # urllib3 and charset_normalizer) is imported only when Vertex credentials
+  # are refreshed, not when `google.genai` is imported. API-key clients never
+  # reach this function.
+  from google.auth.transport.requests import Request
+
   credentials.refresh(Request())  # type: ignore[no-untyped-call]
   return credentials
 
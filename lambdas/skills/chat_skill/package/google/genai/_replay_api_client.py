@@ -27,7 +27,6 @@ import re
 from typing import Any, Literal, Optional, Union
 
 import google.auth
-from requests.exceptions import HTTPError
 
 from . import errors
 from ._api_client import BaseApiClient
@@ -548,6 +547,10 @@ class ReplayApiClient(BaseApiClient):
           method='POST', url='', data={'file_path': file_path}, headers={}
       )
     if self._should_call_api():
+      # Local patch: requests is imported only when the replay client records
+      # real calls, so replaying does not need it (here and below).
+      from requests.exceptions import HTTPError
+
       result: Union[str, HttpResponse]
       try:
         result = super().upload_file(
@@ -587,6 +590,8 @@ class ReplayApiClient(BaseApiClient):
           method='POST', url='', data={'file_path': file_path}, headers={}
       )
     if self._should_call_api():
+      from requests.exceptions import HTTPError
+
       result: HttpResponse
       try:
         result = await super().async_upload_file(
@@ -611,6 +616,8 @@ class ReplayApiClient(BaseApiClient):
         'get', path=path, request_dict={}, http_options=http_options
     )
     if self._should_call_api():
+      from requests.exceptions import HTTPError
+
       try:
         result = super().download_file(path, http_options=http_options)
       except HTTPError as e:
@@ -632,6 +639,8 @@ class ReplayApiClient(BaseApiClient):
         'get', path=path, request_dict={}, http_options=http_options
     )
     if self._should_call_api():
+      from requests.exceptions import HTTPError
+
       try:
         result = await super().async_download_file(
             path, http_options=http_options
@@ -13,77 +13,124 @@
 # limitations under the License.
 #
 
+import importlib
 import os
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
 import google.auth
 import pydantic
 
 from ._api_client import BaseApiClient
 from ._base_url import get_base_url
-from ._replay_api_client import ReplayApiClient
-from .batches import AsyncBatches, Batches
-from .caches import AsyncCaches, Caches
-from .chats import AsyncChats, Chats
-from .files import AsyncFiles, Files
-from .live import AsyncLive
 from .models import AsyncModels, Models
-from .operations import AsyncOperations, Operations
-from .tokens import AsyncTokens, Tokens
-from .tunings import AsyncTunings, Tunings
 from .types import HttpOptions, HttpOptionsDict, HttpRetryOptions
 
+if TYPE_CHECKING:
+  from ._replay_api_client import ReplayApiClient
+  from .batches import AsyncBatches, Batches
+  from .caches import AsyncCaches, Caches
+  from .chats import AsyncChats, Chats
+  from .files import AsyncFiles, Files
+  from .live import AsyncLive
+  from .operations import AsyncOperations, Operations
+  from .tokens import AsyncTokens, Tokens
+  from .tunings import AsyncTunings, Tunings
+
+
+# Local patch: the sub-API modules below (and websockets, pulled in by `live`)
+# are imported on first use instead of when `google.genai` is imported. Only
+# `models` stays eager, since it is the module every caller needs. The names
+# are still reachable as attributes of this module through `__getattr__`.
+_LAZY_ATTRIBUTES = {
+    'ReplayApiClient': '._replay_api_client',
+    'AsyncBatches': '.batches',
+    'Batches': '.batches',
+    'AsyncCaches': '.caches',
+    'Caches': '.caches',
+    'AsyncChats': '.chats',
+    'Chats': '.chats',
+    'AsyncFiles': '.files',
+    'Files': '.files',
+    'AsyncLive': '.live',
+    'AsyncOperations': '.operations',
+    'Operations': '.operations',
+    'AsyncTokens': '.tokens',
+    'Tokens': '.tokens',
+    'AsyncTunings': '.tunings',
+    'Tunings': '.tunings',
+}
+
+
+def _load(name: str) -> Any:
+  value = getattr(
+      importlib.import_module(_LAZY_ATTRIBUTES[name], __package__), name
+  )
+  globals()[name] = value
+  return value
+
+
+def __getattr__(name: str) -> Any:
+  if name in _LAZY_ATTRIBUTES:
+    return _load(name)
+  raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+class _LazyModules:
+  """Builds each sub-API on first access and caches it on the instance."""
+
+  _api_client: BaseApiClient
+
+  def _lazy_module(self, attribute: str, class_name: str) -> Any:
+    module = self.__dict__.get(attribute)
+    if module is None:
+      module = _load(class_name)(self._api_client)
+      setattr(self, attribute, module)
+    return module
+
 
-class AsyncClient:
+class AsyncClient(_LazyModules):
   """Client for making asynchronous (non-blocking) requests."""
 
   def __init__(self, api_client: BaseApiClient):
 
     self._api_client = api_client
     self._models = AsyncModels(self._api_client)
-    self._tunings = AsyncTunings(self._api_client)
-    self._caches = AsyncCaches(self._api_client)
-    self._batches = AsyncBatches(self._api_client)
-    self._files = AsyncFiles(self._api_client)
-    self._live = AsyncLive(self._api_client)
-    self._tokens = AsyncTokens(self._api_client)
-    self._operations = AsyncOperations(self._api_client)
 
   @property
   def models(self) -> AsyncModels:
     return self._models
 
   @property
-  def tunings(self) -> AsyncTunings:
-    return self._tunings
+  def tunings(self) -> 'AsyncTunings':
+    return self._lazy_module('_tunings', 'AsyncTunings')
 
   @property
-  def caches(self) -> AsyncCaches:
-    return self._caches
+  def caches(self) -> 'AsyncCaches':
+    return self._lazy_module('_caches', 'AsyncCaches')
 
   @property
-  def batches(self) -> AsyncBatches:
-    return self._batches
+  def batches(self) -> 'AsyncBatches':
+    return self._lazy_module('_batches', 'AsyncBatches')
 
   @property
-  def chats(self) -> AsyncChats:
-    return AsyncChats(modules=self.models)
+  def chats(self) -> 'AsyncChats':
+    return _load('AsyncChats')(modules=self.models)
 
   @property
-  def files(self) -> AsyncFiles:
-    return self._files
+  def files(self) -> 'AsyncFiles':
+    return self._lazy_module('_files', 'AsyncFiles')
 
   @property
-  def live(self) -> AsyncLive:
-    return self._live
+  def live(self) -> 'AsyncLive':
+    return self._lazy_module('_live', 'AsyncLive')
 
   @property
-  def auth_tokens(self) -> AsyncTokens:
-    return self._tokens
+  def auth_tokens(self) -> 'AsyncTokens':
+    return self._lazy_module('_tokens', 'AsyncTokens')
 
   @property
-  def operations(self) -> AsyncOperations:
-    return self._operations
+  def operations(self) -> 'AsyncOperations':
+    return self._lazy_module('_operations', 'AsyncOperations')
 
 
 class DebugConfig(pydantic.BaseModel):
@@ -102,7 +149,7 @@ class DebugConfig(pydantic.BaseModel):
   )
 
 
-class Client:
+class Client(_LazyModules):
   """Client for making synchronous requests.
 
   Use this client to make a request to the Gemini Developer API or Vertex AI
@@ -226,14 +273,7 @@ class Client:
         http_options=http_options,
     )
 
-    self._aio = AsyncClient(self._api_client)
     self._models = Models(self._api_client)
-    self._tunings = Tunings(self._api_client)
-    self._caches = Caches(self._api_client)
-    self._batches = Batches(self._api_client)
-    self._files = Files(self._api_client)
-    self._tokens = Tokens(self._api_client)
-    self._operations = Operations(self._api_client)
 
   @staticmethod
   def _get_api_client(
@@ -250,7 +290,7 @@ class Client:
         'replay',
         'auto',
     ]:
-      return ReplayApiClient(
+      return _load('ReplayApiClient')(
           mode=debug_config.client_mode,  # type: ignore[arg-type]
           replay_id=debug_config.replay_id,  # type: ignore[arg-type]
           replays_directory=debug_config.replays_directory,
@@ -272,40 +312,43 @@ class Client:
     )
 
   @property
-  def chats(self) -> Chats:
-    return Chats(modules=self.models)
+  def chats(self) -> 'Chats':
+    return _load('Chats')(modules=self.models)
 
   @property
   def aio(self) -> AsyncClient:
-    return self._aio
+    aio = self.__dict__.get('_aio')
+    if aio is None:
+      aio = self._aio = AsyncClient(self._api_client)
+    return aio
 
   @property
   def models(self) -> Models:
     return self._models
 
   @property
-  def tunings(self) -> Tunings:
-    return self._tunings
+  def tunings(self) -> 'Tunings':
+    return self._lazy_module('_tunings', 'Tunings')
 
   @property
-  def caches(self) -> Caches:
-    return self._caches
+  def caches(self) -> 'Caches':
+    return self._lazy_module('_caches', 'Caches')
 
   @property
-  def batches(self) -> Batches:
-    return self._batches
+  def batches(self) -> 'Batches':
+    return self._lazy_module('_batches', 'Batches')
 
   @property
-  def files(self) -> Files:
-    return self._files
+  def files(self) -> 'Files':
+    return self._lazy_module('_files', 'Files')
 
   @property
-  def auth_tokens(self) -> Tokens:
-    return self._tokens
+  def auth_tokens(self) -> 'Tokens':
+    return self._lazy_module('_tokens', 'Tokens')
 
   @property
-  def operations(self) -> Operations:
-    return self._operations
+  def operations(self) -> 'Operations':
+    return self._lazy_module('_operations', 'Operations')
 
   @property
   def vertexai(self) -> bool:
@@ -4726,15 +4726,63 @@ def _GenerateVideosOperation_from_vertex(
   return to_object
 
 
+class RawGenerateContentResponse:
+  """Thin view over the JSON body of a generateContent response.
+
+  Returned by `Models.generate_content_raw`. `raw` is the parsed wire JSON
+  (camelCase keys, as sent by the API); `text` follows the same rules as
+  `GenerateContentResponse.text` (first candidate, thought parts skipped).
+  """
+
+  __slots__ = ('raw',)
+
+  def __init__(self, raw: dict[str, Any]):
+    self.raw = raw
+
+  @property
+  def candidates(self) -> Optional[list[dict[str, Any]]]:
+    return self.raw.get('candidates')
+
+  @property
+  def text(self) -> Optional[str]:
+    candidates = self.raw.get('candidates')
+    if not candidates:
+      return None
+    parts = (candidates[0].get('content') or {}).get('parts')
+    if not parts:
+      return None
+    texts = [
+        part['text']
+        for part in parts
+        if isinstance(part.get('text'), str) and not part.get('thought')
+    ]
+    # part.text == '' is different from part.text is None
+    return ''.join(texts) if texts else None
+
+  @property
+  def usage_metadata(self) -> Optional[dict[str, Any]]:
+    """Token counts as sent by the API, e.g. `promptTokenCount`."""
+    return self.raw.get('usageMetadata')
+
+  @property
+  def model_version(self) -> Optional[str]:
+    return self.raw.get('modelVersion')
+
+
 class Models(_api_module.BaseModule):
 
-  def _generate_content(
+  def _generate_content_request(
       self,
       *,
       model: str,
       contents: Union[types.ContentListUnion, types.ContentListUnionDict],
       config: Optional[types.GenerateContentConfigOrDict] = None,
-  ) -> types.GenerateContentResponse:
+  ) -> tuple[
+      types._GenerateContentParameters,
+      str,
+      dict[str, Any],
+      Optional[types.HttpOptions],
+  ]:
     parameter_model = types._GenerateContentParameters(
         model=model,
         contents=contents,
@@ -4776,6 +4824,20 @@ class Models(_api_module.BaseModule):
 
     request_dict = _common.convert_to_dict(request_dict)
     request_dict = _common.encode_unserializable_types(request_dict)
+    return parameter_model, path, request_dict, http_options
+
+  def _generate_content(
+      self,
+      *,
+      model: str,
+      contents: Union[types.ContentListUnion, types.ContentListUnionDict],
+      config: Optional[types.GenerateContentConfigOrDict] = None,
+  ) -> types.GenerateContentResponse:
+    parameter_model, path, request_dict, http_options = (
+        self._generate_content_request(
+            model=model, contents=contents, config=config
+        )
+    )
 
     response = self._api_client.request(
         'post', path, request_dict, http_options
@@ -4795,6 +4857,40 @@ class Models(_api_module.BaseModule):
     self._api_client._verify_response(return_value)
     return return_value
 
+  def generate_content_raw(
+      self,
+      *,
+      model: str,
+      contents: Union[types.ContentListUnion, types.ContentListUnionDict],
+      config: Optional[types.GenerateContentConfigOrDict] = None,
+  ) -> RawGenerateContentResponse:
+    """Local patch: generate_content without building the response model.
+
+    The request is built exactly as in `generate_content`, but the response
+    body is only parsed with `json.loads` and wrapped in a
+    `RawGenerateContentResponse`: no `_GenerateContentResponse_from_*`
+    conversion and no pydantic validation. Automatic function calling is not
+    supported on this path.
+
+    Usage:
+
+    .. code-block:: python
+
+      response = client.models.generate_content_raw(
+          model='gemini-2.0-flash', contents='Hello'
+      )
+      print(response.text, response.usage_metadata)
+    """
+    _, path, request_dict, http_options = self._generate_content_request(
+        model=model, contents=contents, config=config
+    )
+    response = self._api_client.request(
+        'post', path, request_dict, http_options
+    )
+    return RawGenerateContentResponse(
+        json.loads(response.body) if response.body else {}
+    )
+
   def _generate_content_stream(
       self,
       *,
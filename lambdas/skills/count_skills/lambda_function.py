@@ -0,0 +1,55 @@
+import json
+import logging
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_cache
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@metrics.instrumented("count_skills")
+@profiling.profiled("count_skills")
+def lambda_handler(event, context):
+    """
+    GET /skills/count?user=...&from=...&to=...
+    Ritorna: { user, from, to, count }
+    Il conteggio è esatto (Query o Scan con Select=COUNT): nessun item viene
+    trasferito né serializzato, la risposta resta di poche decine di byte.
+    ?from=&to= (date o ISO, estremi inclusi, solo con user) contano le skill
+    acquisite nell'intervallo, come in get_skills.
+    """
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    acquired_from = skills_repository.date_bound(params["from"], end=False) if params.get("from") else None
+    acquired_to = skills_repository.date_bound(params["to"], end=True) if params.get("to") else None
+    if (params.get("from") and not acquired_from) or (params.get("to") and not acquired_to):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Invalid 'from' or 'to' date"})
+        }
+    if (acquired_from or acquired_to) and not user:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "'from' and 'to' require 'user'"})
+        }
+    logger.info("Counting skills: user=%s from=%s to=%s", user, acquired_from, acquired_to)
+
+    def load():
+        if user:
+            return skills_repository.count_user_skills(user, acquired_from, acquired_to), user
+        # senza user lo scan COUNT legge comunque tutta la tabella
+        return skills_repository.count_skills(), None
+
+    # in cache finché nessuno scrive sulle skill dell'utente (o, senza user, sulla tabella)
+    scope = user or skills_repository.ALL_USERS
+    count = skill_cache.read_through(f"count|{user}|{acquired_from}|{acquired_to}", load, scope)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"user": user, "from": acquired_from, "to": acquired_to, "count": count})
+    }
+
+
+metrics.init_done()
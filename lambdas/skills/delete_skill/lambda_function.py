@@ -1,24 +1,24 @@
 import json
-import boto3
 import logging
 
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_cache
+import skills_repository
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-TABLE_NAME = "skillbuilder-skills"
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-
+@metrics.instrumented("delete_skill")
+@profiling.profiled("delete_skill")
 def lambda_handler(event, context):
     skill_id = event["pathParameters"]["id"]
     logger.info(f"Deleting skill with ID: {skill_id}")
 
-    response = table.delete_item(
-        Key={"Skill_UID": skill_id},
-        ReturnValues="ALL_OLD"
-    )
+    deleted = skills_repository.delete_skill(skill_id)
 
-    if "Attributes" in response:
+    if deleted:
+        skill_cache.invalidate([deleted.get("user")])
         return {
             "statusCode": 200,
             "body": json.dumps({"message": "Skill deleted"})
@@ -28,3 +28,6 @@ def lambda_handler(event, context):
             "statusCode": 404,
             "body": json.dumps({"message": "Skill not found"})
         }
+
+
+metrics.init_done()
@@ -1,30 +1,55 @@
 import json
-import boto3
 import logging
 
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import dynamo_codec
+import skill_cache
+import skills_repository  # dal layer skills_common
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-TABLE_NAME = "skillbuilder-skills"
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-
+@metrics.instrumented("get_skill_by_id")
+@profiling.profiled("get_skill_by_id")
 def lambda_handler(event, context):
-    logger(event)
     skill_id = event["pathParameters"]["id"]
     logger.info(f"Fetching skill with ID: {skill_id}")
 
-    response = table.get_item(Key={"Skill_UID": skill_id})
-    item = response.get("Item")
-
-    if item:
+    key = f"skill#{skill_id}"
+    # la voce e l'ETag valgono finché non cambiano le skill del proprietario
+    # (ALL_USERS, che cambia a ogni scrittura, finché la skill non è mai stata letta)
+    scope = skill_cache.owner_scope(key)
+    etag = skill_cache.not_modified(event, key, scope)
+    if etag:
         return {
+            "statusCode": 304,
+            "headers": {"ETag": etag, "Cache-Control": "no-cache"},
+            "body": ""
+        }
+
+    def load():
+        item = skills_repository.get_skill_raw(skill_id)
+        if not item:
+            return None, None
+        return dynamo_codec.dumps_item(item, exclude=skills_repository.EXCLUDED_ATTRIBUTES), item.get("user", {}).get("S")
+
+    body = skill_cache.read_through(key, load, scope)
+
+    if body is not None:
+        response = {
             "statusCode": 200,
-            "body": json.dumps(item, default=str)
+            "body": body
         }
+        etag = skill_cache.etag(key)
+        if etag:
+            response["headers"] = {"ETag": etag, "Cache-Control": "no-cache"}
+        return response
     else:
         return {
             "statusCode": 404,
             "body": json.dumps({"message": "Skill not found"})
         }
 
+
+metrics.init_done()
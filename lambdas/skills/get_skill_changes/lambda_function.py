@@ -0,0 +1,108 @@
+import base64
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import dynamo_codec
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+# Il GSI è eventualmente consistente: a fine sync il cursore resta indietro di
+# questi secondi, le scritture appena fatte tornano alla sync successiva
+CHANGES_LAG_SECONDS = float(os.getenv("CHANGES_LAG_SECONDS", "5"))
+
+
+def _timestamp(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def encode_cursor(updated_at, skill_id=""):
+    return base64.urlsafe_b64encode(f"{updated_at}|{skill_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    updated_at, _, skill_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").partition("|")
+    datetime.strptime(updated_at, "%Y-%m-%dT%H:%M:%S.%fZ")  # ValueError se non è un nostro cursore
+    return updated_at, skill_id
+
+
+@metrics.instrumented("get_skill_changes")
+@profiling.profiled("get_skill_changes")
+def lambda_handler(event, context):
+    """
+    GET /skills/changes?user=...&since=<cursore>&limit=500
+    Ritorna: { upserts: [skill], deletes: [{Skill_UID, deleted_at}], cursor, more, reset }
+    Senza since (o con un cursore più vecchio dei tombstone: reset=true) torna
+    tutte le skill dell'utente e il client deve sostituire la sua copia. Il
+    client applica prima deletes e poi upserts e, se more=true, richiama subito
+    con il nuovo cursor.
+    """
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    if not user:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Parametro 'user' obbligatorio"})
+        }
+    try:
+        limit = max(1, min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT))
+        since = decode_cursor(params["since"]) if params.get("since") else None
+    except (ValueError, UnicodeError):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Parametri 'since' o 'limit' non validi"})
+        }
+
+    now = datetime.now(timezone.utc)
+    reset = False
+    # tombstone scaduti: non si può sapere cosa è stato cancellato, si riparte da zero
+    if since is not None and since[0] < _timestamp(now - timedelta(days=skills_repository.TOMBSTONE_TTL_DAYS)):
+        since, reset = None, True
+    logger.info("Sync skill: user=%s since=%s limit=%d", user, since and since[0], limit)
+
+    upserts, more = skills_repository.query_changes_raw(user, since, limit)
+    deletes = []
+    if since is not None:
+        deletes, more_deletes = skills_repository.query_changes_raw(user, since, limit, tombstones=True)
+        more = more or more_deletes
+
+    # le due liste unite in ordine di (updated_at, Skill_UID), al massimo limit
+    changes = sorted(
+        [(item["updated_at"]["S"], item["Skill_UID"]["S"], False, item) for item in upserts]
+        + [(item["updated_at"]["S"], item["Skill_UID"]["S"], True, item) for item in deletes]
+    , key=lambda change: change[:2])
+    if len(changes) > limit:
+        changes, more = changes[:limit], True
+
+    if more:
+        cursor = encode_cursor(changes[-1][0], changes[-1][1])
+    else:
+        lagged = _timestamp(now - timedelta(seconds=CHANGES_LAG_SECONDS))
+        cursor = encode_cursor(max(since[0], lagged) if since else lagged)
+
+    with metrics.span("Serialize"):
+        upserts = [item for _, _, deleted, item in changes if not deleted]
+        deletes = [{"Skill_UID": skill_id, "deleted_at": updated_at}
+                   for updated_at, skill_id, deleted, _ in changes if deleted]
+        body = (
+            '{"upserts":' + dynamo_codec.dumps_items(upserts, exclude=skills_repository.EXCLUDED_ATTRIBUTES)
+            + ',"deletes":' + json.dumps(deletes)
+            + ',"cursor":' + json.dumps(cursor)
+            + ',"more":' + json.dumps(more)
+            + ',"reset":' + json.dumps(reset) + "}"
+        )
+    metrics.add("Items", len(changes))
+    return {
+        "statusCode": 200,
+        "body": body
+    }
+
+
+metrics.init_done()
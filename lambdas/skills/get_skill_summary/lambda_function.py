@@ -0,0 +1,49 @@
+import json
+import logging
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_summary
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Attributi che servono a skill_summary.from_items
+SUMMARY_ATTRIBUTES = ["Skill_UID", "skill", "level", "acquired_on", "updated_at", "Skill_ULID"]
+
+
+@metrics.instrumented("get_skill_summary")
+@profiling.profiled("get_skill_summary")
+def lambda_handler(event, context):
+    """
+    GET /skills/summary?user=...
+    Ritorna: { user, total, average_level, levels: {"1": n, ...}, last_learned, activity, updated_at }
+    Il riepilogo è mantenuto dal consumer dello stream (skills_summary_stream) nella
+    tabella meta: la lettura è un solo GetItem. Per un utente che lo stream non ha
+    ancora visto (prima della ricostruzione) si calcola al volo, senza salvarlo:
+    un riepilogo salvato da qui si sommerebbe ai record dello stream già in coda.
+    """
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    if not user:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Parametro 'user' obbligatorio"})
+        }
+
+    summary = skills_repository.get_summary(user)
+    if summary is None:
+        logger.info("Nessun riepilogo per %s, calcolo dalle skill", user)
+        metrics.add("SummaryComputed", 1)
+        summary = skill_summary.from_items(skills_repository.query_user_skills(user, projection=SUMMARY_ATTRIBUTES))
+
+    with metrics.span("Serialize"):
+        body = json.dumps(skill_summary.to_response(user, summary))
+    return {
+        "statusCode": 200,
+        "body": body
+    }
+
+
+metrics.init_done()
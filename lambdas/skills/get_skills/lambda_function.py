@@ -1,30 +1,116 @@
-import json  # Modulo per serializzare/deserializzare oggetti JSON
-import boto3  # SDK AWS per interagire con servizi come DynamoDB
+import json
 import logging  # Modulo per logging
 
+import metrics  # Tempi e metriche EMF per invocazione (layer skills_common), importato per primo
+import profiling
+import dynamo_codec  # JSON della risposta direttamente dagli item DynamoDB (layer skills_common)
+import response_encoding  # Formato e compressione negoziati con il client (layer skills_common)
+import skill_cache  # Cache per container invalidata dalle scritture (layer skills_common)
+import skills_repository  # Accesso a DynamoDB condiviso (layer skills_common)
+
 # Configura il logger di default
 logger = logging.getLogger()  
 logger.setLevel(logging.INFO)  # Imposta il livello di log a INFO
 
-# Nome della tabella DynamoDB
-TABLE_NAME = "skillbuilder-skills"
+# Massimo di ?latest=
+MAX_LATEST = 100
 
-# Istanzia la risorsa DynamoDB usando le credenziali/config AWS già presenti
-dynamodb = boto3.resource("dynamodb")
-# Ottiene l’oggetto Table per operazioni su TABLE_NAME
-table = dynamodb.Table(TABLE_NAME)
 
+@metrics.instrumented("get_skills")
+@profiling.profiled("get_skills")
 def lambda_handler(event, context):
+    # ?user= limita alle skill dell'utente (GSI su user); con ?from=&to= (date o ISO, estremi
+    # inclusi) solo quelle acquisite nell'intervallo, con KeyConditionExpression sul GSI su acquired_on;
+    # con ?latest=N le ultime N create, dalla più recente (Query sul GSI su Skill_ULID)
+    params = event.get("queryStringParameters") or {}
+    user = params.get("user")
+    acquired_from = skills_repository.date_bound(params["from"], end=False) if params.get("from") else None
+    acquired_to = skills_repository.date_bound(params["to"], end=True) if params.get("to") else None
+    if (params.get("from") and not acquired_from) or (params.get("to") and not acquired_to):
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "Invalid 'from' or 'to' date"})
+        }
+    if (acquired_from or acquired_to) and not user:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"message": "'from' and 'to' require 'user'"})
+        }
+
+    latest = None
+    if params.get("latest"):
+        try:
+            latest = int(params["latest"])
+        except ValueError:
+            latest = 0
+        if not 1 <= latest <= MAX_LATEST:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"message": f"'latest' must be between 1 and {MAX_LATEST}"})
+            }
+        if not user or acquired_from or acquired_to:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"message": "'latest' requires 'user' and excludes 'from' and 'to'"})
+            }
+
     # Logga un messaggio informativo all’inizio della funzione
-    logger.info("Fetching all skills")
-
-    # Esegue una scansione completa della tabella per ottenere tutti gli item
-    response = table.scan()
-    # Estrae la lista di item (chiave "Items"); se mancante, usa lista vuota
-    skills = response.get("Items", [])
-
-    # Restituisce un oggetto HTTP-like con codice 200 e body JSON con i dati
-    return {
-        "statusCode": 200,
-        "body": json.dumps(skills, default=str)  # default=str per serializzare tipi non standard
-    }
+    logger.info("Fetching skills: user=%s from=%s to=%s latest=%s", user, acquired_from, acquired_to, latest)
+
+    # JSON o MessagePack (Accept), gzip o br (Accept-Encoding): una voce di cache e un ETag
+    # per ogni rappresentazione, così le richieste ripetute non ricomprimono
+    content_type, encoding = response_encoding.negotiate(event)
+    key = f"skills|{user}|{acquired_from}|{acquired_to}|{latest}|{content_type}|{encoding}"
+
+    # Con user la voce e l'ETag dipendono solo dalle scritture di quell'utente
+    scope = user or skills_repository.ALL_USERS
+
+    # Il client ha già la versione corrente: 304 senza scansione né serializzazione
+    etag = skill_cache.not_modified(event, key, scope)
+    if etag:
+        return {
+            "statusCode": 304,
+            "headers": {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"},
+            "body": ""
+        }
+
+    def load():
+        # Senza user esegue una scansione completa della tabella (tutte le pagine)
+        # Gli item restano nel formato DynamoDB: niente Decimal né oggetti intermedi
+        if latest:
+            skills = skills_repository.query_latest_skills_raw(user, latest)
+        elif user:
+            skills = skills_repository.query_user_skills_raw(user, acquired_from, acquired_to)
+        else:
+            skills = skills_repository.scan_skills_raw()
+
+        # Body con i dati (level e mentions come numeri; l'embedding non serve ai client)
+        with metrics.span("Serialize"):
+            if content_type == response_encoding.MSGPACK:
+                body = response_encoding.pack([
+                    dynamo_codec.item_to_python(item, exclude=skills_repository.EXCLUDED_ATTRIBUTES) for item in skills
+                ])
+            else:
+                body = dynamo_codec.dumps_items(skills, exclude=skills_repository.EXCLUDED_ATTRIBUTES)
+        # compresso solo sopra COMPRESSION_MIN_BYTES
+        with metrics.span("Compress"):
+            body, applied = response_encoding.encode(body, encoding)
+        metrics.add("Items", len(skills))
+        metrics.add("ResponseBytes", len(body))
+        # con user la voce in cache dipende solo dalle scritture di quell'utente
+        return (body, applied), user
+
+    # In cache resta il body già serializzato e compresso, valido finché nessuno scrive sulla tabella
+    # (o, con user, sulle skill dell'utente)
+    body, applied = skill_cache.read_through(key, load, scope)
+
+    # Restituisce un oggetto HTTP-like con codice 200 e i dati (base64 se binari)
+    # (con l'ETag il client può chiedere la lista solo se è cambiata)
+    headers = {}
+    etag = skill_cache.etag(key)
+    if etag:
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    return response_encoding.response(200, body, content_type, applied, headers)
+
+
+metrics.init_done()
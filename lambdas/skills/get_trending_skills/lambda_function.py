@@ -0,0 +1,64 @@
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_trending
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_K = 10
+MAX_K = 50
+MAX_WEEKS = 12
+
+
+@metrics.instrumented("get_trending_skills")
+@profiling.profiled("get_trending_skills")
+def lambda_handler(event, context):
+    """
+    GET /skills/trending?k=10&weeks=1
+    Ritorna: { weeks, total_mentions, skills: [{skill, mentions, users}], error }
+    Le skill più menzionate da tutti gli utenti nelle ultime weeks settimane ISO
+    (1 = quella in corso), dagli sketch mantenuti da skills_trending_stream:
+    due BatchGetItem (item principali, poi le loro parti) invece di uno scan. mentions e users sono stime, error
+    riporta i loro limiti (vedi skill_trending).
+    """
+    params = event.get("queryStringParameters") or {}
+    try:
+        k = int(params.get("k", DEFAULT_K))
+        weeks = int(params.get("weeks", 1))
+    except ValueError:
+        k = weeks = 0
+    if not 1 <= k <= MAX_K or not 1 <= weeks <= MAX_WEEKS:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": f"'k' deve essere tra 1 e {MAX_K}, 'weeks' tra 1 e {MAX_WEEKS}"})
+        }
+
+    now = datetime.now(timezone.utc)
+    names = [skill_trending.week(now - timedelta(weeks=i)) for i in range(weeks)]
+    logger.info("Classifica skill: k=%d settimane=%s", k, names)
+    heads = skills_repository.get_trending_buckets(names)
+    parts = skills_repository.get_trending_parts(
+        {name: skill_trending.Bucket.part_names(head) for name, head in heads.items()}
+    )
+
+    with metrics.span("Sketch"):
+        bucket = skill_trending.merged(skill_trending.Bucket.from_items(heads[name], parts[name])
+                                       for name in names if name in heads)
+        top = bucket.top(k)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "weeks": names,
+            "total_mentions": bucket.total,
+            "skills": top,
+            "error": bucket.error_bounds(),
+        })
+    }
+
+
+metrics.init_done()
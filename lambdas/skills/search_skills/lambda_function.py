@@ -0,0 +1,168 @@
+import json
+import os
+import time
+import logging
+
+import metrics  # dal layer skills_common (prima delle librerie pesanti: misura l'init)
+import profiling
+import numpy as np
+from cachetools import LRUCache
+import gemini_http
+import skill_embeddings
+import skills_repository
+import vector_index
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+try:
+    gemini_client, _ = gemini_http.build_client(os.getenv("GOOGLE_API_KEY"))
+    gemini_http.warm_up(gemini_client)
+except Exception as e:
+    logger.error("Errore inizializzazione Gemini client: %s", str(e))
+    gemini_client = None
+
+# Sopra questa soglia di skill si usa l'indice IVF invece della forza bruta
+IVF_MIN_ITEMS = int(os.getenv("IVF_MIN_ITEMS", "5000"))
+IVF_N_PROBE = int(os.getenv("IVF_N_PROBE", "4"))
+# L'indice di tutta la tabella (ricerca senza user) viene ricostruito dopo questo tempo
+INDEX_TTL_SECONDS = int(os.getenv("INDEX_TTL_SECONDS", "900"))
+# Indici per utente tenuti nel container (LRU): oltre questo numero si scarta il meno recente
+INDEX_CACHE_MAX_USERS = int(os.getenv("SEARCH_INDEX_CACHE_MAX_USERS", "64"))
+MAX_K = 50
+
+# Indici costruiti nel container: quello di tutta la tabella e quelli degli ultimi utenti cercati
+_table_index = None
+_user_indexes = LRUCache(maxsize=INDEX_CACHE_MAX_USERS)
+
+
+def carica_vettori_utente(user):
+    """
+    Skill dell'utente con vettore valido. Quelle senza embedding vengono embeddate
+    e salvate, al massimo skill_embeddings.BACKFILL_LIMIT per richiesta: le altre
+    (o tutte, se Gemini non risponde) restano fuori dai risultati finché non
+    vengono embeddate da una richiesta successiva o dalla migrazione.
+    """
+    items = skills_repository.query_user_skills(
+        user, projection=["Skill_UID", "skill", "level", "embedding", "embedding_model"]
+    )
+    _, to_cache, pending = skill_embeddings.missing_vectors(items)
+    if pending:
+        logger.info("Skill di %s ancora senza embedding: %d", user, pending)
+        metrics.add("EmbeddingBackfillPending", pending)
+    if to_cache:
+        try:
+            vectors = skill_embeddings.embed_texts(gemini_client, [item["skill"] for item in to_cache])
+        except Exception as e:
+            logger.error("Errore embedding delle skill di %s: %s", user, str(e))
+            metrics.add("EmbeddingBackfillFailures", 1)
+        else:
+            updates = {}
+            for item, vector in zip(to_cache, vectors):
+                updates[item["Skill_UID"]] = skill_embeddings.vector_attributes(vector)
+                item.update(updates[item["Skill_UID"]])
+            skills_repository.set_attributes_many(updates)
+    return [item for item in items if skill_embeddings.item_vector(item) is not None]
+
+
+def carica_vettori_tabella():
+    """Tutte le skill con embedding valido (ricerca su tutta l'organizzazione)."""
+    items = skills_repository.scan_skills(
+        projection=["Skill_UID", "user", "skill", "level", "embedding", "embedding_model"]
+    )
+    return [item for item in items if skill_embeddings.item_vector(item) is not None]
+
+
+def get_index(user):
+    """(items, matrix, indice IVF o None), riusando quello in cache se ancora valido."""
+    global _table_index
+    cached = _user_indexes.get(user) if user else _table_index
+    if user is None and cached and time.monotonic() - cached["built_at"] < INDEX_TTL_SECONDS:
+        return cached["items"], cached["matrix"], cached["ivf"]
+
+    items = carica_vettori_utente(user) if user else carica_vettori_tabella()
+    signature = tuple(sorted(item["Skill_UID"] for item in items))
+    if cached and cached["signature"] == signature:
+        return cached["items"], cached["matrix"], cached["ivf"]
+
+    if items:
+        matrix = np.vstack([skill_embeddings.item_vector(item) for item in items])
+    else:
+        matrix = np.empty((0, skill_embeddings.EMBEDDING_DIM), dtype=np.float32)
+    ivf = vector_index.IvfIndex(matrix) if len(items) >= IVF_MIN_ITEMS else None
+    entry = {"items": items, "matrix": matrix, "ivf": ivf,
+             "signature": signature, "built_at": time.monotonic()}
+    if user:
+        _user_indexes[user] = entry
+    else:
+        _table_index = entry
+    return items, matrix, ivf
+
+
+@metrics.instrumented("search_skills")
+@profiling.profiled("search_skills")
+def lambda_handler(event, context):
+    """
+    GET /skills/search?q=...&user=...&k=5
+    Senza user la ricerca è su tutte le skill della tabella (indice IVF in cache).
+    Ritorna: { query, hits: [{Skill_UID, skill, user, level, score}] }
+    502 { error, detail } se l'embedding della query fallisce.
+    """
+    params = event.get("queryStringParameters") or {}
+    query = (params.get("q") or "").strip()
+    user = params.get("user")
+    try:
+        k = max(1, min(int(params.get("k", 5)), MAX_K))
+    except ValueError:
+        k = 5
+
+    if not query:
+        return {
+            "statusCode": 400,
+            "body": json.dumps({"error": "Parametro 'q' obbligatorio"})
+        }
+    if gemini_client is None:
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": "Gemini client non inizializzato"})
+        }
+
+    logger.info("Ricerca skill: q=%s user=%s k=%d", query, user, k)
+
+    # La query viene embeddata una sola volta
+    try:
+        with metrics.span("Embed"):
+            query_vector = skill_embeddings.embed_texts(gemini_client, [query])[0]
+    except Exception as e:
+        logger.error("Errore embedding della query: %s", str(e))
+        return {
+            "statusCode": 502,
+            "body": json.dumps({"error": "Errore durante embedding della ricerca", "detail": str(e)})
+        }
+    with metrics.span("Index"):
+        items, matrix, ivf = get_index(user)
+    with metrics.span("Search"):
+        if ivf is not None:
+            indexes, scores = ivf.search(query_vector, k, n_probe=IVF_N_PROBE)
+        else:
+            indexes, scores = vector_index.top_k(query_vector, matrix, k)
+    metrics.add("Items", len(items))
+
+    hits = []
+    for index, score in zip(indexes, scores):
+        item = items[index]
+        hits.append({
+            "Skill_UID": item["Skill_UID"],
+            "skill": item["skill"],
+            "user": item.get("user", user),
+            "level": int(item.get("level", 1)),
+            "score": round(float(score), 4)
+        })
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"query": query, "hits": hits})
+    }
+
+
+metrics.init_done()
@@ -0,0 +1,131 @@
+"""
+Lambda unica "skills API": instrada le richieste API Gateway agli handler
+esistenti, così tutto il traffico CRUD condivide lo stesso pool di container
+warm invece di sei pool separati (get_skill_by_id e delete_skill partivano quasi
+sempre a freddo).
+
+La tabella delle route è compilata all'import:
+  - HTTP API (payload 2.0): lookup diretto su routeKey ("GET /skills/{id}");
+  - REST API (payload 1.0): lookup diretto su httpMethod + resource;
+  - route $default o proxy ({proxy+}): regex precompilate sul path, con i
+    parametri del path copiati in pathParameters.
+Ogni handler è il lambda_function.py della sua cartella, caricato da file la
+prima volta che serve. Le route CRUD vengono caricate già nell'init (importano
+solo il layer); chat e search importano google.genai e numpy solo quando
+arriva la prima richiesta su quelle route.
+
+Il bundle va costruito dalla cartella lambdas/skills (handler
+"skills_api/lambda_function.lambda_handler"), con le dipendenze di chat_skill
+in chat_skill/package come per la Lambda dedicata. Le route CRUD usano solo i
+layer (skills_common, con cachetools, e numpy): chat_skill/package entra nel
+sys.path solo con il primo handler che lo carica.
+"""
+import base64
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cartella che contiene le cartelle degli handler (una per route)
+HANDLERS_DIR = os.getenv(
+    "SKILLS_HANDLERS_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# (metodo, template del path, handler). Le route statiche vanno prima di quelle
+# con parametri: /skills/search non deve finire su /skills/{id}
+ROUTES = [
+    ("GET", "/skills", "get_skills"),
+    ("POST", "/skills", "add_skill"),
+    ("GET", "/skills/search", "search_skills"),
+    ("GET", "/skills/changes", "get_skill_changes"),
+    ("GET", "/skills/count", "count_skills"),
+    ("GET", "/skills/summary", "get_skill_summary"),
+    ("GET", "/skills/trending", "get_trending_skills"),
+    ("POST", "/skills/chat", "chat_skill"),
+    ("GET", "/skills/{id}", "get_skill_by_id"),
+    ("PUT", "/skills/{id}", "update_skill"),
+    ("DELETE", "/skills/{id}", "delete_skill"),
+]
+
+# Handler con import pesanti (google.genai, numpy): caricati solo alla prima richiesta
+LAZY_HANDLERS = {"chat_skill", "search_skills"}
+
+
+def _compile(template):
+    pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template)
+    return re.compile(f"^{pattern}/?$")
+
+
+_ROUTE_KEYS = {f"{method} {template}": name for method, template, name in ROUTES}
+_PATTERNS = [(method, _compile(template), name) for method, template, name in ROUTES]
+
+# Handler già caricati: nome -> funzione lambda_handler
+_handlers = {}
+
+
+def load_handler(name):
+    handler = _handlers.get(name)
+    if handler is None:
+        directory = os.path.join(HANDLERS_DIR, name)
+        # le dipendenze vendorizzate di chat_skill stanno nel suo package/
+        package_dir = os.path.join(directory, "package")
+        if os.path.isdir(package_dir) and package_dir not in sys.path:
+            sys.path.append(package_dir)
+        spec = importlib.util.spec_from_file_location(
+            f"{name}_lambda_function", os.path.join(directory, "lambda_function.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        handler = _handlers[name] = module.lambda_handler
+        logger.info("Handler %s caricato", name)
+    return handler
+
+
+def resolve(event):
+    """Ritorna (nome handler, pathParameters) o (None, status) se la route non esiste."""
+    route_key = event.get("routeKey")
+    if route_key and route_key in _ROUTE_KEYS:
+        return _ROUTE_KEYS[route_key], event.get("pathParameters")
+
+    method = event.get("httpMethod") or event.get("requestContext", {}).get("http", {}).get("method")
+    resource = event.get("resource")
+    if resource and f"{method} {resource}" in _ROUTE_KEYS:
+        return _ROUTE_KEYS[f"{method} {resource}"], event.get("pathParameters")
+
+    path = event.get("rawPath") or event.get("path") or ""
+    path_found = False
+    for route_method, pattern, name in _PATTERNS:
+        match = pattern.match(path)
+        if match:
+            if route_method == method:
+                return name, match.groupdict() or event.get("pathParameters")
+            path_found = True
+    return None, 405 if path_found else 404
+
+
+def lambda_handler(event, context):
+    name, params = resolve(event)
+    if name is None:
+        logger.info("Route non trovata: %s", event.get("routeKey") or event.get("path"))
+        message = "Method not allowed" if params == 405 else "Route not found"
+        return {"statusCode": params, "body": json.dumps({"message": message})}
+
+    event = dict(event, pathParameters=params)
+    # gli handler leggono il body come testo JSON
+    if event.get("isBase64Encoded") and event.get("body"):
+        event["body"] = base64.b64decode(event["body"]).decode("utf-8")
+        event["isBase64Encoded"] = False
+    return load_handler(name)(event, context)
+
+
+# Init: le route leggere sono pronte prima della prima richiesta
+for _name in {name for _, _, name in ROUTES} - LAZY_HANDLERS:
+    try:
+        load_handler(_name)
+    except Exception as e:
+        logger.error("Errore caricamento handler %s: %s", _name, str(e))
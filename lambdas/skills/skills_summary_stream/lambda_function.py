@@ -0,0 +1,66 @@
+"""
+Consumer dello stream DynamoDB della tabella skillbuilder-skills.
+
+Applica ogni record INSERT/MODIFY/REMOVE al riepilogo dell'utente nella tabella
+meta (skill_summary.changes), così GET /skills/summary è un solo GetItem. Lo
+stream va abilitato con vista NEW_AND_OLD_IMAGES e l'event source mapping con
+FunctionResponseTypes=ReportBatchItemFailures.
+
+I record vengono applicati in ordine; al primo errore la Lambda si ferma e
+riporta quel record in batchItemFailures: Lambda ritenta il batch da lì, senza
+applicare i record successivi della stessa skill fuori ordine. I record già
+applicati prima di un errore (o di un timeout) tornano nel retry: la
+transazione di ogni record scrive il marcatore Skill_UID#SequenceNumber con la
+condizione che non esista, quindi un record già visto viene saltato.
+"""
+import logging
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_summary
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def apply(record):
+    """Applica un record; ritorna "applied", "duplicate" o "skipped" (nessun riepilogo cambia)."""
+    data = record["dynamodb"]
+    changes = skill_summary.changes(record)
+    outcome = "skipped"
+    if changes:
+        marker = f"{data['Keys']['Skill_UID']['S']}#{data['SequenceNumber']}"
+        outcome = "applied" if skills_repository.apply_summary_changes(marker, changes) else "duplicate"
+    departed = skill_summary.departed(record)
+    if departed:
+        # se era l'ultima skill creata dal vecchio utente non va più mostrata (condizionale: ripetibile)
+        skills_repository.clear_summary_last_skill(*departed)
+    return outcome
+
+
+@metrics.instrumented("skills_summary_stream")
+@profiling.profiled("skills_summary_stream")
+def lambda_handler(event, context):
+    records = event.get("Records", [])
+    outcomes = {"applied": 0, "duplicate": 0, "skipped": 0}
+    failures = []
+    for record in records:
+        try:
+            outcomes[apply(record)] += 1
+        except Exception as e:
+            sequence = record.get("dynamodb", {}).get("SequenceNumber")
+            logger.error("Record %s non applicato: %s", sequence, str(e))
+            # i record successivi vengono ritentati insieme a questo, nell'ordine dello stream
+            failures.append({"itemIdentifier": sequence})
+            break
+
+    logger.info("Stream: %d record, %s, %d falliti", len(records), outcomes, len(failures))
+    metrics.add("Items", len(records))
+    metrics.add("SummaryApplied", outcomes["applied"])
+    metrics.add("SummaryDuplicates", outcomes["duplicate"])
+    metrics.add("SummaryFailures", len(failures))
+    return {"batchItemFailures": failures}
+
+
+metrics.init_done()
@@ -0,0 +1,135 @@
+"""
+Consumer dello stream DynamoDB della tabella skillbuilder-skills per la classifica.
+
+Ogni menzione (INSERT di una skill, o MODIFY che aumenta mentions; non le
+scritture di move_skill, che spostano menzioni già contate) entra negli
+sketch della sua settimana (skill_trending.Bucket: Count-Min Sketch delle
+menzioni e HyperLogLog degli utenti distinti), salvati nella tabella meta
+divisi in parti (vedi skill_trending).
+È un secondo consumer dello stesso stream di skills_summary_stream (vista
+NEW_AND_OLD_IMAGES, FunctionResponseTypes=ReportBatchItemFailures).
+
+I record si raggruppano in blocchi consecutivi della stessa settimana (al
+massimo CHUNK_SIZE): ogni blocco rilegge il bucket, aggiunge le menzioni e
+riscrive l'item principale, con la condizione sulla versione, e le sole parti
+cambiate (segmenti del CMS e HLL delle skill del blocco), nella stessa
+transazione dei marcatori Skill_UID#SequenceNumber dei suoi record. Se il
+bucket è cambiato (un altro shard) si rilegge e si riprova; i record con il marcatore già presente (retry
+di Lambda) vengono tolti dal blocco. Al primo blocco che non riesce il
+consumer si ferma e riporta il suo primo record in batchItemFailures.
+"""
+import logging
+from datetime import datetime, timezone
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_trending
+import skills_repository
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Una transazione ha al massimo 100 item: l'item principale, fino a CMS_SEGMENTS segmenti
+# e, per ogni record, il suo marcatore e al massimo un HLL
+TRANSACTION_ITEMS = 100
+CHUNK_SIZE = (TRANSACTION_ITEMS - 1 - skill_trending.CMS_SEGMENTS) // 2
+MAX_ATTEMPTS = 5
+
+
+def mention(record):
+    """(settimana, skill, user, menzioni) del record, o None se non aggiunge menzioni."""
+    data = record["dynamodb"]
+    new = data.get("NewImage")
+    if not new or "skill" not in new or "user" not in new:
+        return None
+    if "moved_at" in new and new["moved_at"] == new.get("updated_at"):
+        return None  # riga spostata da move_skill (cambio di nome o utente): menzioni già contate
+    old = data.get("OldImage") or {}
+    count = int(new.get("mentions", {}).get("N", "1"))
+    if old.get("user") == new["user"]:
+        count -= int(old.get("mentions", {}).get("N", "0"))
+    elif old:
+        count = 0  # riassegnata a un altro utente: non è una nuova menzione
+    if count <= 0:
+        return None
+    moment = datetime.fromtimestamp(data["ApproximateCreationDateTime"], timezone.utc)
+    return skill_trending.week(moment), new["skill"]["S"], new["user"]["S"], count
+
+
+def chunks(records):
+    """Blocchi consecutivi di (marker, menzione) della stessa settimana, con il primo record di ciascuno."""
+    current, first = [], None
+    for record in records:
+        entry = mention(record)
+        if entry is None:
+            continue
+        data = record["dynamodb"]
+        marker = f"{data['Keys']['Skill_UID']['S']}#{data['SequenceNumber']}"
+        if current and (current[0][1][0] != entry[0] or len(current) == CHUNK_SIZE):
+            yield first, current
+            current = []
+        if not current:
+            first = record
+        current.append((marker, entry))
+    if current:
+        yield first, current
+
+
+def apply(week, pending):
+    """Aggiunge le menzioni al bucket della settimana; ritorna quante erano già state applicate."""
+    duplicates = 0
+    for _ in range(MAX_ATTEMPTS):
+        head, version = skills_repository.get_trending_bucket(week)
+        if head:
+            names = skill_trending.Bucket.part_names(head)
+            parts = skills_repository.get_trending_parts({week: names}, consistent=True)[week]
+            bucket = skill_trending.Bucket.from_items(head, parts)
+        else:
+            bucket = skill_trending.Bucket()
+        for _, (_, skill, user, count) in pending:
+            bucket.add(skill, user, count)
+        head, parts = bucket.to_items()
+        existing = skills_repository.put_trending_bucket(
+            week, head, parts, version, [marker for marker, _ in pending]
+        )
+        if existing is None:
+            return duplicates
+        if existing:
+            duplicates += len(existing)
+            pending = [entry for entry in pending if entry[0] not in existing]
+            if not pending:
+                return duplicates
+        else:
+            metrics.add("TrendingConflicts", 1)
+    raise RuntimeError(f"Bucket {week} conteso: {MAX_ATTEMPTS} tentativi falliti")
+
+
+@metrics.instrumented("skills_trending_stream")
+@profiling.profiled("skills_trending_stream")
+def lambda_handler(event, context):
+    records = event.get("Records", [])
+    applied = duplicates = 0
+    failures = []
+    for first, pending in chunks(records):
+        week = pending[0][1][0]
+        try:
+            found = apply(week, pending)
+        except Exception as e:
+            sequence = first["dynamodb"]["SequenceNumber"]
+            logger.error("Blocco da %s (%s) non applicato: %s", sequence, week, str(e))
+            # Lambda ritenta da qui; i record già applicati hanno il marcatore
+            failures.append({"itemIdentifier": sequence})
+            break
+        applied += len(pending) - found
+        duplicates += found
+
+    logger.info("Stream: %d record, %d menzioni applicate, %d duplicate, %d falliti",
+                len(records), applied, duplicates, len(failures))
+    metrics.add("Items", len(records))
+    metrics.add("TrendingApplied", applied)
+    metrics.add("TrendingDuplicates", duplicates)
+    metrics.add("TrendingFailures", len(failures))
+    return {"batchItemFailures": failures}
+
+
+metrics.init_done()
@@ -1,46 +1,93 @@
 import json
-import boto3
 import logging
 
+from botocore.exceptions import ClientError
+
+import metrics  # dal layer skills_common (per primo: misura l'init)
+import profiling
+import skill_cache
+import skill_names
+import skills_repository
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-TABLE_NAME = "skillbuilder-skills"
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
 
+@metrics.instrumented("update_skill")
+@profiling.profiled("update_skill")
 def lambda_handler(event, context):
     skill_id = event["pathParameters"]["id"]
-    body = json.loads(event.get("body", "{}"))
+    with metrics.span("Parse"):
+        body = json.loads(event.get("body", "{}"))
 
-    logger.info(f"Updating skill {skill_id} with body: {body}")
+    if metrics.verbose():
+        logger.info(f"Updating skill {skill_id} with body: {body}")
+    else:
+        logger.info(f"Updating skill {skill_id}")
 
-    update_expression = []
-    expression_values = {}
+    fields = {}
     for key in ["user", "skill", "level", "acquired_on"]:
         if key in body:
-            update_expression.append(f"{key} = :{key}")
-            expression_values[f":{key}"] = body[key]
+            fields[key] = body[key]
+
+    if "acquired_on" in fields:
+        # sempre ISO in tabella (l'indice per data ordina le stringhe); si accettano anche dd/mm/YYYY e YYYY-MM-DD
+        fields["acquired_on"] = skills_repository.normalize_date(fields["acquired_on"])
+        if fields["acquired_on"] is None:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"message": "Invalid acquired_on date"})
+            }
 
-    if not update_expression:
+    if "skill" in fields:
+        fields["skill"] = skill_names.canonicalize(fields["skill"])
+        if metrics.verbose():
+            logger.info("Canonicalizzazione skill: %s", skill_names.stats())
+
+    if not fields:
         return {
             "statusCode": 400,
             "body": json.dumps({"message": "No valid fields to update"})
         }
 
-    update_expr = "SET " + ", ".join(update_expression)
+    # Se cambia il proprietario vanno invalidate anche le letture in cache del vecchio utente
+    users = []
+    if "user" in fields:
+        previous = skills_repository.get_skill(skill_id, ["user"])
+        users.append(previous and previous.get("user"))
 
-    response = table.update_item(
-        Key={"Skill_UID": skill_id},
-        UpdateExpression=update_expr,
-        ExpressionAttributeValues=expression_values,
-        ReturnValues="ALL_NEW"
-    )
+    try:
+        if "user" in fields or "skill" in fields:
+            # Skill_UID dipende da (user, skill): la riga passa alla nuova chiave, unita a
+            # quella che l'utente ha già per la stessa skill
+            skill = skills_repository.move_skill(skill_id, fields)
+        else:
+            # Il repository usa ExpressionAttributeNames: "user" e "level" sono parole riservate
+            skill = skills_repository.update_skill(skill_id, fields)
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+        logger.warning("Skill %s modificata durante lo spostamento", skill_id)
+        return {
+            "statusCode": 409,
+            "body": json.dumps({"message": "Skill modified concurrently, retry"})
+        }
+    if skill is None:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({"message": "Skill not found"})
+        }
+    skill_cache.invalidate(users + [skill.get("user")])
 
+    with metrics.span("Serialize"):
+        body = json.dumps({
+            "message": "Skill updated",
+            "skill": skills_repository.public(skill)
+        }, default=str)
     return {
         "statusCode": 200,
-        "body": json.dumps({
-            "message": "Skill updated",
-            "skill": response.get("Attributes", {})
-        })
+        "body": body
     }
+
+
+metrics.init_done()
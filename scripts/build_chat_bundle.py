@@ -0,0 +1,335 @@
+"""
+Build del pacchetto di deploy di chat_skill potato e precompilato, con report del cold start.
+
+1. Traccia le dipendenze reali: in un processo nuovo carica l'handler di
+   package/ ed esegue qualche invocazione con gli stand-in di bench/ (DynamoDB in
+   memoria, Gemini finto), poi raccoglie i moduli importati da package/.
+2. Tiene solo le voci di primo livello di package/ toccate (pacchetti, moduli,
+   sottopacchetti dei namespace come google/genai) con i loro dist-info, più
+   lambda_function.py e skill_taxonomy.bin; il resto viene escluso, come i
+   pacchetti di RUNTIME_PROVIDED (urllib3). Con google-genai 1.21 restano fuori
+   websockets (solo per l'API live), gli eseguibili di bin/ e, grazie alle
+   patch locali di google.genai._api_client e _replay_api_client (import di
+   requests solo al refresh delle credenziali Vertex o in registrazione),
+   requests, charset_normalizer, rsa, pyasn1, pyasn1_modules e google/oauth2:
+   chat_skill usa solo la API key.
+3. Copia le voci tenute in --output, le precompila (.pyc unchecked-hash: nessun
+   controllo di mtime dopo l'unzip) e crea lo zip.
+4. Verifica il bundle potato (init + invocazioni senza errori di import) e
+   riporta: init a freddo e RSS prima/dopo, tempo di import per pacchetto e per
+   modulo (-X importtime), RSS aggiunto da ogni pacchetto.
+Esce con errore se l'init del bundle potato supera --budget-ms.
+
+I processi di tracciamento e verifica girano con python -S, senza i
+site-packages della macchina: nel sys.path ci sono solo il bundle, i layer
+(--layer: skills_common con le sue dipendenze e il layer numpy, costruiti da
+scripts/build_layer.py) e i pacchetti che il runtime Lambda fornisce già
+(RUNTIME_PROVIDED, collegati da quelli locali in build/lambda_runtime). Un modulo che in produzione
+mancherebbe fa fallire la verifica anche se è installato in locale.
+
+Il bytecode deve essere della stessa versione Python del runtime Lambda
+(--runtime): per numeri fedeli conviene eseguire lo script nell'immagine
+public.ecr.aws/lambda/python della stessa versione.
+
+Uso:
+    python scripts/build_chat_bundle.py [--output build/chat_skill] [--budget-ms 1500]
+        [--runs 3] [--keep pacchetto] [--runtime 3.11] [--layer cartella]
+"""
+import argparse
+import compileall
+import importlib
+import json
+import os
+import py_compile
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import zipfile
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SOURCE_DIR = os.path.join(ROOT, "lambdas", "skills", "chat_skill", "package")
+LAYER_DIR = os.path.join(ROOT, "lambdas", "layers", "skills_common", "python")
+BENCH_DIR = os.path.join(ROOT, "bench")
+DEFAULT_OUTPUT = os.path.join(ROOT, "build", "chat_skill")
+COMMON_DEPS_DIR = os.path.join(ROOT, "build", "skills_common_layer", "python")
+NUMPY_LAYER_DIR = os.path.join(ROOT, "build", "numpy_layer", "python")
+RUNTIME_DIR = os.path.join(ROOT, "build", "lambda_runtime")
+# Pacchetti in /var/runtime del runtime Python di Lambda: non vanno nel bundle
+RUNTIME_PROVIDED = ["boto3", "botocore", "s3transfer", "jmespath", "dateutil", "six", "urllib3"]
+
+# File del bundle tenuti sempre, anche se non passano dall'import
+ALWAYS_KEEP = ["lambda_function.py", "skill_taxonomy.bin"]
+SKIP = {"__pycache__", "bin"}
+# Invocazioni del tracciamento: coprono tutte le risposte registrate dello stand-in
+TRACE_INVOCATIONS = 4
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# --- processo figlio --------------------------------------------------------
+
+def child(mode, bundle, packages):
+    # come su Lambda: /var/task, poi i layer (/opt/python), poi /var/runtime
+    sys.path[:0] = [bundle, *os.environ["BUNDLE_LAYERS"].split(os.pathsep), RUNTIME_DIR]
+    if mode == "rss":
+        result = []
+        for name in packages:
+            before, t0 = rss_kb(), time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue  # moduli caricati solo come sottomoduli di altri
+            result.append({"package": name, "rss_kb": rss_kb() - before,
+                           "ms": (time.perf_counter() - t0) * 1000})
+        print(json.dumps(result))
+        return
+
+    sys.path.insert(1, BENCH_DIR)
+    import bench_handlers
+
+    rss_start, t0 = rss_kb(), time.perf_counter()
+    fake = bench_handlers.install_fakes()
+    spec = importlib.util.spec_from_file_location("lambda_function", os.path.join(bundle, "lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    result = {"init_ms": (time.perf_counter() - t0) * 1000, "rss_init_kb": rss_kb() - rss_start}
+
+    if mode == "trace":
+        rnd = random.Random(0)
+        users, vocabulary = bench_handlers.seed(fake, 200, rnd)
+        events = bench_handlers.Events(fake, users, vocabulary, rnd)
+        statuses = [module.lambda_handler(events.chat_skill()[0], None)["statusCode"]
+                    for _ in range(TRACE_INVOCATIONS)]
+        if any(status != 200 for status in statuses):
+            raise SystemExit(f"Invocazioni di tracciamento fallite: {statuses}")
+        root = os.path.abspath(bundle) + os.sep
+        result["modules"] = sorted(
+            name for name, m in list(sys.modules.items())
+            if (getattr(m, "__file__", None) or "").startswith(root)
+        )
+        result["files"] = sorted({
+            os.path.relpath(m.__file__, root) for m in list(sys.modules.values())
+            if (getattr(m, "__file__", None) or "").startswith(root)
+        })
+    print(json.dumps(result))
+
+
+def runtime_dir():
+    """build/lambda_runtime con i soli RUNTIME_PROVIDED, collegati da quelli installati in locale."""
+    shutil.rmtree(RUNTIME_DIR, ignore_errors=True)
+    os.makedirs(RUNTIME_DIR)
+    for name in RUNTIME_PROVIDED:
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise SystemExit(f"{name} (fornito dal runtime Lambda) non è installato in locale")
+        path = spec.submodule_search_locations[0] if spec.submodule_search_locations else spec.origin
+        os.symlink(path, os.path.join(RUNTIME_DIR, os.path.basename(path)))
+
+
+def run_child(mode, bundle, layers, packages=(), importtime=False):
+    # -S: niente site-packages locali, solo quello che il sys.path del child aggiunge
+    command = [sys.executable, "-S"]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [os.path.abspath(__file__), "--child", mode, "--bundle", bundle, *packages]
+    env = dict(os.environ, BUNDLE_LAYERS=os.pathsep.join(layers))
+    proc = subprocess.run(command, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise SystemExit(f"Processo di verifica ({mode}) fallito su {bundle}:\n{proc.stderr[-3000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+# --- selezione delle voci ---------------------------------------------------
+
+def entries(source):
+    """Voci di primo livello del bundle; i namespace senza __init__.py (google/) si aprono di un livello."""
+    result = []
+    for name in sorted(os.listdir(source)):
+        path = os.path.join(source, name)
+        if name in SKIP or name.endswith(".dist-info"):
+            continue
+        if os.path.isdir(path) and not os.path.exists(os.path.join(path, "__init__.py")):
+            result += [os.path.join(name, child) for child in sorted(os.listdir(path)) if child not in SKIP]
+        else:
+            result.append(name)
+    return result
+
+
+def entry_of(relpath, all_entries):
+    parts = relpath.split(os.sep)
+    for candidate in (os.path.join(*parts[:2]) if len(parts) > 1 else None, parts[0]):
+        if candidate in all_entries:
+            return candidate
+    return None
+
+
+def dist_infos(source, kept):
+    """dist-info dei pacchetti tenuti (dal RECORD), utili a importlib.metadata."""
+    result = []
+    for name in sorted(os.listdir(source)):
+        record = os.path.join(source, name, "RECORD")
+        if not name.endswith(".dist-info") or not os.path.exists(record):
+            continue
+        with open(record, encoding="utf-8") as f:
+            paths = [line.split(",", 1)[0] for line in f if line.strip()]
+        if any(entry_of(os.path.normpath(p), kept) for p in paths):
+            result.append(name)
+    return result
+
+
+def size_of(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path), 1
+    total = files = 0
+    for directory, dirnames, filenames in os.walk(path):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(directory, filename))
+            files += 1
+    return total, files
+
+
+# --- build -------------------------------------------------------------------
+
+def build(source, output, kept, runtime):
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+    ignore = shutil.ignore_patterns("__pycache__", "*.pyc")
+    for entry in kept:
+        src, dst = os.path.join(source, entry), os.path.join(output, entry)
+        if os.path.isdir(src):
+            shutil.copytree(src, dst, ignore=ignore)
+        else:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+
+    if runtime:
+        if runtime != f"{sys.version_info.major}.{sys.version_info.minor}":
+            raise SystemExit(f"Bytecode per il runtime {runtime}: esegui lo script con Python {runtime}")
+        compileall.compile_dir(output, quiet=1, workers=0,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+    archive = output.rstrip(os.sep) + ".zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for directory, _, filenames in os.walk(output):
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                zf.write(path, os.path.relpath(path, output))
+    return archive
+
+
+# --- report ------------------------------------------------------------------
+
+def parse_importtime(stderr):
+    """-X importtime -> {modulo: (self µs, cumulativo µs)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_init(bundle, layers, runs):
+    samples = [run_child("init", bundle, layers)[0] for _ in range(runs)]
+    return (statistics.median(s["init_ms"] for s in samples),
+            statistics.median(s["rss_init_kb"] for s in samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle di chat_skill potato e report del cold start")
+    parser.add_argument("--source", default=SOURCE_DIR)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--budget-ms", type=float, help="init a freddo massimo del bundle potato")
+    parser.add_argument("--runs", type=int, default=3, help="processi per la misura dell'init (mediana)")
+    parser.add_argument("--keep", action="append", default=[], help="voce da tenere comunque (es. requests)")
+    parser.add_argument("--runtime", default=f"{sys.version_info.major}.{sys.version_info.minor}",
+                        help="versione Python del runtime Lambda per il bytecode ('' per non precompilare)")
+    parser.add_argument("--layer", action="append",
+                        help="cartella di un layer nel sys.path della verifica (default: skills_common e numpy)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--bundle", help=argparse.SUPPRESS)
+    parser.add_argument("packages", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.bundle, args.packages)
+        return
+
+    source = os.path.abspath(args.source)
+    output = os.path.abspath(args.output)
+    layers = [os.path.abspath(layer) for layer in args.layer or [LAYER_DIR, COMMON_DEPS_DIR, NUMPY_LAYER_DIR]]
+    missing = [layer for layer in layers if not os.path.isdir(layer)]
+    if missing:
+        raise SystemExit(f"Layer mancanti: {missing} (si creano con scripts/build_layer.py skills_common|numpy)")
+    runtime_dir()
+
+    trace, _ = run_child("trace", source, layers)
+    all_entries = entries(source)
+    # i pacchetti del runtime (urllib3 per botocore) si usano da /var/runtime: la copia del bundle li nasconderebbe
+    kept = sorted({entry_of(path, all_entries) for path in trace["files"]} - {None} - set(RUNTIME_PROVIDED)
+                  | {entry for entry in ALWAYS_KEEP + args.keep if os.path.exists(os.path.join(source, entry))})
+    kept += dist_infos(source, kept)
+    pruned = [entry for entry in all_entries if entry not in kept]
+    pruned += [name for name in sorted(SKIP - {"__pycache__"}) if os.path.exists(os.path.join(source, name))]
+
+    archive = build(source, output, kept, args.runtime)
+
+    source_size, source_files = map(sum, zip(*(size_of(os.path.join(source, e)) for e in os.listdir(source)
+                                               if e != "__pycache__")))
+    output_size, output_files = size_of(output)
+    print(f"Moduli importati dall'handler: {len(trace['modules'])}")
+    print(f"Sorgente: {source_size / 1e6:.1f} MB in {source_files} file")
+    print(f"Potato:   {output_size / 1e6:.1f} MB in {output_files} file (con .pyc), zip {os.path.getsize(archive) / 1e6:.1f} MB")
+    print("\nEsclusi:")
+    for entry in sorted(pruned, key=lambda e: -size_of(os.path.join(source, e))[0]):
+        size, files = size_of(os.path.join(source, entry))
+        print(f"  {entry:<32}{size / 1024:>9.0f} KB{files:>6} file")
+
+    # la verifica sul bundle potato fallisce se manca un modulo usato dall'handler
+    run_child("trace", output, layers)
+    source_init, source_rss = measure_init(source, layers, args.runs)
+    init_ms, rss = measure_init(output, layers, args.runs)
+    print(f"\nInit a freddo (mediana di {args.runs}, stand-in compresi):")
+    print(f"  sorgente {source_init:>8.1f} ms  RSS +{source_rss / 1024:.1f} MB")
+    print(f"  potato   {init_ms:>8.1f} ms  RSS +{rss / 1024:.1f} MB")
+
+    _, stderr = run_child("init", output, layers, importtime=True)
+    modules = parse_importtime(stderr)
+    by_package = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    print(f"\nImport per pacchetto (self, top {args.top}):")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<32}{us / 1000:>9.1f} ms")
+    print(f"\nImport per modulo (self / cumulativo, top {args.top}):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {name:<48}{self_us / 1000:>8.1f}{cumulative_us / 1000:>9.1f} ms")
+
+    packages = list(dict.fromkeys(name.split(".")[0] for name in trace["modules"]))
+    rss_rows, _ = run_child("rss", output, layers, packages)
+    print("\nRSS aggiunto dall'import di ogni pacchetto (in ordine di import):")
+    for row in rss_rows:
+        print(f"  {row['package']:<32}{row['rss_kb'] / 1024:>7.1f} MB{row['ms']:>9.1f} ms")
+
+    if args.budget_ms is not None and init_ms > args.budget_ms:
+        raise SystemExit(f"\nInit a freddo {init_ms:.1f} ms oltre il budget di {args.budget_ms:.0f} ms")
+    print(f"\nBundle: {output}\nZip:    {archive}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Build di un Lambda layer: i sorgenti di lambdas/layers/<nome>/python più le
+dipendenze di lambdas/layers/<nome>/requirements.txt.
+
+  - skills_common: i moduli condivisi più cachetools (skill_cache), che
+    nessuna funzione deve portarsi nel proprio bundle;
+  - numpy: solo numpy (le estensioni compilate non sono nel repo), per
+    chat_skill, search_skills e skills_api.
+
+Lo script installa con pip le wheel manylinux per la versione Python e
+l'architettura del runtime (non quelle della macchina che esegue lo script) in
+build/<nome>_layer/python, toglie le suite di test e crea build/<nome>_layer.zip
+da pubblicare, con i sorgenti del layer accanto alle dipendenze. La cartella
+contiene solo le dipendenze: build_chat_bundle.py e bench_handlers.py la mettono
+nel sys.path dopo i sorgenti del repo, così una modifica ai moduli non richiede
+di ricostruire il layer.
+
+Uso:
+    python scripts/build_layer.py skills_common|numpy [--runtime 3.11] [--arch x86_64|arm64]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+LAYERS_DIR = os.path.join(ROOT, "lambdas", "layers")
+BUILD_DIR = os.path.join(ROOT, "build")
+PLATFORMS = {"x86_64": "manylinux2014_x86_64", "arm64": "manylinux2014_aarch64"}
+
+
+def size_mb(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files) / 1e6
+
+
+def zip_tree(zf, source, prefix):
+    for directory, dirnames, filenames in os.walk(source):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            zf.write(path, os.path.join(prefix, os.path.relpath(path, source)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("layer", choices=sorted(os.listdir(LAYERS_DIR)))
+    parser.add_argument("--runtime", default="3.11", help="versione Python del runtime Lambda")
+    parser.add_argument("--arch", choices=sorted(PLATFORMS), default="x86_64")
+    args = parser.parse_args()
+
+    output = os.path.join(BUILD_DIR, f"{args.layer}_layer")
+    target = os.path.join(output, "python")  # su Lambda diventa /opt/python
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(target)
+    subprocess.run([
+        sys.executable, "-m", "pip", "install", "--quiet", "--no-compile",
+        "--only-binary=:all:", "--implementation", "cp",
+        "--python-version", args.runtime, "--platform", PLATFORMS[args.arch],
+        "--target", target, "-r", os.path.join(LAYERS_DIR, args.layer, "requirements.txt"),
+    ], check=True)
+
+    # test e bin/ non servono a runtime
+    for directory, dirnames, _ in os.walk(target):
+        for name in [d for d in dirnames if d in ("tests", "__pycache__")]:
+            shutil.rmtree(os.path.join(directory, name))
+            dirnames.remove(name)
+    shutil.rmtree(os.path.join(target, "bin"), ignore_errors=True)
+
+    archive = output + ".zip"
+    sources = os.path.join(LAYERS_DIR, args.layer, "python")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        zip_tree(zf, target, "python")
+        if os.path.isdir(sources):
+            zip_tree(zf, sources, "python")
+    print(f"Dipendenze: {target} ({size_mb(target):.1f} MB), zip {os.path.getsize(archive) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Build della tassonomia binaria spedita nel bundle di chat_skill.
+
+Legge la tassonomia sorgente, calcola gli embedding dei nomi con Gemini (a
+blocchi di 100, il massimo di batchEmbedContents) e scrive il file letto con
+mmap da skill_taxonomy.Taxonomy: matrice float16, offsets e string table.
+
+Formati sorgente accettati:
+  - {"Nome canonico": ["alias", ...], ...}  (come skill_synonyms.json, default)
+  - [{"name": "...", "embedding": [...]}, ...]  (vettori già calcolati, niente API)
+
+Uso:
+    GOOGLE_API_KEY=... python scripts/build_skill_taxonomy.py [--source tassonomia.json] [--json-out baseline.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+LAYER_DIR = os.path.join(ROOT, "lambdas", "layers", "skills_common", "python")
+sys.path.insert(0, os.path.normpath(LAYER_DIR))
+
+import skill_embeddings
+import skill_taxonomy
+
+DEFAULT_SOURCE = os.path.join(LAYER_DIR, "skill_synonyms.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "lambdas", "skills", "chat_skill", "package", "skill_taxonomy.bin")
+BATCH_SIZE = skill_embeddings.EMBED_BATCH_SIZE
+
+
+def load_source(path):
+    """Ritorna (nomi, matrice o None se i vettori vanno calcolati)."""
+    with open(path, encoding="utf-8") as f:
+        source = json.load(f)
+    if isinstance(source, dict):
+        return list(source), None
+    names = [entry["name"] for entry in source]
+    matrix = np.array([entry["embedding"] for entry in source], dtype=np.float32)
+    return names, skill_embeddings.normalize_rows(matrix)
+
+
+def embed_all(names):
+    from google import genai
+
+    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    blocks = []
+    # embed_texts divide già in chiamate da EMBED_BATCH_SIZE: i blocchi servono solo al progresso
+    for start in range(0, len(names), BATCH_SIZE):
+        blocks.append(skill_embeddings.embed_texts(client, names[start:start + BATCH_SIZE]))
+        print(f"Embedding {min(start + BATCH_SIZE, len(names))}/{len(names)}")
+    return np.vstack(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build della tassonomia binaria delle skill")
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--json-out", help="scrive anche la stessa tassonomia in JSON (baseline per il benchmark)")
+    args = parser.parse_args()
+
+    names, matrix = load_source(args.source)
+    if matrix is None:
+        matrix = embed_all(names)
+
+    skill_taxonomy.write_taxonomy(args.output, names, matrix, skill_embeddings.EMBEDDING_MODEL)
+    print(f"Scritte {len(names)} voci ({matrix.shape[1]} dim) in {args.output}: "
+          f"{os.path.getsize(args.output) / 1024:.1f} KB")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump([{"name": n, "embedding": v.tolist()} for n, v in zip(names, matrix)], f)
+        print(f"Baseline JSON: {os.path.getsize(args.json_out) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
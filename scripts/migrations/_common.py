@@ -0,0 +1,59 @@
+"""
+Utility comuni agli script di migrazione della tabella skill.
+
+Gli script girano dalla macchina dello sviluppatore con le credenziali AWS
+di default e importano i moduli del layer skills_common.
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import boto3
+
+LAYER_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "lambdas", "layers", "skills_common", "python"
+)
+sys.path.insert(0, os.path.normpath(LAYER_DIR))
+
+TABLE_NAME = os.getenv("DYNAMODB_TABLE", "skillbuilder-skills")
+
+
+def table_for_thread():
+    # le resource boto3 non sono thread-safe: una sessione per thread
+    return boto3.session.Session().resource("dynamodb").Table(TABLE_NAME)
+
+
+def _scan_segment(segment, total_segments, scan_kwargs):
+    table = table_for_thread()
+    items = []
+    kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def parallel_scan(total_segments=8, **scan_kwargs):
+    """Scan parallelo (Segment/TotalSegments), un thread per segmento."""
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        futures = [
+            pool.submit(_scan_segment, segment, total_segments, scan_kwargs)
+            for segment in range(total_segments)
+        ]
+        items = []
+        for future in futures:
+            items.extend(future.result())
+    return items
+
+
+def parse_date(value):
+    """Legge sia il formato legacy dd/mm/YYYY sia l'ISO %Y-%m-%dT%H:%M:%SZ."""
+    for fmt in ("%Y-%m-%dT%H:%M:%SZ", "%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
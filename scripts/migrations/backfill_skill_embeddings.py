@@ -0,0 +1,62 @@
+"""
+Migrazione: calcola l'embedding delle skill che non ce l'hanno ancora.
+
+chat_skill e search_skills embeddano le skill senza vettore un po' alla volta
+(al massimo EMBEDDING_BACKFILL_LIMIT per richiesta): per un utente con molte
+skill salvate prima degli embedding il dedupe e la ricerca restano parziali
+finché non le hanno tutte. Lo script legge con uno scan parallelo le righe
+senza embedding (o con quello di un altro EMBEDDING_MODEL), le embedda a
+blocchi di EMBED_BATCH_SIZE e salva i vettori con set_attributes (updated_at
+non cambia: per i client la skill è la stessa). Si può rilanciare: le righe
+già completate non vengono rilette.
+
+Uso:
+    GOOGLE_API_KEY=... python scripts/migrations/backfill_skill_embeddings.py --segments 8 --dry-run
+"""
+import argparse
+import logging
+import os
+
+from boto3.dynamodb.conditions import Attr
+
+from _common import parallel_scan
+
+import skill_embeddings
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(
+        args.segments,
+        FilterExpression=Attr("embedding").not_exists() | Attr("embedding_model").ne(skill_embeddings.EMBEDDING_MODEL),
+        ProjectionExpression="Skill_UID, skill",
+    )
+    items = [item for item in items if item.get("skill")]
+    logger.info("Skill senza embedding: %d", len(items))
+    if args.dry_run or not items:
+        return
+
+    from google import genai
+
+    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    step = skill_embeddings.EMBED_BATCH_SIZE
+    for start in range(0, len(items), step):
+        block = items[start:start + step]
+        vectors = skill_embeddings.embed_texts(client, [item["skill"] for item in block])
+        skills_repository.set_attributes_many({
+            item["Skill_UID"]: skill_embeddings.vector_attributes(vector) for item, vector in zip(block, vectors)
+        })
+        logger.info("Embedding %d/%d", start + len(block), len(items))
+    logger.info("Migrazione completata: %d skill embeddate", len(items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Migrazione: assegna Skill_ULID alle skill create prima degli id ordinabili.
+
+Il GSI user-created-index è sparso: le righe senza Skill_ULID non ci finiscono
+e GET /skills?user=...&latest=N non le vedrebbe. Lo script legge con uno scan
+parallelo le righe senza Skill_ULID e ne genera uno con il tempo di
+acquired_on (scritto alla creazione), o di last_seen, o l'ora corrente; lo
+Skill_UID resta quello che è (uuid5 o uuid4 casuale delle righe più vecchie),
+quindi le letture per id non cambiano. L'update è condizionale: una riga che
+ha ricevuto il suo ULID nel frattempo non viene toccata. Alla fine si
+incrementano le generazioni della cache degli utenti toccati.
+
+Uso:
+    python scripts/migrations/backfill_skill_ulid.py --segments 8 --dry-run
+"""
+import argparse
+import logging
+import time
+from datetime import timezone
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from _common import parallel_scan, parse_date, table_for_thread
+
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def ulid_for(item):
+    date = parse_date(item.get("acquired_on")) or parse_date(item.get("last_seen"))
+    # le date della tabella sono UTC
+    return skills_repository.new_ulid(date.replace(tzinfo=timezone.utc).timestamp() if date else time.time())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(
+        args.segments,
+        FilterExpression=Attr("Skill_ULID").not_exists(),
+        ProjectionExpression="Skill_UID, #user, acquired_on, last_seen",
+        ExpressionAttributeNames={"#user": "user"},
+    )
+    logger.info("Righe senza Skill_ULID: %d", len(items))
+    if args.dry_run or not items:
+        return
+
+    table = table_for_thread()
+    skipped = 0
+    for item in items:
+        try:
+            table.update_item(
+                Key={"Skill_UID": item["Skill_UID"]},
+                UpdateExpression="SET Skill_ULID = :ulid",
+                ConditionExpression="attribute_exists(Skill_UID) AND attribute_not_exists(Skill_ULID)",
+                ExpressionAttributeValues={":ulid": ulid_for(item)},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            skipped += 1
+
+    users = {item["user"] for item in items if item.get("user")}
+    skills_repository.bump_generations([*users, skills_repository.ALL_USERS])
+    logger.info("Migrazione completata: %d aggiornate, %d già scritte nel frattempo", len(items) - skipped, skipped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Migrazione: imposta updated_at sulle skill scritte prima della sync incrementale.
+
+Il GSI user-updated-index è sparso: le righe senza updated_at non ci finiscono
+e GET /skills/changes non le vedrebbe. Lo script legge con uno scan parallelo
+le righe senza updated_at e lo imposta a last_seen (o acquired_on), nel
+formato a larghezza fissa di skills_repository.utc_now_precise; le righe senza
+date valide prendono l'ora corrente. L'update è condizionale: una riga scritta
+da una Lambda nel frattempo non viene toccata.
+
+Uso:
+    python scripts/migrations/backfill_updated_at.py --segments 8 --dry-run
+"""
+import argparse
+import logging
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from _common import parallel_scan, parse_date, table_for_thread
+
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def updated_at_for(item):
+    date = parse_date(item.get("last_seen")) or parse_date(item.get("acquired_on"))
+    if date is None:
+        return skills_repository.utc_now_precise()
+    return date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(
+        args.segments,
+        FilterExpression=Attr("updated_at").not_exists(),
+        ProjectionExpression="Skill_UID, last_seen, acquired_on",
+    )
+    logger.info("Righe senza updated_at: %d", len(items))
+    if args.dry_run:
+        return
+
+    table = table_for_thread()
+    skipped = 0
+    for item in items:
+        try:
+            table.update_item(
+                Key={"Skill_UID": item["Skill_UID"]},
+                UpdateExpression="SET updated_at = :updated_at",
+                ConditionExpression="attribute_exists(Skill_UID) AND attribute_not_exists(updated_at)",
+                ExpressionAttributeValues={":updated_at": updated_at_for(item)},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            skipped += 1
+    logger.info("Migrazione completata: %d aggiornate, %d già scritte nel frattempo", len(items) - skipped, skipped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Migrazione: collassa le skill duplicate in una riga per (user, skill canonica).
+
+Prima dell'upsert ogni menzione creava un nuovo Skill_UID casuale. Questo script
+legge la tabella con uno scan parallelo, raggruppa le righe per utente e nome
+canonico e scrive un'unica riga con lo Skill_UID deterministico di
+skills_repository.skill_key, cancellando le altre con batch write.
+
+Regole di merge:
+  - mentions: somma delle menzioni (1 per le righe che non ce l'hanno)
+  - level: il massimo tra le righe
+  - acquired_on: la data più vecchia; last_seen: la più recente
+  - gli altri attributi vengono dalla riga più recente
+
+Uso:
+    python scripts/migrations/collapse_duplicate_skills.py --segments 8 --dry-run
+"""
+import argparse
+import logging
+from collections import defaultdict
+
+from _common import parallel_scan, parse_date, table_for_thread
+
+import skill_names
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def _sort_date(item):
+    return parse_date(item.get("last_seen") or item.get("acquired_on")) or parse_date("01/01/1970")
+
+
+def merge_group(user, skill, rows):
+    rows = sorted(rows, key=_sort_date)
+    merged = dict(rows[-1])
+    merged["Skill_UID"] = skills_repository.skill_key(user, skill)
+    merged["user"] = user
+    merged["skill"] = skill
+    merged["mentions"] = sum(int(row.get("mentions", 1)) for row in rows)
+    merged["level"] = max(int(row.get("level", 1)) for row in rows)
+
+    acquired = [row["acquired_on"] for row in rows if parse_date(row.get("acquired_on"))]
+    if acquired:
+        merged["acquired_on"] = min(acquired, key=parse_date)
+    merged["last_seen"] = rows[-1].get("last_seen") or rows[-1].get("acquired_on")
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(args.segments)
+    logger.info("Lette %d righe", len(items))
+
+    groups = defaultdict(list)
+    for item in items:
+        if "user" not in item or "skill" not in item:
+            continue
+        skill = skill_names.canonicalize(item["skill"])
+        groups[(item["user"], skill_names.normalize(skill))].append((skill, item))
+
+    puts, deletes = [], []
+    for (user, _), entries in groups.items():
+        rows = [item for _, item in entries]
+        merged = merge_group(user, entries[0][0], rows)
+        if len(rows) == 1 and rows[0] == merged:
+            continue
+        puts.append(merged)
+        deletes.extend(
+            row["Skill_UID"] for row in rows if row["Skill_UID"] != merged["Skill_UID"]
+        )
+
+    logger.info("Gruppi: %d, righe da scrivere: %d, righe da cancellare: %d",
+                len(groups), len(puts), len(deletes))
+    if args.dry_run:
+        return
+
+    # batch_writer raggruppa in BatchWriteItem da 25 e ritenta gli UnprocessedItems
+    with table_for_thread().batch_writer() as batch:
+        for item in puts:
+            batch.put_item(Item=item)
+        for skill_id in deletes:
+            batch.delete_item(Key={"Skill_UID": skill_id})
+    logger.info("Migrazione completata")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Migrazione: riscrive acquired_on in ISO (%Y-%m-%dT%H:%M:%SZ) sulle skill legacy.
+
+add_skill salvava la data come dd/mm/YYYY: come stringa non si ordina e il GSI
+user-acquired-index non può rispondere ai range di date. Lo script legge con
+uno scan parallelo le righe con acquired_on non ISO e le aggiorna in parallelo
+(un thread e una sessione boto3 per worker). Ogni update è condizionale sul
+valore letto, così una riga riscritta da una Lambda nel frattempo non viene
+toccata; updated_at viene aggiornato (i client in sync ricevono la nuova data)
+e alla fine si incrementano le generazioni della cache degli utenti toccati.
+
+Uso:
+    python scripts/migrations/normalize_acquired_on.py --segments 8 --workers 8 --dry-run
+"""
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from _common import parallel_scan, table_for_thread
+
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def is_iso(value):
+    return skills_repository.normalize_date(value) == value
+
+
+def rewrite(rows):
+    """Aggiorna un blocco di righe; ritorna (aggiornate, saltate)."""
+    table = table_for_thread()
+    updated = skipped = 0
+    for row in rows:
+        try:
+            table.update_item(
+                Key={"Skill_UID": row["Skill_UID"]},
+                UpdateExpression="SET acquired_on = :new, updated_at = :updated_at",
+                ConditionExpression="acquired_on = :old",
+                ExpressionAttributeValues={
+                    ":new": skills_repository.normalize_date(row["acquired_on"]),
+                    ":old": row["acquired_on"],
+                    ":updated_at": skills_repository.utc_now_precise(),
+                },
+            )
+            updated += 1
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            skipped += 1
+    return updated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(args.segments, ProjectionExpression="Skill_UID, #user, acquired_on",
+                          ExpressionAttributeNames={"#user": "user"})
+    rows, invalid = [], []
+    for item in items:
+        if "acquired_on" not in item or is_iso(item["acquired_on"]):
+            continue
+        (rows if skills_repository.normalize_date(item["acquired_on"]) else invalid).append(item)
+    logger.info("Lette %d righe: %d da riscrivere, %d con data non riconosciuta (lasciate così)",
+                len(items), len(rows), len(invalid))
+    for item in invalid[:20]:
+        logger.info("  %s: %r", item["Skill_UID"], item["acquired_on"])
+    if args.dry_run or not rows:
+        return
+
+    chunks = [rows[i::args.workers] for i in range(args.workers)]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(rewrite, chunks))
+    updated = sum(result[0] for result in results)
+    skipped = sum(result[1] for result in results)
+
+    users = {row["user"] for row in rows if row.get("user")}
+    skills_repository.bump_generations([*users, skills_repository.ALL_USERS])
+    logger.info("Migrazione completata: %d aggiornate, %d già riscritte nel frattempo", updated, skipped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Migrazione: sposta aiResponseRaw dalle skill alla tabella delle risposte AI.
+
+chat_skill copiava la risposta grezza di Gemini su ogni skill estratta dalla
+stessa richiesta: item più grandi e più RCU per ogni scan/get. Lo script legge
+con uno scan parallelo le righe che hanno ancora aiResponseRaw, salva ogni
+testo distinto di un utente una sola volta (skills_repository.put_ai_response:
+zlib + TTL) e sulle righe lascia solo aiResponseId, con update paralleli
+condizionali sul testo letto. updated_at viene aggiornato (l'attributo sparisce
+dalle risposte) e alla fine si incrementano le generazioni della cache.
+
+Uso:
+    python scripts/migrations/offload_ai_response_raw.py --segments 8 --workers 8 --dry-run
+"""
+import argparse
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from _common import parallel_scan, table_for_thread
+
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def offload(groups):
+    """Per ogni (user, testo): salva la risposta e aggiorna le sue righe; ritorna (aggiornate, saltate)."""
+    table = table_for_thread()
+    updated = skipped = 0
+    for (user, text), skill_ids in groups:
+        response_id = skills_repository.put_ai_response(user, text)
+        for skill_id in skill_ids:
+            try:
+                table.update_item(
+                    Key={"Skill_UID": skill_id},
+                    UpdateExpression="SET aiResponseId = :id, updated_at = :updated_at REMOVE aiResponseRaw",
+                    ConditionExpression="aiResponseRaw = :raw",
+                    ExpressionAttributeValues={
+                        ":id": response_id,
+                        ":raw": text,
+                        ":updated_at": skills_repository.utc_now_precise(),
+                    },
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                skipped += 1
+    return updated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(
+        args.segments,
+        FilterExpression=Attr("aiResponseRaw").exists(),
+        ProjectionExpression="Skill_UID, #user, aiResponseRaw",
+        ExpressionAttributeNames={"#user": "user"},
+    )
+    # le righe senza testo (NULL) perdono solo l'attributo
+    empty = [item["Skill_UID"] for item in items if not isinstance(item["aiResponseRaw"], str)]
+    groups = defaultdict(list)
+    for item in items:
+        if isinstance(item["aiResponseRaw"], str):
+            groups[(item.get("user", ""), item["aiResponseRaw"])].append(item["Skill_UID"])
+    size = sum(len(text.encode("utf-8")) * len(ids) for (_, text), ids in groups.items())
+    logger.info("Righe con aiResponseRaw: %d (%d vuote), risposte distinte: %d, %.1f MB sulle skill",
+                len(items), len(empty), len(groups), size / 1e6)
+    if args.dry_run or not items:
+        return
+
+    table = table_for_thread()
+    for skill_id in empty:
+        table.update_item(Key={"Skill_UID": skill_id}, UpdateExpression="REMOVE aiResponseRaw")
+
+    entries = list(groups.items())
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(offload, [entries[i::args.workers] for i in range(args.workers)]))
+    updated = sum(result[0] for result in results)
+    skipped = sum(result[1] for result in results)
+
+    users = {user for user, _ in groups if user}
+    skills_repository.bump_generations([*users, skills_repository.ALL_USERS])
+    logger.info("Migrazione completata: %d aggiornate, %d riscritte nel frattempo", updated, skipped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Migrazione: ricostruisce da zero i riepiloghi per utente della tabella meta.
+
+Lo stream applica solo le variazioni: i riepiloghi partono dalle skill già in
+tabella quando il consumer skills_summary_stream viene attivato. Lo script
+legge con uno scan parallelo le skill, calcola il riepilogo di ogni utente
+(skill_summary.from_items) e lo sostituisce. Va lanciato dopo aver creato
+l'event source mapping (così nessuna scrittura resta fuori) e con poco
+traffico: una scrittura che arriva tra lo scan e la sostituzione può essere
+contata due volte o nessuna. Si può rilanciare in qualsiasi momento per
+riallineare i riepiloghi (toglie anche i giorni di attività fuori finestra).
+
+Uso:
+    python scripts/migrations/rebuild_skill_summaries.py --segments 8 --dry-run
+"""
+import argparse
+import logging
+
+from _common import parallel_scan
+
+import skill_summary
+import skills_repository
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    items = parallel_scan(
+        args.segments,
+        ProjectionExpression="Skill_UID, #user, skill, #level, acquired_on, updated_at, Skill_ULID",
+        ExpressionAttributeNames={"#user": "user", "#level": "level"},
+    )
+    by_user = {}
+    for item in items:
+        if "level" in item:
+            item["level"] = int(item["level"])  # la resource boto3 legge i numeri come Decimal
+        by_user.setdefault(item.get("user"), []).append(item)
+    by_user.pop(None, None)
+    logger.info("Lette %d skill di %d utenti", len(items), len(by_user))
+    if args.dry_run:
+        return
+
+    for user, rows in by_user.items():
+        skills_repository.put_summary(user, skill_summary.from_items(rows))
+    logger.info("Migrazione completata: %d riepiloghi riscritti", len(by_user))
+
+
+if __name__ == "__main__":
+    main()